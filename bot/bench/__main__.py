@@ -0,0 +1,22 @@
+import sys
+from importlib import import_module
+
+BENCHMARKS = {
+    'reauth': 'bot.bench.reauth',
+    'server': 'bot.bench.toc_server',
+    'farm': 'bot.bench.farm',
+    'registry': 'bot.bench.registry',
+    'config': 'bot.bench.config',
+    'proxies': 'bot.bench.proxies',
+}
+
+
+def main() -> None:
+    if len(sys.argv) < 2 or sys.argv[1] not in BENCHMARKS:
+        print(f"Usage: python -m bot.bench {{{','.join(BENCHMARKS)}}} [options]")
+        sys.exit(1)
+    import_module(BENCHMARKS[sys.argv[1]]).main(sys.argv[2:])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+import asyncio
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Iterator
+
+
+class CompressedClock:
+    def __init__(self, speed: float, epoch: float | None = None):
+        self.speed = speed
+        self.epoch = epoch if epoch is not None else time.time()
+
+    def time(self) -> float:
+        return self.epoch + (time.time() - self.epoch) * self.speed
+
+    def real_delay(self, seconds: float) -> float:
+        return max(0.0, seconds) / self.speed
+
+    async def sleep(self, delay: float, result=None):
+        return await asyncio.sleep(self.real_delay(delay), result)
+
+    def make_datetime(self) -> type:
+        clock = self
+
+        class ClockDatetime(datetime):
+            @classmethod
+            def now(cls, tz=None):
+                return datetime.fromtimestamp(clock.time(), tz)
+
+        return ClockDatetime
+
+
+class _AsyncioShim:
+    def __init__(self, clock: CompressedClock):
+        self.sleep = clock.sleep
+
+    def __getattr__(self, name: str):
+        return getattr(asyncio, name)
+
+
+@contextmanager
+def compressed_time(clock: CompressedClock, *modules) -> Iterator[CompressedClock]:
+    """Point asyncio.sleep, time() and datetime.now() of the given modules at the clock."""
+    replacements = {
+        'asyncio': _AsyncioShim(clock),
+        'datetime': clock.make_datetime(),
+        'timestamp': clock.time,
+    }
+    saved = []
+    for module in modules:
+        for name, value in replacements.items():
+            if hasattr(module, name):
+                saved.append((module, name, getattr(module, name)))
+                setattr(module, name, value)
+    try:
+        yield clock
+    finally:
+        for module, name, value in reversed(saved):
+            setattr(module, name, value)
@@ -0,0 +1,62 @@
+import asyncio
+import json
+import time
+from typing import Callable
+from urllib.parse import quote
+
+from better_proxy import Proxy
+
+
+class FakeTelegramClient:
+    """Stand-in for UniversalTelegramClient that never touches MTProto."""
+
+    def __init__(self, session_name: str = 'bench', user_id: int = 1, rpc_delay: float = 0,
+                 now: Callable[[], float] = time.time):
+        self.session_name = session_name
+        self.now = now
+        self.user_id = user_id
+        self.rpc_delay = rpc_delay
+        self.proxy = None
+        self.rpc_calls = 0
+
+    async def _rpc(self) -> None:
+        self.rpc_calls += 1
+        if self.rpc_delay:
+            await asyncio.sleep(self.rpc_delay)
+
+    def set_proxy(self, proxy: Proxy) -> None:
+        self.proxy = proxy
+
+    def get_ref_id(self) -> str:
+        return 'ref_bench'
+
+    async def get_webview_url(self, bot_username: str = '', bot_url: str = '', default_val: str = '') -> str:
+        await self._rpc()
+        user = json.dumps({'id': self.user_id, 'first_name': self.session_name})
+        init_data = f"query_id=bench{self.user_id}&user={quote(user)}&auth_date={int(self.now())}&hash=bench"
+        return f"{bot_url or 'https://miniapp.theopencoin.xyz/'}#tgWebAppData={quote(init_data)}&tgWebAppVersion=8.0"
+
+    async def get_app_webview_url(self, bot_username: str, bot_shortname: str, default_val: str) -> str:
+        return await self.get_webview_url(bot_username, default_val=default_val)
+
+    async def join_chat(self, chat_username: str) -> bool:
+        await self._rpc()
+        return True
+
+    async def join_telegram_channel(self, channel_data: dict) -> bool:
+        await self._rpc()
+        return True
+
+    async def join_and_mute_tg_channel(self, link: str) -> bool:
+        await self._rpc()
+        return True
+
+    async def send_start_command(self, pool_id: str) -> bool:
+        await self._rpc()
+        return True
+
+    async def close(self) -> None:
+        pass
+
+    async def update_profile(self, first_name: str = None, last_name: str = None, about: str = None) -> None:
+        await self._rpc()
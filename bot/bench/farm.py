@@ -0,0 +1,163 @@
+import argparse
+import asyncio
+import json
+import os
+import resource
+import sys
+from random import uniform
+from time import monotonic
+
+import aiohttp
+from loguru import logger as base_logger
+
+from bot.bench.clock import CompressedClock, compressed_time
+from bot.bench.fake_telegram import FakeTelegramClient
+from bot.bench.toc_server import add_scenario_arguments
+from bot.config import settings
+from bot.core import block_ticker as block_ticker_module
+from bot.core import tapper
+from bot.core.agents import generate_random_user_agent
+from bot.core.tapper import BaseBot
+from bot.utils import captcha_solver, init_data_cache
+
+
+def current_rss() -> int:
+    try:
+        with open('/proc/self/statm') as file:
+            return int(file.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError, AttributeError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def percentile(values: list, share: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * share))]
+
+
+async def start_server(args: argparse.Namespace, clock: CompressedClock) -> asyncio.subprocess.Process:
+    command = [
+        sys.executable, '-m', 'bot.bench', 'server', '--port', str(args.port),
+        '--speed', str(args.speed), '--epoch', repr(clock.epoch),
+        '--latency', str(args.latency[0]), str(args.latency[1]),
+        '--unauthorized', str(args.unauthorized), '--blocked', str(args.blocked),
+        '--exceeded', str(args.exceeded), '--capture', str(args.capture)
+    ]
+    process = await asyncio.create_subprocess_exec(*command, stdout=asyncio.subprocess.PIPE)
+    line = await asyncio.wait_for(process.stdout.readline(), timeout=30)
+    if b'listening' not in line:
+        process.kill()
+        raise RuntimeError(f"TOC stand-in failed to start: {line.decode().strip()}")
+    return process
+
+
+async def measure_loop_lag(samples: list, interval: float = 0.1) -> None:
+    while True:
+        started = monotonic()
+        await asyncio.sleep(interval)
+        samples.append(monotonic() - started - interval)
+
+
+async def run_session(bot: BaseBot, clock: CompressedClock, start_delay: float) -> None:
+    await clock.sleep(start_delay)
+    bot._http_client = await bot._http.get(None)
+    bot._init_data_cache.start()
+    while True:
+        await bot.process_bot_logic()
+        await clock.sleep(5)
+
+
+async def run_farm(args: argparse.Namespace) -> None:
+    settings.USE_PROXY = False
+    settings.SUBSCRIBE_TELEGRAM = False
+    settings.JOIN_POOL = False
+    settings.BLOCKS_BEFORE_SLEEP = (0, 0)
+    settings.RATE_GOVERNOR = args.governor
+    settings.RESPONSE_CACHE = args.cache
+    settings.SHARED_BLOCK_TICKER = not args.no_ticker
+
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if hard == resource.RLIM_INFINITY or hard > soft:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+    clock = CompressedClock(args.speed)
+    server = await start_server(args, clock)
+    base_url = f"http://127.0.0.1:{args.port}"
+    captcha_solver._solver_instance = captcha_solver.CaptchaSolver()
+    captcha_solver._solver_instance._base_url = base_url
+
+    bots, tasks, lag = [], [], []
+    try:
+        with compressed_time(clock, tapper, block_ticker_module, init_data_cache):
+            rss_before = current_rss()
+            for index in range(args.sessions):
+                bot = BaseBot(
+                    FakeTelegramClient(f"bench_{index}", index + 1, now=clock.time),
+                    session_config={'api': {}, 'user_agent': generate_random_user_agent()}
+                )
+                bot._base_url = f"{base_url}/api/v1"
+                bots.append(bot)
+
+            lag_task = asyncio.create_task(measure_loop_lag(lag))
+            started = monotonic()
+            tasks = [asyncio.create_task(run_session(bot, clock, uniform(0, args.spread))) for bot in bots]
+            await asyncio.sleep(args.minutes * 60 / args.speed)
+            elapsed = monotonic() - started
+            rss_after = current_rss()
+            lag_task.cancel()
+
+        async with aiohttp.ClientSession() as session:
+            async with session.get(f"{base_url}/__bench/stats") as response:
+                stats = await response.json()
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for bot in bots:
+            block_ticker_module.block_ticker.unregister(bot)
+        await asyncio.gather(*(bot.close() for bot in bots), return_exceptions=True)
+        server.terminate()
+        await server.wait()
+
+    delays = stats['start_delays']
+    report = {
+        'sessions': args.sessions,
+        'virtual_minutes': args.minutes,
+        'real_seconds': round(elapsed, 1),
+        'requests': stats['requests'],
+        'rps': round(stats['requests'] / elapsed, 1),
+        'statuses': stats['statuses'],
+        'loop_lag_ms': {
+            'p50': round(percentile(lag, 0.5) * 1000, 2),
+            'p99': round(percentile(lag, 0.99) * 1000, 2),
+            'max': round(max(lag, default=0) * 1000, 2)
+        },
+        'rss_per_session_kb': round((rss_after - rss_before) / max(1, args.sessions) / 1024, 1),
+        'start_mining_delay_s': {
+            'count': len(delays),
+            'p50': round(percentile(delays, 0.5), 2),
+            'p95': round(percentile(delays, 0.95), 2),
+            'max': round(max(delays, default=0), 2)
+        }
+    }
+    print(json.dumps(report, indent=2))
+
+
+def main(argv: list[str]) -> None:
+    parser = argparse.ArgumentParser(prog='python -m bot.bench farm')
+    parser.add_argument('--sessions', type=int, default=1000)
+    parser.add_argument('--minutes', type=float, default=10, help='Virtual minutes to run')
+    parser.add_argument('--speed', type=float, default=20, help='Clock compression factor')
+    parser.add_argument('--spread', type=float, default=60, help='Virtual seconds over which sessions start')
+    parser.add_argument('--port', type=int, default=18080)
+    parser.add_argument('--governor', action='store_true', help='Keep RATE_GOVERNOR enabled')
+    parser.add_argument('--cache', action='store_true', help='Enable RESPONSE_CACHE')
+    parser.add_argument('--no-ticker', action='store_true', help='Disable SHARED_BLOCK_TICKER')
+    parser.add_argument('--log-level', default='ERROR')
+    add_scenario_arguments(parser)
+    args = parser.parse_args(argv)
+
+    base_logger.remove()
+    base_logger.add(sys.stderr, level=args.log_level)
+    asyncio.run(run_farm(args))
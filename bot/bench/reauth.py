@@ -0,0 +1,149 @@
+import argparse
+import asyncio
+import json
+import sys
+
+from bot.config import settings
+from bot.core import tapper
+from bot.core.tapper import BaseBot
+from bot.bench.fake_telegram import FakeTelegramClient
+
+
+class FakeResponse:
+    def __init__(self, status: int, payload):
+        self.status = status
+        self._payload = payload
+
+    async def read(self) -> bytes:
+        return json.dumps(self._payload).encode()
+
+    async def json(self):
+        return self._payload
+
+    async def text(self):
+        return str(self._payload)
+
+    async def release(self):
+        pass
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class FakeTocClient:
+    closed = False
+
+    def __init__(self, unauthorized_every: int, unauthorized_total: int):
+        self.unauthorized_every = unauthorized_every
+        self.unauthorized_total = unauthorized_total
+        self.requests = 0
+        self.unauthorized = 0
+        self.block_id = 1000
+        self.cycle_requests = []
+        self.depths = []
+        self.loops = []
+        self.done = asyncio.Event()
+        self._cycle_start = 0
+
+    def _record_stack(self) -> None:
+        frame, depth, loops = sys._getframe(), 0, 0
+        while frame:
+            depth += 1
+            loops += frame.f_code.co_name == 'process_bot_logic'
+            frame = frame.f_back
+        self.depths.append(depth)
+        self.loops.append(loops)
+
+    def _payload(self, url: str):
+        path = url.split('/api/v1', 1)[-1].split('?')[0]
+        if path == '/blocks/latest':
+            self.block_id += 1
+            return {'id': self.block_id, 'isUserMining': False, 'minersCount': 1}
+        if path == '/users/stats':
+            return {'hasVoted': True, 'hasJoinedX': True, 'hasJoinedCommunity': True}
+        if path in ('/proposals', '/blocks/user-results'):
+            return []
+        return {}
+
+    def _request(self, url: str) -> FakeResponse:
+        self.requests += 1
+        if self.requests % self.unauthorized_every:
+            return FakeResponse(200, self._payload(url))
+
+        self._record_stack()
+        self.unauthorized += 1
+        self.cycle_requests.append(self.requests - self._cycle_start)
+        self._cycle_start = self.requests
+        if self.unauthorized >= self.unauthorized_total:
+            self.done.set()
+        return FakeResponse(401, {'error': 'Unauthorized'})
+
+    def get(self, url: str, **kwargs) -> FakeResponse:
+        return self._request(url)
+
+    def post(self, url: str, **kwargs) -> FakeResponse:
+        return self._request(url)
+
+
+def _window(values: list, size: int) -> tuple:
+    head, tail = values[:size], values[-size:]
+    return max(head), max(tail)
+
+
+async def run_benchmark(unauthorized_every: int, unauthorized_total: int) -> None:
+    settings.RATE_GOVERNOR = False
+    settings.RESPONSE_CACHE = False
+    settings.SHARED_BLOCK_TICKER = False
+    settings.SUBSCRIBE_TELEGRAM = False
+    settings.JOIN_POOL = False
+    settings.BLOCKS_BEFORE_SLEEP = (0, 0)
+
+    real_sleep = asyncio.sleep
+
+    async def instant_sleep(delay, *args, **kwargs):
+        await real_sleep(0)
+
+    tapper.asyncio.sleep = instant_sleep
+    try:
+        client = FakeTocClient(unauthorized_every, unauthorized_total)
+        bot = BaseBot(FakeTelegramClient(), session_config={'api': {}, 'user_agent': 'bench'})
+        bot._http_client = client
+
+        task = asyncio.create_task(bot.process_bot_logic())
+        done = asyncio.create_task(client.done.wait())
+        await asyncio.wait({task, done}, return_when=asyncio.FIRST_COMPLETED)
+        task.cancel()
+        done.cancel()
+        await asyncio.gather(task, done, return_exceptions=True)
+    finally:
+        tapper.asyncio.sleep = real_sleep
+
+    if not client.depths:
+        print("Mining loop exited before the first 401 response")
+        sys.exit(1)
+
+    size = max(1, min(100, len(client.depths) // 10))
+    depth_head, depth_tail = _window(client.depths, size)
+    loops_head, loops_tail = _window(client.loops, size)
+    cycle_head, cycle_tail = _window(client.cycle_requests[1:] or client.cycle_requests, size)
+    flat = depth_head == depth_tail and loops_head == loops_tail and cycle_head == cycle_tail
+
+    print(f"401 responses:        {client.unauthorized}")
+    print(f"Total requests:       {client.requests}")
+    print(f"Stack depth:          first {depth_head} | last {depth_tail}")
+    print(f"Mining loops:         first {loops_head} | last {loops_tail}")
+    print(f"Requests between 401: first {cycle_head} | last {cycle_tail}")
+    print(f"Result:               {'flat' if flat else 'GROWING'}")
+    if not flat:
+        sys.exit(1)
+
+
+def main(argv: list[str]) -> None:
+    parser = argparse.ArgumentParser(prog='python -m bot.bench reauth')
+    parser.add_argument('--count', type=int, default=5000, help='Number of 401 responses to simulate')
+    parser.add_argument('--every', type=int, default=7, help='Return 401 on every N-th request')
+    args = parser.parse_args(argv)
+    asyncio.run(run_benchmark(max(2, args.every), max(1, args.count)))
@@ -0,0 +1,103 @@
+import argparse
+import asyncio
+import glob
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from time import perf_counter
+
+from pyrogram.storage import FileStorage
+from telethon.crypto import AuthKey
+from telethon.sessions import SQLiteSession
+
+from bot.config import settings
+from bot.utils.session_registry import SessionRegistry
+from bot.utils.universal_telegram_client import UniversalTelegramClient
+
+
+def create_telethon_session(path: str) -> None:
+    session = SQLiteSession(path)
+    session.set_dc(2, '149.154.167.51', 443)
+    session.auth_key = AuthKey(os.urandom(256))
+    session.save()
+    session.close()
+
+
+async def create_pyrogram_session(folder: str, name: str, user_id: int) -> None:
+    storage = FileStorage(name, Path(folder))
+    await storage.open()
+    await storage.dc_id(4)
+    await storage.api_id(settings.API_ID or 1)
+    await storage.test_mode(False)
+    await storage.auth_key(os.urandom(256))
+    await storage.date(0)
+    await storage.user_id(user_id)
+    await storage.is_bot(False)
+    await storage.save()
+    await storage.close()
+
+
+def legacy_sessions(folder: str) -> list[str]:
+    session_names = glob.glob(f"{folder}/*.session")
+    session_names += glob.glob(f"{folder}/telethon/*.session")
+    session_names += glob.glob(f"{folder}/pyrogram/*.session")
+    return [file.replace('.session', '') for file in sorted(session_names)]
+
+
+def build_clients(sessions: list[str], registry: SessionRegistry = None) -> None:
+    for session in sessions:
+        params = {'api_id': settings.API_ID or 1, 'api_hash': settings.API_HASH or 'x', 'session': session,
+                  'lang_code': 'en', 'system_lang_code': 'en-US'}
+        if registry and registry.backend(session):
+            params['backend'] = registry.backend(session)
+        client = UniversalTelegramClient(**params)
+        if not client.is_pyrogram:
+            client.client.session.close()
+
+
+def timed(fn, *args) -> float:
+    started = perf_counter()
+    fn(*args)
+    return round(perf_counter() - started, 3)
+
+
+async def run(args: argparse.Namespace) -> None:
+    folder = tempfile.mkdtemp(prefix='bench_sessions_')
+    try:
+        pyrogram_count = int(args.sessions * args.pyrogram)
+        for index in range(args.sessions - pyrogram_count):
+            create_telethon_session(os.path.join(folder, f"telethon_{index}"))
+        for index in range(pyrogram_count):
+            await create_pyrogram_session(folder, f"pyrogram_{index}", index + 1)
+
+        registry_path = os.path.join(folder, 'registry.json')
+        legacy = timed(lambda: build_clients(legacy_sessions(folder)))
+
+        cold_registry = SessionRegistry(registry_path)
+        cold = timed(lambda: build_clients(cold_registry.scan(folder), cold_registry))
+
+        warm_registry = SessionRegistry(registry_path)
+        warm_scan = timed(warm_registry.scan, folder)
+        warm = timed(lambda: build_clients(warm_registry.scan(folder), warm_registry))
+
+        print(json.dumps({
+            'sessions': args.sessions,
+            'pyrogram_sessions': pyrogram_count,
+            'legacy_seconds': legacy,
+            'registry_cold_seconds': cold,
+            'registry_warm_seconds': warm,
+            'registry_warm_scan_seconds': warm_scan,
+            'cold_inspections': cold_registry.inspected,
+            'warm_inspections': warm_registry.inspected
+        }, indent=2))
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+def main(argv: list[str]) -> None:
+    parser = argparse.ArgumentParser(prog='python -m bot.bench registry')
+    parser.add_argument('--sessions', type=int, default=1000)
+    parser.add_argument('--pyrogram', type=float, default=0.5, help='Share of Pyrogram sessions')
+    asyncio.run(run(parser.parse_args(argv)))
@@ -0,0 +1,243 @@
+import argparse
+import asyncio
+import os
+from dataclasses import dataclass, field
+from random import random, randint, uniform
+from typing import Dict, List, Optional, Set, Tuple
+
+from aiohttp import web
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+
+from bot.bench.clock import CompressedClock
+
+CAPTCHA_KEY = 'NqlWSO25af'
+PAGE_CHUNK = 'page-0b5e11c4a7d2.js'
+
+
+@dataclass
+class Scenario:
+    latency: Tuple[float, float] = (0.0, 0.0)
+    unauthorized_rate: float = 0.0
+    blocked_rate: float = 0.0
+    exceeded_rate: float = 0.0
+    capture_rate: float = 0.0
+
+
+@dataclass
+class Miner:
+    blocks: Set[int] = field(default_factory=set)
+    captcha_answer: Optional[int] = None
+    captcha_passed: bool = False
+    tokens: float = 0.0
+
+
+class TocStandIn:
+    """Local stand-in for the miniapp.theopencoin.xyz API with scriptable failures."""
+
+    def __init__(self, scenario: Scenario, clock: CompressedClock):
+        self.scenario = scenario
+        self.clock = clock
+        self.miners: Dict[str, Miner] = {}
+        self.requests = 0
+        self.statuses: Dict[int, int] = {}
+        self.paths: Dict[str, int] = {}
+        self.start_delays: List[float] = []
+        self._aesgcm = AESGCM(CAPTCHA_KEY.encode().ljust(32, b'0')[:32])
+
+    @property
+    def block_id(self) -> int:
+        return int(self.clock.time() // 60)
+
+    def _miners_count(self, block_id: int) -> int:
+        return sum(block_id in miner.blocks for miner in self.miners.values())
+
+    def encrypt_capture(self, plaintext: str) -> str:
+        iv = os.urandom(12)
+        data = self._aesgcm.encrypt(iv, plaintext.encode(), None)
+        return f"{iv.hex()}:{data[:-16].hex()}:{data[-16:].hex()}"
+
+    @web.middleware
+    async def _middleware(self, request: web.Request, handler):
+        self.requests += 1
+        if self.scenario.latency[1] > 0:
+            await asyncio.sleep(uniform(*self.scenario.latency))
+
+        if request.path.startswith('/api/v1'):
+            path = request.path[len('/api/v1'):]
+            self.paths[path] = self.paths.get(path, 0) + 1
+            authorization = request.headers.get('authorization', '')
+            if not authorization.startswith('tma ') or random() < self.scenario.unauthorized_rate:
+                response = web.json_response({'error': 'Unauthorized'}, status=401)
+            else:
+                request['miner'] = self.miners.setdefault(authorization, Miner())
+                response = await handler(request)
+        else:
+            response = await handler(request)
+
+        self.statuses[response.status] = self.statuses.get(response.status, 0) + 1
+        return response
+
+    async def index(self, request: web.Request) -> web.Response:
+        html = f'<html><head><script src="/_next/static/chunks/app/{PAGE_CHUNK}"></script></head></html>'
+        return web.Response(text=html, content_type='text/html')
+
+    async def page_chunk(self, request: web.Request) -> web.Response:
+        script = f'(()=>{{const k="{CAPTCHA_KEY}";fetch("/api/v1/blocks/latest")}})();'
+        return web.Response(text=script, content_type='application/javascript')
+
+    async def latest_block(self, request: web.Request) -> web.Response:
+        block_id = self.block_id
+        return web.json_response({
+            'id': block_id,
+            'isUserMining': block_id in request['miner'].blocks,
+            'minersCount': self._miners_count(block_id),
+            'startedAt': block_id * 60
+        })
+
+    async def start_mining(self, request: web.Request) -> web.Response:
+        miner: Miner = request['miner']
+        block_id = (await request.json()).get('blockId')
+        if block_id != self.block_id:
+            return web.json_response({'error': 'Block is closed'}, status=400)
+
+        if random() < self.scenario.blocked_rate:
+            return web.json_response({'code': 'user_blocked', 'message': 'Blocked for 1 minutes'}, status=403)
+        if random() < self.scenario.exceeded_rate:
+            return web.json_response({'error': 'Mining limit exceeded, retry in 1 minutes'}, status=409)
+        if not miner.captcha_passed and random() < self.scenario.capture_rate:
+            a, b = randint(1, 50), randint(1, 50)
+            miner.captcha_answer = a + b
+            return web.json_response({
+                'code': 'capture_required',
+                'capture': self.encrypt_capture(f"SUMM_V1-{a}-{b}")
+            }, status=409)
+
+        miner.captcha_passed = False
+        if block_id not in miner.blocks:
+            miner.blocks.add(block_id)
+            self.start_delays.append(self.clock.time() - block_id * 60)
+        return web.json_response({'success': True})
+
+    async def verify_capture(self, request: web.Request) -> web.Response:
+        miner: Miner = request['miner']
+        context = (await request.json()).get('captureContext', {})
+        if miner.captcha_answer is None or context.get('c') != miner.captcha_answer:
+            return web.json_response({'error': 'Wrong answer'}, status=400)
+        miner.captcha_answer = None
+        miner.captcha_passed = True
+        return web.json_response({'success': True})
+
+    async def user_results(self, request: web.Request) -> web.Response:
+        miner: Miner = request['miner']
+        after = int(request.query.get('afterBlockId') or 0)
+        current = int(request.query.get('currentBlockId') or self.block_id)
+        results = []
+        for block_id in sorted(miner.blocks):
+            if after < block_id < current:
+                rewards = round(uniform(0.01, 1), 6)
+                miner.tokens += rewards
+                results.append({'block_id': block_id, 'rewards': rewards})
+        return web.json_response(results)
+
+    async def user_stats(self, request: web.Request) -> web.Response:
+        miner: Miner = request['miner']
+        return web.json_response({
+            'tokensMined': miner.tokens,
+            'numberOfReferrals': 0,
+            'luckFactor': 1,
+            'hasVoted': True,
+            'hasJoinedX': True,
+            'hasJoinedCommunity': True
+        })
+
+    async def user_pool(self, request: web.Request) -> web.Response:
+        return web.json_response({
+            'id': 1, 'title': 'Bench pool', 'fee_percentage': 0, 'number_of_miners': len(self.miners), 'tokens_mined': 0
+        })
+
+    async def proposals(self, request: web.Request) -> web.Response:
+        return web.json_response([])
+
+    async def proposal_votes(self, request: web.Request) -> web.Response:
+        return web.json_response({'userVote': None, 'recentVotes': []})
+
+    async def proposal_vote(self, request: web.Request) -> web.Response:
+        return web.json_response({'success': True})
+
+    async def user_check(self, request: web.Request) -> web.Response:
+        return web.json_response({
+            'hasJoinedX': True, 'hasVoted': True, 'hasJoinedChat': True, 'hasJoinedCommunity': True
+        })
+
+    async def bench_stats(self, request: web.Request) -> web.Response:
+        return web.json_response(self.stats())
+
+    def stats(self) -> Dict:
+        return {
+            'requests': self.requests,
+            'statuses': {str(status): count for status, count in self.statuses.items()},
+            'paths': self.paths,
+            'miners': len(self.miners),
+            'start_delays': self.start_delays
+        }
+
+    def create_app(self) -> web.Application:
+        app = web.Application(middlewares=[self._middleware])
+        app.router.add_get('/', self.index)
+        app.router.add_get(f'/_next/static/chunks/app/{PAGE_CHUNK}', self.page_chunk)
+        app.router.add_get('/api/v1/blocks/latest', self.latest_block)
+        app.router.add_post('/api/v1/blocks/start-mining', self.start_mining)
+        app.router.add_get('/api/v1/blocks/user-results', self.user_results)
+        app.router.add_post('/api/v1/captures/verify', self.verify_capture)
+        app.router.add_get('/api/v1/users/stats', self.user_stats)
+        app.router.add_get('/api/v1/users/{check:check-[a-z-]+}', self.user_check)
+        app.router.add_get('/api/v1/pools/user-pool', self.user_pool)
+        app.router.add_get('/api/v1/proposals', self.proposals)
+        app.router.add_get('/api/v1/proposals/{id}/votes', self.proposal_votes)
+        app.router.add_post('/api/v1/proposals/{id}/vote', self.proposal_vote)
+        app.router.add_get('/__bench/stats', self.bench_stats)
+        return app
+
+
+async def serve(scenario: Scenario, clock: CompressedClock, host: str, port: int) -> None:
+    runner = web.AppRunner(TocStandIn(scenario, clock).create_app(), access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port, backlog=4096).start()
+    print(f"TOC stand-in listening on http://{host}:{port}", flush=True)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
+
+
+def add_scenario_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument('--latency', type=float, nargs=2, default=(0.0, 0.0), metavar=('MIN', 'MAX'),
+                        help='Injected response latency in real seconds')
+    parser.add_argument('--unauthorized', type=float, default=0.0, help='Share of requests answered with 401')
+    parser.add_argument('--blocked', type=float, default=0.0, help='Share of start-mining answered with 403 user_blocked')
+    parser.add_argument('--exceeded', type=float, default=0.0, help='Share of start-mining answered with 409 exceeded')
+    parser.add_argument('--capture', type=float, default=0.0, help='Share of start-mining answered with capture_required')
+
+
+def scenario_from_args(args: argparse.Namespace) -> Scenario:
+    return Scenario(
+        latency=tuple(args.latency),
+        unauthorized_rate=args.unauthorized,
+        blocked_rate=args.blocked,
+        exceeded_rate=args.exceeded,
+        capture_rate=args.capture
+    )
+
+
+def main(argv: list[str]) -> None:
+    parser = argparse.ArgumentParser(prog='python -m bot.bench server')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=18080)
+    parser.add_argument('--speed', type=float, default=1.0, help='Clock compression factor')
+    parser.add_argument('--epoch', type=float, default=None, help='Real timestamp the compressed clock starts from')
+    add_scenario_arguments(parser)
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(scenario_from_args(args), CompressedClock(args.speed, args.epoch), args.host, args.port))
+    except KeyboardInterrupt:
+        pass
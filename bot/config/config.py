@@ -24,21 +24,79 @@ class Settings(BaseSettings):
     SESSIONS_PER_PROXY: int = 1
     USE_PROXY: bool = True
     DISABLE_PROXY_REPLACE: bool = False
+    PROXY_CHECK_CONCURRENCY: int = 50
+    PROXY_CHECK_TIER: int = 2
+    PROXY_CHECK_URL: str = "https://api.ipify.org"
+    PROXY_HEALTH_INTERVAL: int = 600
+    PROXY_HEALTH_WINDOW: int = 5
+    PROXY_HEALTH_MIN_SUCCESS: float = 0.5
+    PROXY_PROBE_HOST: str = "miniapp.theopencoin.xyz"
+    PROXY_REBALANCE_INTERVAL: int = 1800
+    PROXY_REBALANCE_MAX_MOVES: int = 5
+    PROXY_REBALANCE_MIN_GAIN: float = 0.25
 
     DEVICE_PARAMS: bool = False
+
+    TG_PERSISTENT_CONNECTIONS: bool = False
+    TG_MAX_LIVE_CLIENTS: int = 50
+    TG_META_CACHE: bool = True
+    TG_RPC_SCHEDULER: bool = True
+    TG_RPC_CONCURRENCY: int = 10
+    TG_RPC_RATE: float = 5
+    TG_RPC_DC_CONCURRENCY: int = 3
+    TG_RPC_DC_RATE: float = 2
+    LOCK_MODE: str = "auto"
+
+    PREFLIGHT_ON_START: bool = False
+    PREFLIGHT_GET_ME: bool = False
+    PREFLIGHT_CONCURRENCY: int = 5
+    FIRST_RUN_COMPACT: bool = False
+    CONFIG_BACKEND: str = "sqlite"
     
     SUBSCRIBE_TELEGRAM: bool = False
     COMMUNITY_CHANNEL: str = "theopencoin_community"
 
     JOIN_POOL: bool = False
 
+    SHARED_BLOCK_TICKER: bool = True
+    BLOCK_TICKER_FETCHERS: int = 3
+    BLOCK_TICKER_DELAY: int = 2
+    BLOCK_TICKER_RETRY: int = 3
+    BLOCK_JOIN_DELAY: Tuple[int, int] = (0, 5)
+
+    INIT_DATA_TTL: int = 3600
+    INIT_DATA_REFRESH_LEAD: int = 300
+    INIT_DATA_PERSIST: bool = False
+
+    HTTP_KEEPALIVE: int = 75
+    HTTP_POOL_SIZE: int = 4
+    HTTP_PREWARM_LEAD: int = 5
+
+    RESPONSE_CACHE: bool = False
+
+    RATE_GOVERNOR: bool = True
+    RATE_LIMIT_GLOBAL: float = 100
+    RATE_LIMIT_PROXY: float = 5
+    RATE_LIMIT_SESSION: float = 2
+    RATE_LIMIT_BURST: int = 5
+    RATE_AIMD_INCREASE: float = 0.05
+    RATE_AIMD_DECREASE: float = 0.5
+    RATE_AIMD_MIN_FRACTION: float = 0.05
+
+    METRICS_PORT: int = 0
+    METRICS_SNAPSHOT_INTERVAL: int = 300
+
     DEBUG_LOGGING: bool = False
 
+    WORKERS: int = 1
+
     AUTO_UPDATE: bool = True
     CHECK_UPDATE_INTERVAL: int = 300
     BLACKLISTED_SESSIONS: str = ""
 
     DEBUG_HASH: bool = False
+    HASH_CHECK_CONCURRENCY: int = 8
+    HASH_CHECK_TIMEOUT: int = 15
 
     @property
     def blacklisted_sessions(self) -> List[str]:
@@ -0,0 +1,89 @@
+import asyncio
+import async_timeout
+from datetime import datetime
+from typing import Optional, Dict, List
+
+from bot.config import settings
+from bot.utils import logger
+from bot.utils.metrics import metrics
+
+
+class BlockTicker:
+    def __init__(self):
+        self._condition = asyncio.Condition()
+        self._block: Optional[Dict] = None
+        self._fetchers: List = []
+        self._rotation = 0
+        self._task: Optional[asyncio.Task] = None
+        self.polls = 0
+        self.published = 0
+
+    @property
+    def block_id(self) -> Optional[int]:
+        return self._block.get('id') if self._block else None
+
+    def register(self, fetcher) -> None:
+        if fetcher not in self._fetchers:
+            self._fetchers.append(fetcher)
+        if not self._task or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def unregister(self, fetcher) -> None:
+        if fetcher in self._fetchers:
+            self._fetchers.remove(fetcher)
+
+    async def wait_for_block(self, after_id: Optional[int], timeout: float) -> Optional[Dict]:
+        def is_new_block() -> bool:
+            return self.block_id is not None and (after_id is None or self.block_id > after_id)
+
+        async with self._condition:
+            try:
+                async with async_timeout.timeout(timeout):
+                    await self._condition.wait_for(is_new_block)
+            except asyncio.TimeoutError:
+                return None
+            return dict(self._block)
+
+    def stats(self) -> Dict:
+        return {
+            'polls': self.polls,
+            'published': self.published,
+            'fetchers': len(self._fetchers),
+            'block_id': self.block_id or 0
+        }
+
+    async def _publish(self, block: Dict) -> None:
+        async with self._condition:
+            self._block = {key: value for key, value in block.items() if key != 'isUserMining'}
+            self.published += 1
+            self._condition.notify_all()
+
+    async def _poll(self) -> Optional[Dict]:
+        for _ in range(min(settings.BLOCK_TICKER_FETCHERS, len(self._fetchers))):
+            fetcher = self._fetchers[self._rotation % len(self._fetchers)]
+            self._rotation += 1
+            self.polls += 1
+            block = await fetcher.fetch_latest_block()
+            if isinstance(block, dict) and block.get('id'):
+                return block
+        return None
+
+    async def _run(self) -> None:
+        while self._fetchers:
+            try:
+                block = await self._poll()
+                if block and (self.block_id is None or block['id'] > self.block_id):
+                    await self._publish(block)
+                    now = datetime.now()
+                    await asyncio.sleep(60 - now.second - now.microsecond / 1e6 + settings.BLOCK_TICKER_DELAY)
+                else:
+                    await asyncio.sleep(settings.BLOCK_TICKER_RETRY)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Block ticker error: {str(e)}")
+                await asyncio.sleep(settings.BLOCK_TICKER_RETRY)
+
+
+block_ticker = BlockTicker()
+metrics.register_collector('block_ticker', block_ticker.stats)
@@ -1,25 +1,34 @@
-import glob
 import asyncio
 import argparse
 import os
 import subprocess
 import signal
-from copy import deepcopy
-from random import uniform
+from random import shuffle, uniform
+from time import time
 from colorama import init, Fore, Style
 
 from bot.utils.universal_telegram_client import UniversalTelegramClient
 from bot.utils.web import run_web_and_tunnel, stop_web_and_tunnel
 from bot.config import settings
 from bot.core.agents import generate_random_user_agent
-from bot.utils import logger, config_utils, proxy_utils, CONFIG_PATH, SESSIONS_PATH, PROXIES_PATH
+from bot.utils import logger, config_utils, proxy_utils, first_run, CONFIG_PATH, SESSIONS_PATH, PROXIES_PATH
 from bot.core.tapper import run_tapper
 from bot.core.registrator import register_sessions
 from bot.utils.updater import UpdateManager
 from bot.utils.hash_checker import hash_checker
+from bot.utils.metrics import metrics
+from bot.utils.proxy_health import proxy_health
+from bot.utils.proxy_balancer import proxy_balancer
+from bot.utils.async_lock import configure_locks
+from bot.utils.session_preflight import run_preflight
+from bot.utils.session_registry import session_registry
+from bot.core.workers import (
+    WorkerSupervisor, get_worker_index, watch_supervisor, report_worker_stats
+)
 
 init()
 shutdown_event = asyncio.Event()
+PROXY_PREFETCH_FACTOR = 2
 
 def signal_handler(signum: int, frame) -> None:
     shutdown_event.set()
@@ -70,6 +79,7 @@ START_TEXT = f"""
     {Fore.GREEN}2. Create session{Style.RESET_ALL}
     {Fore.GREEN}3. Create session via QR{Style.RESET_ALL}
     {Fore.GREEN}4. Upload sessions via web (BETA){Style.RESET_ALL}
+    {Fore.GREEN}5. Check sessions (preflight){Style.RESET_ALL}
 
 {Fore.CYAN}Developed by: @Mffff4{Style.RESET_ALL}
 {Fore.CYAN}Our Telegram channel: {Fore.BLUE}https://t.me/+x8gutImPtaQyN2Ey{Style.RESET_ALL}
@@ -82,15 +92,19 @@ def prompt_user_action() -> int:
     logger.info(START_TEXT)
     while True:
         action = input("> ").strip()
-        if action.isdigit() and action in ("1", "2", "3", "4"):
+        if action.isdigit() and action in ("1", "2", "3", "4", "5"):
             return int(action)
-        logger.warning("Invalid action. Please enter a number between 1 and 4.")
+        logger.warning("Invalid action. Please enter a number between 1 and 5.")
 
 async def process() -> None:
     parser = argparse.ArgumentParser()
     parser.add_argument("-a", "--action", type=int, help="Action to perform")
+    parser.add_argument("-w", "--workers", type=int, default=settings.WORKERS,
+                        help="Number of worker processes to split sessions across")
+    parser.add_argument("--worker-index", type=int, help=argparse.SUPPRESS)
     parser.add_argument("--update-restart", action="store_true", help=argparse.SUPPRESS)
     args = parser.parse_args()
+    configure_locks(args.workers)
 
     if not settings.USE_PROXY:
         logger.info(f"Detected {len(get_sessions(SESSIONS_PATH))} sessions | USE_PROXY=False")
@@ -105,7 +119,12 @@ async def process() -> None:
     if action == 1:
         if not API_ID or not API_HASH:
             raise ValueError("API_ID and API_HASH not found in the .env file.")
-        await run_tasks()
+        if args.worker_index is not None:
+            await run_tasks(worker_index=args.worker_index, workers=args.workers)
+        elif args.workers > 1:
+            await run_supervisor(args.workers)
+        else:
+            await run_tasks(workers=args.workers)
     elif action == 2:
         await register_sessions()
     elif action == 3:
@@ -123,19 +142,69 @@ async def process() -> None:
             web_task.cancel()
             await stop_web_and_tunnel()
             print("Program terminated.")
+    elif action == 5:
+        await preflight_sessions()
 
 def get_sessions(sessions_folder: str) -> list[str]:
-    session_names = glob.glob(f"{sessions_folder}/*.session")
-    session_names += glob.glob(f"{sessions_folder}/telethon/*.session")
-    session_names += glob.glob(f"{sessions_folder}/pyrogram/*.session")
-    return [file.replace('.session', '') for file in sorted(session_names)]
+    return session_registry.scan(sessions_folder)
 
-async def get_tg_clients() -> list[UniversalTelegramClient]:
+async def preflight_sessions() -> None:
+    session_paths = get_sessions(SESSIONS_PATH)
+    if not session_paths:
+        raise FileNotFoundError("Session files not found")
+    await run_preflight(session_paths, config_utils.read_config_file(CONFIG_PATH))
+
+async def validate_proxies(session_paths: list[str], accounts_config: dict,
+                           verdicts: proxy_utils.ProxyVerdictCache) -> None:
+    if settings.DISABLE_PROXY_REPLACE:
+        return
+
+    session_proxies = []
+    for session in session_paths:
+        session_name = os.path.basename(session)
+        if session_name in settings.blacklisted_sessions:
+            continue
+        session_config = accounts_config.get(session_name, {})
+        if session_config.get('proxy') or 'proxy' not in session_config:
+            session_proxies.append(session_config.get('proxy'))
+
+    if not session_proxies:
+        return
+
+    started = time()
+    results = await verdicts.validate(session_proxies)
+    needed = sum(not results.get(proxy, False) for proxy in session_proxies)
+    if settings.USE_PROXY and needed:
+        unused = proxy_utils.get_unused_proxies(accounts_config, PROXIES_PATH)
+        shuffle(unused)
+        logger.info(f"Checking spare proxies for {needed} sessions | "
+                    f"Concurrency: {settings.PROXY_CHECK_CONCURRENCY}")
+        results = await verdicts.validate(unused[:needed * PROXY_PREFETCH_FACTOR])
+
+    logger.info(f"Proxy check finished in {time() - started:.1f}s | "
+                f"{sum(results.values())}/{len(results)} proxies are working")
+
+
+async def prepare_sessions(config_session: config_utils.ConfigSession,
+                           verdicts: proxy_utils.ProxyVerdictCache | None = None,
+                           worker_index: int | None = None, workers: int = 1) -> list[dict]:
     session_paths = get_sessions(SESSIONS_PATH)
 
     if not session_paths:
         raise FileNotFoundError("Session files not found")
-    tg_clients = []
+
+    accounts_config = config_session.config
+    assign_proxies = worker_index is None
+    inventory = proxy_utils.get_proxy_inventory(PROXIES_PATH)
+    if assign_proxies:
+        verdicts = verdicts or proxy_utils.ProxyVerdictCache()
+        await validate_proxies(session_paths, accounts_config, verdicts)
+        inventory.sync(accounts_config)
+    else:
+        session_paths = [session for session in session_paths
+                         if get_worker_index(os.path.basename(session), workers) == worker_index]
+
+    prepared_sessions = []
     for session in session_paths:
         session_name = os.path.basename(session)
 
@@ -143,32 +212,11 @@ async def get_tg_clients() -> list[UniversalTelegramClient]:
             logger.warning(f"{session_name} | Session is blacklisted | Skipping")
             continue
 
-        accounts_config = config_utils.read_config_file(CONFIG_PATH)
-        session_config: dict = deepcopy(accounts_config.get(session_name, {}))
+        session_config = config_session.get(session_name)
         if 'api' not in session_config:
             session_config['api'] = {}
         api_config = session_config.get('api', {})
-        api = None
-        if api_config.get('api_id') in [4, 6, 2040, 10840, 21724]:
-            api = config_utils.get_api(api_config)
-
-        if api:
-            client_params = {
-                "session": session,
-                "api": api
-            }
-        else:
-            client_params = {
-                "api_id": api_config.get("api_id", API_ID),
-                "api_hash": api_config.get("api_hash", API_HASH),
-                "session": session,
-                "lang_code": api_config.get("lang_code", "en"),
-                "system_lang_code": api_config.get("system_lang_code", "en-US")
-            }
-
-            for key in ("device_model", "system_version", "app_version"):
-                if api_config.get(key):
-                    client_params[key] = api_config[key]
+        client_params = config_utils.get_client_params(session, session_config, session_registry.backend(session))
 
         session_config['user_agent'] = session_config.get('user_agent', generate_random_user_agent())
         api_config.update(api_id=client_params.get('api_id') or client_params.get('api').api_id,
@@ -176,30 +224,42 @@ async def get_tg_clients() -> list[UniversalTelegramClient]:
 
         session_proxy = session_config.get('proxy')
         if not session_proxy and 'proxy' in session_config.keys():
-            tg_clients.append(UniversalTelegramClient(**client_params))
-            if accounts_config.get(session_name) != session_config:
-                await config_utils.update_session_config_in_file(session_name, session_config, CONFIG_PATH)
+            prepared_sessions.append(client_params)
+            config_session.set(session_name, session_config)
             continue
 
+        elif not assign_proxies:
+            if settings.USE_PROXY and not session_proxy:
+                logger.warning(f"{session_name} | Session has no assigned proxy | Skipping")
+                continue
+            prepared_sessions.append(client_params)
+
         else:
             if settings.DISABLE_PROXY_REPLACE:
-                proxy = session_proxy or next(iter(proxy_utils.get_unused_proxies(accounts_config, PROXIES_PATH)), None)
+                proxy = session_proxy or (inventory.next_unused() if settings.USE_PROXY else None)
             else:
-                proxy = await proxy_utils.get_working_proxy(accounts_config, session_proxy) \
+                proxy = await proxy_utils.get_working_proxy(None, session_proxy, verdicts) \
                     if session_proxy or settings.USE_PROXY else None
 
             if not proxy and (settings.USE_PROXY or session_proxy):
                 logger.warning(f"{session_name} | Didn't find a working unused proxy for session | Skipping")
                 continue
             else:
-                tg_clients.append(UniversalTelegramClient(**client_params))
+                prepared_sessions.append(client_params)
                 session_config['proxy'] = proxy
-                if accounts_config.get(session_name) != session_config:
-                    await config_utils.update_session_config_in_file(session_name, session_config, CONFIG_PATH)
+                config_session.set(session_name, session_config)
+                inventory.assign(session_name, proxy)
+
+    return prepared_sessions
+
 
-    return tg_clients
+async def get_tg_clients(config_session: config_utils.ConfigSession,
+                         verdicts: proxy_utils.ProxyVerdictCache | None = None,
+                         worker_index: int | None = None, workers: int = 1) -> list[UniversalTelegramClient]:
+    prepared_sessions = await prepare_sessions(config_session, verdicts, worker_index, workers)
+    return [UniversalTelegramClient(**client_params) for client_params in prepared_sessions]
 
-async def init_config_file() -> None:
+async def init_config_file(config_session: config_utils.ConfigSession) -> None:
     session_paths = get_sessions(SESSIONS_PATH)
 
     if not session_paths:
@@ -208,28 +268,95 @@ async def init_config_file() -> None:
         session_name = os.path.basename(session)
         parsed_json = config_utils.import_session_json(session)
         if parsed_json:
-            accounts_config = config_utils.read_config_file(CONFIG_PATH)
-            session_config: dict = deepcopy(accounts_config.get(session_name, {}))
+            session_config = config_session.get(session_name)
             session_config['user_agent'] = session_config.get('user_agent', generate_random_user_agent())
             session_config['api'] = parsed_json
-            if accounts_config.get(session_name) != session_config:
-                await config_utils.update_session_config_in_file(session_name, session_config, CONFIG_PATH)
+            config_session.set(session_name, session_config)
+
+async def run_supervisor(workers: int) -> None:
+    started = time()
+    verdicts = proxy_utils.ProxyVerdictCache()
+    async with config_utils.ConfigSession(CONFIG_PATH) as config_session:
+        config_session.restructure()
+        await init_config_file(config_session)
+        if settings.PREFLIGHT_ON_START:
+            await run_preflight(get_sessions(SESSIONS_PATH), config_session.config)
+        await first_run.compact_first_run()
+        prepared_sessions = await prepare_sessions(config_session, verdicts)
+
+    shards = {}
+    for client_params in prepared_sessions:
+        worker_index = get_worker_index(os.path.basename(client_params['session']), workers)
+        shards[worker_index] = shards.get(worker_index, 0) + 1
+
+    tasks = [asyncio.create_task(check_hashes_periodically())]
+    if settings.AUTO_UPDATE:
+        update_manager = UpdateManager(workers)
+        tasks.append(asyncio.create_task(update_manager.run()))
+
+    supervisor = WorkerSupervisor(shards, workers)
+    tasks.append(asyncio.create_task(supervisor.run()))
+    proxy_balancer.manage([os.path.basename(client_params['session']) for client_params in prepared_sessions],
+                          supervisor.requests_by_session)
+    proxy_balancer.start()
+    logger.info(f"Supervisor startup finished in {time() - started:.1f}s | {len(prepared_sessions)} sessions | "
+                f"{workers} workers | {verdicts.probes} proxy probes | {verdicts.saved_probes} probes saved")
+
+    try:
+        await wait_tasks(tasks)
+    finally:
+        await proxy_balancer.stop()
+
+
+async def run_tasks(worker_index: int | None = None, workers: int = 1) -> None:
+    started = time()
+    verdicts = proxy_utils.ProxyVerdictCache()
+    async with config_utils.ConfigSession(CONFIG_PATH) as config_session:
+        if worker_index is None:
+            config_session.restructure()
+            await init_config_file(config_session)
+            if settings.PREFLIGHT_ON_START:
+                await run_preflight(get_sessions(SESSIONS_PATH), config_session.config)
+            await first_run.compact_first_run()
+        tg_clients = await get_tg_clients(config_session, verdicts, worker_index, workers)
 
-async def run_tasks() -> None:
-    await config_utils.restructure_config(CONFIG_PATH)
-    await init_config_file()
-    
     tasks = []
     
-    tasks.append(asyncio.create_task(check_hashes_periodically()))
-    
-    if settings.AUTO_UPDATE:
-        update_manager = UpdateManager()
+    if worker_index is None:
+        tasks.append(asyncio.create_task(check_hashes_periodically()))
+
+    if settings.AUTO_UPDATE and worker_index is None:
+        update_manager = UpdateManager(workers)
         tasks.append(asyncio.create_task(update_manager.run()))
     
-    tg_clients = await get_tg_clients()
-    tasks.extend([asyncio.create_task(run_tapper(tg_client=tg_client)) for tg_client in tg_clients])
+    tapper_tasks = [asyncio.create_task(run_tapper(tg_client=tg_client)) for tg_client in tg_clients]
+    tasks.extend(tapper_tasks)
+    if worker_index is not None:
+        watch_supervisor(shutdown_event)
+        tasks.append(asyncio.create_task(shutdown_event.wait()))
+        tasks.append(asyncio.create_task(report_worker_stats(worker_index, tapper_tasks)))
+
+    proxy_health.seed(verdicts.verdicts)
+    proxy_health.start(shard_only=worker_index is not None)
+    proxy_balancer.start(worker_index)
+    await metrics.start(worker_index)
+
+    logger.info(f"Startup finished in {time() - started:.1f}s | {len(tg_clients)} sessions | "
+                f"{verdicts.probes} proxy probes | {verdicts.saved_probes} probes saved")
+
+    try:
+        await wait_tasks(tasks)
+    finally:
+        await proxy_balancer.stop()
+        await proxy_health.stop()
+        await metrics.stop()
+        try:
+            config_utils.export_config_file(CONFIG_PATH)
+        except Exception as e:
+            logger.warning(f"Failed to export `{CONFIG_PATH}`: {str(e)}")
+
 
+async def wait_tasks(tasks: list[asyncio.Task]) -> None:
     try:
         done, pending = await asyncio.wait(
             tasks,
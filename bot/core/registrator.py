@@ -44,7 +44,7 @@ async def register_sessions() -> None:
         if not proxies:
             raise Exception('No unused proxies left')
         for prox in proxies:
-            if await proxy_utils.check_proxy(prox):
+            if await proxy_utils.check_proxy(prox, tier=3):
                 proxy_str = prox
                 proxy = Proxy.from_str(proxy_str)
                 accounts_data['proxy'] = proxy_str
@@ -90,7 +90,8 @@ async def register_sessions() -> None:
         user_data = await session.get_me()
 
     if user_data:
-        await config_utils.write_config_file(accounts_config, CONFIG_PATH)
+        await config_utils.update_session_config_in_file(session_name, accounts_data, CONFIG_PATH)
+        config_utils.export_config_file(CONFIG_PATH)
         logger.success(
             f'Session added successfully @{user_data.username} | {user_data.first_name} {user_data.last_name}'
         )
@@ -1,52 +1,77 @@
 import aiohttp
+import async_timeout
 import asyncio
 from typing import Dict, Optional, Any, Tuple, List, Union
 from urllib.parse import urlencode, unquote
 from aiocfscrape import CloudflareScraper
-from aiohttp_proxy import ProxyConnector
 from better_proxy import Proxy
 from random import uniform, randint, choice
-from time import time as timestamp
+from time import time as timestamp, monotonic
 from datetime import datetime, timezone, time, timedelta
+from enum import Enum
 import json
 import os
 
 from bot.utils.universal_telegram_client import UniversalTelegramClient
-from bot.utils.proxy_utils import check_proxy, get_working_proxy
+from bot.utils.proxy_utils import get_working_proxy
+from bot.utils.proxy_health import proxy_health
+from bot.utils.proxy_balancer import proxy_balancer
 from bot.utils.first_run import check_is_first_run, append_recurring_session
 from bot.config import settings
 from bot.utils import logger, config_utils, CONFIG_PATH
-from bot.exceptions import InvalidSession
+from bot.exceptions import InvalidSession, ReauthRequired
 from bot.core.headers import get_toc_headers
 from bot.core.agents import generate_random_user_agent
+from bot.core.block_ticker import block_ticker
 from bot.utils.captcha_solver import solve_captcha
+from bot.utils.rate_governor import rate_governor
+from bot.utils.http_client import SessionHttpClient
+from bot.utils.response_cache import ResponseCache, normalize_endpoint
+from bot.utils.metrics import metrics
+from bot.utils.init_data_cache import InitDataCache
+from bot.utils.tg_meta import tg_meta, JOINED_CHAT, JOINED_CHANNEL, STARTED_POOL
+
+
+class MiningStep(Enum):
+    AUTH = 'auth'
+    SETUP = 'setup'
+    WAIT_BLOCK = 'wait_block'
+    START_MINING = 'start_mining'
+    POST_BLOCK = 'post_block'
 
 
 class BaseBot:
     
-    def __init__(self, tg_client: UniversalTelegramClient, stats_bot=None):
+    def __init__(self, tg_client: UniversalTelegramClient, stats_bot=None, session_config: Optional[dict] = None):
         self.tg_client = tg_client
         self.stats_bot = stats_bot
         if hasattr(self.tg_client, 'client'):
             self.tg_client.client.no_updates = True
             
         self.session_name = tg_client.session_name
+        self._http = SessionHttpClient(self.session_name)
+        self._init_data_cache = InitDataCache(self.session_name, self.get_tg_web_data)
+        self._response_cache = ResponseCache()
+        self._cache_report_time = timestamp()
         self._http_client: Optional[CloudflareScraper] = None
         self._current_proxy: Optional[str] = None
+        self._proxy_failover = False
+        self._assigned_proxy: Optional[str] = None
         self._access_token: Optional[str] = None
+        self._auth_header: Optional[str] = None
         self._is_first_run: Optional[bool] = None
         self._init_data: Optional[str] = None
         self._current_ref_id: Optional[str] = None
-        self._last_auth_time: Optional[float] = None
-        self._auth_interval: int = 3600  # 1 час в секундах
         self._mined_blocks_count: int = 0
         self._target_blocks: Optional[int] = None
         self._pools_url = "https://gist.githubusercontent.com/Mffff4/ac493d4c9e4fa0a87a70c57e6f251c31/raw"
         self._current_pool_id = None
         self._current_block_id: Optional[int] = None
         self._after_block_id: Optional[int] = None
+        self._mining_block_id: Optional[int] = None
 
-        session_config = config_utils.get_session_config(self.session_name, CONFIG_PATH)
+        if session_config is None:
+            session_config = config_utils.get_session_config(self.session_name, CONFIG_PATH)
         if not all(key in session_config for key in ('api', 'user_agent')):
             logger.critical(f"CHECK accounts_config.json as it might be corrupted")
             exit(-1)
@@ -56,6 +81,8 @@ class BaseBot:
             proxy = Proxy.from_str(self.proxy)
             self.tg_client.set_proxy(proxy)
             self._current_proxy = self.proxy
+            proxy_health.subscribe(self.proxy, self._on_proxy_health)
+        proxy_balancer.register(self.session_name, self._on_proxy_assigned)
 
         self._base_url = "https://miniapp.theopencoin.xyz/api/v1"
 
@@ -65,6 +92,16 @@ class BaseBot:
         return self._current_ref_id
 
     async def get_tg_web_data(self, app_name: str = "app", path: str = "app") -> str:
+        started = monotonic()
+        try:
+            tg_web_data = await self._request_tg_web_data()
+            metrics.series('tg_web_data', self.session_name, self._current_proxy).record('ok', monotonic() - started)
+            return tg_web_data
+        except Exception:
+            metrics.series('tg_web_data', self.session_name, self._current_proxy).record('error', monotonic() - started)
+            raise
+
+    async def _request_tg_web_data(self) -> str:
         try:
             ref_id = self.get_ref_id()
             webview_url = await self.tg_client.get_webview_url(
@@ -93,22 +130,58 @@ class BaseBot:
                 raise
             raise InvalidSession("Failed to get TG Web Data")
 
-    async def check_and_update_proxy(self, accounts_config: dict) -> bool:
+    def _on_proxy_health(self, proxy: str, healthy: bool) -> None:
+        if proxy == self._current_proxy and not healthy:
+            self._proxy_failover = True
+
+    def _on_proxy_assigned(self, proxy: str) -> None:
+        if proxy != self._current_proxy:
+            self._assigned_proxy = proxy
+
+    async def _switch_proxy(self, new_proxy: str, persist: bool = True) -> None:
+        if self._current_proxy:
+            proxy_health.unsubscribe(self._current_proxy, self._on_proxy_health)
+        proxy_health.subscribe(new_proxy, self._on_proxy_health)
+        self._current_proxy = new_proxy
+        self.tg_client.set_proxy(Proxy.from_str(new_proxy))
+        self._http_client = await self._http.get(new_proxy)
+        if persist:
+            await self._persist_proxy(new_proxy)
+        logger.info(f"Switched to new proxy: {new_proxy}")
+
+    async def _write_proxy(self, proxy: str) -> None:
+        session_config = config_utils.get_session_config(self.session_name, CONFIG_PATH)
+        if session_config and session_config.get('proxy') != proxy:
+            session_config['proxy'] = proxy
+            await config_utils.update_session_config_in_file(self.session_name, session_config, CONFIG_PATH)
+
+    async def _persist_proxy(self, proxy: str) -> None:
+        async with proxy_balancer.assignment_lock():
+            await self._write_proxy(proxy)
+
+    async def check_and_update_proxy(self) -> bool:
         if not settings.USE_PROXY:
             return True
 
-        if not self._current_proxy or not await check_proxy(self._current_proxy):
-            new_proxy = await get_working_proxy(accounts_config, self._current_proxy)
-            if not new_proxy:
-                return False
+        assigned, self._assigned_proxy = self._assigned_proxy, None
+        if proxy_balancer.remote:
+            assigned = config_utils.get_session_config(self.session_name, CONFIG_PATH).get('proxy')
+        if assigned and assigned != self._current_proxy:
+            if await proxy_health.check(assigned):
+                await self._switch_proxy(assigned)
+            elif self._current_proxy:
+                await self._persist_proxy(self._current_proxy)
 
-            self._current_proxy = new_proxy
-            if self._http_client and not self._http_client.closed:
-                await self._http_client.close()
-
-            proxy_conn = {'connector': ProxyConnector.from_url(new_proxy)}
-            self._http_client = CloudflareScraper(timeout=aiohttp.ClientTimeout(60), **proxy_conn)
-            logger.info(f"Switched to new proxy: {new_proxy}")
+        self._proxy_failover = False
+        if not self._current_proxy or not await proxy_health.check(self._current_proxy):
+            async with proxy_balancer.assignment_lock():
+                accounts_config = config_utils.read_config_file(CONFIG_PATH)
+                new_proxy = await get_working_proxy(accounts_config, self._current_proxy, proxy_health,
+                                                    rank=proxy_balancer.score)
+                if not new_proxy:
+                    return False
+                await self._write_proxy(new_proxy)
+            await self._switch_proxy(new_proxy, persist=False)
 
         return True
 
@@ -124,28 +197,61 @@ class BaseBot:
             return False
 
     async def make_request(self, method: str, url: str, **kwargs) -> Optional[Dict]:
+        if not settings.RESPONSE_CACHE:
+            return await self._send_request(method, url, **kwargs)
+
+        if method.upper() == 'GET':
+            ttl = self._response_cache.ttl_for(url)
+            if ttl:
+                return await self._response_cache.fetch(url, ttl, lambda: self._send_request(method, url, **kwargs))
+            return await self._send_request(method, url, **kwargs)
+
+        result = await self._send_request(method, url, **kwargs)
+        self._response_cache.invalidate(url)
+        return result
+
+    def _report_cache_stats(self) -> None:
+        if not settings.RESPONSE_CACHE or timestamp() - self._cache_report_time < 3600:
+            return
+        self._cache_report_time = timestamp()
+        stats = self._response_cache.stats()
+        logger.info(
+            f"{self.session_name} | Response cache: {stats['hits']} hits | {stats['merged']} merged | "
+            f"{stats['misses']} misses | {stats['saved_per_hour']} requests saved per hour"
+        )
+
+    async def _send_request(self, method: str, url: str, **kwargs) -> Optional[Dict]:
         if not self._http_client:
             raise InvalidSession("HTTP client not initialized")
 
         max_retries = 3
         retry_delay = 1
         last_error = None
+        series = metrics.series(normalize_endpoint(url), self.session_name, self._current_proxy)
+        sent = len(json.dumps(kwargs['json'])) if 'json' in kwargs else 0
         
         for attempt in range(max_retries):
+            if attempt:
+                series.retries += 1
+            started = monotonic()
             try:
+                if self._http.broken:
+                    self._http_client = await self._http.get(self._current_proxy)
+                await rate_governor.acquire(self.session_name, self._current_proxy)
+                started = monotonic()
                 async with getattr(self._http_client, method.lower())(url, **kwargs) as response:
+                    self._http.touch()
+                    body = await response.read()
+                    series.record(str(response.status), monotonic() - started, sent, len(body))
+                    if response.status != 409:
+                        rate_governor.feedback(self.session_name, self._current_proxy, response.status)
                     if response.status == 200:
                         return await response.json()
                     elif response.status == 401:
+                        self._response_cache.clear()
+                        self._init_data_cache.invalidate()
                         self._auth_header = None
-                        self._last_auth_time = None
-                        self._after_block_id = None
-                        self._current_block_id = None
-                        self._current_pool_id = None
-                        self._mined_blocks_count = 0
-                        self._target_blocks = None
-                        await asyncio.sleep(5)
-                        return await self.process_bot_logic()
+                        raise ReauthRequired(f"{method.upper()} {url}")
                     elif response.status == 403:
                         response_json = await response.json()
                         if isinstance(response_json, dict):
@@ -157,13 +263,11 @@ class BaseBot:
                                         f"⛔️ {self.session_name} | User is blocked from mining for {block_minutes} minutes"
                                         f"\n💤 Going to sleep..."
                                     )
-                                    await asyncio.sleep(block_minutes * 60 + randint(10, 30))
-                                    self._auth_header = None
-                                    self._last_auth_time = None
+                                    await self._idle(block_minutes * 60 + randint(10, 30))
                                     return None
                                 except (ValueError, TypeError) as e:
                                     logger.error(f"❌ {self.session_name} | Error parsing block time: {str(e)}")
-                                    await asyncio.sleep(60*30)
+                                    await self._idle(60*30)
                                     return None
                             else:
                                 logger.error(f"❌ {self.session_name} | Access denied: {response_json}")
@@ -179,30 +283,37 @@ class BaseBot:
                             if response_json.get('code') == 'capture_required':
                                 return response_json
                             elif 'exceeded' in response_json.get('error', '').lower():
+                                rate_governor.feedback(self.session_name, self._current_proxy, 409, exceeded=True)
                                 logger.warning(f"⚠️ {self.session_name} | {response_json.get('error')}")
                                 try:
                                     wait_minutes = int(''.join(filter(str.isdigit, response_json.get('error', ''))))
                                 except ValueError:
                                     wait_minutes = 30
-                                await asyncio.sleep(wait_minutes * 60 + randint(10, 30))
-                                self._auth_header = None
-                                self._last_auth_time = None
+                                await self._idle(wait_minutes * 60 + randint(10, 30))
                                 return None
                         logger.error(f"Request conflict (409): {await response.text()}")
                         return None
                     elif response.status == 500:
                         if attempt < max_retries - 1:
+                            series.backoff_seconds += retry_delay * (attempt + 1)
                             await asyncio.sleep(retry_delay * (attempt + 1))
                             continue
                         return None
                     else:
                         logger.error(f"Request failed with status {response.status}")
                         return None
+            except ReauthRequired:
+                raise
             except Exception as e:
                 last_error = e
+                if isinstance(e, (aiohttp.ClientError, asyncio.TimeoutError)):
+                    series.record('error', monotonic() - started, sent)
                 if attempt < max_retries - 1:
+                    series.backoff_seconds += retry_delay * (attempt + 1)
                     await asyncio.sleep(retry_delay * (attempt + 1))
                     continue
+                if isinstance(e, (aiohttp.ClientConnectionError, asyncio.TimeoutError)):
+                    self._http.mark_broken()
                 
         if last_error:
             logger.error(f"Request error after {max_retries} retries: {str(last_error)}")
@@ -215,20 +326,11 @@ class BaseBot:
         delay = uniform(1, settings.SESSION_START_DELAY)
         logger.info(f"{self.session_name} | Starting in {int(delay)} seconds")
         await asyncio.sleep(delay)
-        
-        last_auth_time = 0
-        auth_interval = 3600 
+
+        self._init_data_cache.start()
             
         while True:
             try:
-                current_timestamp = timestamp()
-                
-                if current_timestamp - last_auth_time >= auth_interval:
-                    self._auth_header = None
-                    self._last_auth_time = None
-                    last_auth_time = current_timestamp
-                    logger.info(f"{self.session_name} | Refreshing auth token")
-                
                 if settings.NIGHT_MODE:
                     current_utc_time = datetime.now(timezone.utc).time()
                     logger.info(f"{self.session_name} | Checking night mode: Current UTC time is {current_utc_time.replace(microsecond=0)}")
@@ -254,30 +356,45 @@ class BaseBot:
                             f"\n💤 Current UTC time: {current_utc_time.replace(microsecond=0)}"
                             f"\n⏰ Next check in {round(next_checking_time / 3600, 1)} hours"
                         )
-                        await asyncio.sleep(next_checking_time)
+                        await self._idle(next_checking_time)
                         continue
                     
                     logger.info(f"{self.session_name} | Night-Mode is off until {start_time} UTC")
 
-                proxy_conn = {'connector': ProxyConnector.from_url(self._current_proxy)} if self._current_proxy else {}
-                async with CloudflareScraper(timeout=aiohttp.ClientTimeout(60), **proxy_conn) as http_client:
-                    self._http_client = http_client
+                self._http_client = await self._http.get(self._current_proxy)
 
-                    session_config = config_utils.get_session_config(self.session_name, CONFIG_PATH)
-                    if not await self.check_and_update_proxy(session_config):
-                        logger.warning('Failed to find working proxy. Sleep 5 minutes.')
-                        await asyncio.sleep(300)
-                        continue
+                if not await self.check_and_update_proxy():
+                    logger.warning('Failed to find working proxy. Sleep 5 minutes.')
+                    await asyncio.sleep(300)
+                    continue
 
-                    await self.process_bot_logic()
+                await self.process_bot_logic()
                     
             except InvalidSession as e:
                 raise
             except Exception as error:
+                if isinstance(error, (aiohttp.ClientConnectionError, asyncio.TimeoutError)):
+                    self._http.mark_broken()
                 sleep_duration = uniform(60, 120)
                 logger.error(f"Unknown error: {error}. Sleeping for {int(sleep_duration)}")
                 await asyncio.sleep(sleep_duration)
 
+    async def _idle(self, seconds: float) -> None:
+        self._init_data_cache.pause()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            self._init_data_cache.resume()
+
+    async def close(self) -> None:
+        proxy_balancer.unregister(self.session_name)
+        if self._current_proxy:
+            proxy_health.unsubscribe(self._current_proxy, self._on_proxy_health)
+        await self._init_data_cache.stop()
+        await self._http.close()
+        self._http_client = None
+        await self.tg_client.close()
+
     async def vote_for_proposal(self, headers: Dict[str, str]) -> None:
         try:
             proposals = await self.make_request(
@@ -332,6 +449,8 @@ class BaseBot:
                         f"Voted {'FOR' if vote_for else 'AGAINST'} "
                         f"proposal #{proposal_id}: {proposal.get('title')}"
                     )
+        except ReauthRequired:
+            raise
         except Exception as e:
             logger.error(f"❌ {self.session_name} | Voting error: {str(e)}")
 
@@ -354,6 +473,8 @@ class BaseBot:
             
             if check_vote and check_vote.get('hasVoted'):
                 logger.info(f"🗳️ {self.session_name} | Vote status confirmed")
+        except ReauthRequired:
+            raise
         except Exception as e:
             logger.error(f"❌ {self.session_name} | Vote status check error: {str(e)}")
 
@@ -384,12 +505,19 @@ class BaseBot:
                     headers=headers
                 )
                 
-                return verify_status and verify_status.get("hasJoinedChat", False)
+                if verify_status and verify_status.get("hasJoinedChat", False):
+                    return True
+                tg_meta.unmark(self.session_name, JOINED_CHAT, f"@{chat_username}")
+                return False
                 
+            except ReauthRequired:
+                raise
             except Exception as e:
                 logger.error(f"{self.session_name} | Error joining chat: {str(e)}")
                 return False
                 
+        except ReauthRequired:
+            raise
         except Exception as e:
             logger.error(f"{self.session_name} | Error checking chat status: {str(e)}")
             return False
@@ -445,239 +573,329 @@ class BaseBot:
                         self._current_pool_id = user_pool.get('id')
                         logger.info(f"✅ {self.session_name} | Successfully joined pool {user_pool.get('title')}")
                         return True
+                    tg_meta.unmark(self.session_name, STARTED_POOL, pool_id)
 
+                except ReauthRequired:
+                    raise
                 except Exception as e:
                     continue
 
             logger.warning(f"⚠️ {self.session_name} | Failed to join any pool, will retry in next cycle")
             return False
 
+        except ReauthRequired:
+            raise
         except Exception as e:
             logger.error(f"❌ {self.session_name} | Pool joining error: {str(e)}")
             return False
 
-    async def process_bot_logic(self) -> None:
+    async def _authorize(self) -> bool:
         try:
-            current_timestamp = timestamp()
-            
-            if not self._auth_header or not self._last_auth_time or (current_timestamp - self._last_auth_time) >= self._auth_interval:
-                try:
-                    tg_web_data = await self.get_tg_web_data()
-                    self._auth_header = tg_web_data
-                    self._last_auth_time = current_timestamp
-                    logger.info(f"{self.session_name} | Auth token refreshed")
-                except Exception as e:
-                    logger.error(f"❌ {self.session_name} | Error refreshing auth token: {str(e)}")
-                    await asyncio.sleep(5)
-                    return
-            
-            headers = get_toc_headers(self._auth_header)
-            
-            if settings.SUBSCRIBE_TELEGRAM:
-                await self.check_and_join_telegram_chat(headers)
+            self._auth_header = await self._init_data_cache.get()
+            return True
+        except Exception as e:
+            logger.error(f"❌ {self.session_name} | Error refreshing auth token: {str(e)}")
+            await asyncio.sleep(5)
+            return False
 
-            await self.vote_for_proposal(headers)
-            await self.check_vote_status(headers)
+    async def _run_side_tasks(self, headers: Dict[str, str]) -> None:
+        if settings.SUBSCRIBE_TELEGRAM:
+            await self.check_and_join_telegram_chat(headers)
 
-            await self._try_join_pool(headers)
+        await self.vote_for_proposal(headers)
+        await self.check_vote_status(headers)
 
-            while True:
-                if not self._target_blocks and settings.BLOCKS_BEFORE_SLEEP != (0, 0):
-                    self._target_blocks = randint(
-                        settings.BLOCKS_BEFORE_SLEEP[0],
-                        settings.BLOCKS_BEFORE_SLEEP[1]
-                    )
-                    logger.info(
-                        f"🎲 {self.session_name} | "
-                        f"Target set: {self._target_blocks} blocks before sleep"
+        await self._try_join_pool(headers)
+
+    async def _sleep_if_target_reached(self) -> bool:
+        if not self._target_blocks and settings.BLOCKS_BEFORE_SLEEP != (0, 0):
+            self._target_blocks = randint(
+                settings.BLOCKS_BEFORE_SLEEP[0],
+                settings.BLOCKS_BEFORE_SLEEP[1]
+            )
+            logger.info(
+                f"🎲 {self.session_name} | "
+                f"Target set: {self._target_blocks} blocks before sleep"
+            )
+
+        if (settings.BLOCKS_BEFORE_SLEEP != (0, 0) and 
+            self._target_blocks and 
+            self._mined_blocks_count >= self._target_blocks):
+            sleep_hours = uniform(settings.SLEEP_HOURS[0], settings.SLEEP_HOURS[1])
+            sleep_seconds = int(sleep_hours * 3600)
+            logger.info(
+                f"😴 {self.session_name} | "
+                f"Mined {self._mined_blocks_count} blocks. "
+                f"Going to sleep for {sleep_hours:.1f} hours"
+            )
+            block_ticker.unregister(self)
+            await self._idle(sleep_seconds)
+            self._mined_blocks_count = 0
+            self._target_blocks = None
+            logger.info(f"🌅 {self.session_name} | Woke up! Restarting mining cycle")
+            return True
+        return False
+
+    async def _start_mining(self, headers: Dict[str, str], latest_block: Dict) -> bool:
+        if latest_block.get("isUserMining", False):
+            return True
+
+        result = await self.make_request(
+            "POST",
+            f"{self._base_url}/blocks/start-mining",
+            headers=headers,
+            json={"blockId": self._current_block_id}
+        )
+        
+        if isinstance(result, dict):
+            if result.get('code') == 'capture_required':
+                capture_data = result.get('capture')
+                if capture_data:
+                    if await self.verify_capture(headers, capture_data):
+                        result = await self.make_request(
+                            "POST",
+                            f"{self._base_url}/blocks/start-mining",
+                            headers=headers,
+                            json={"blockId": self._current_block_id}
+                        )
+                    else:
+                        logger.error(f"❌ {self.session_name} | Failed to pass the captcha")
+                        await self._idle(60*30)
+                        return False
+            elif result.get('code') == 'user_blocked':
+                try:
+                    block_message = result.get('message', '')
+                    block_minutes = int(''.join(filter(str.isdigit, block_message)))
+                    logger.warning(
+                        f"⛔️ {self.session_name} | User is blocked from mining for {block_minutes} minutes"
+                        f"\n💤 Going to sleep..."
                     )
+                    await self._idle(block_minutes * 60 + randint(10, 30))
+                    return False
+                except (ValueError, TypeError) as e:
+                    logger.error(f"❌ {self.session_name} | Error parsing block time: {str(e)}")
+                    await self._idle(60*30)
+                    return False
+        
+        if result is not None:
+            self._mining_block_id = self._current_block_id
+            miners_count = latest_block.get('minersCount', 0)
+            logger.info(
+                f"🚀 {self.session_name} | "
+                f"Started mining block {self._current_block_id} "
+                f"with {miners_count} miners"
+            )
+        return True
 
-                if (settings.BLOCKS_BEFORE_SLEEP != (0, 0) and 
-                    self._target_blocks and 
-                    self._mined_blocks_count >= self._target_blocks):
-                    sleep_hours = uniform(settings.SLEEP_HOURS[0], settings.SLEEP_HOURS[1])
-                    sleep_seconds = int(sleep_hours * 3600)
+    async def _collect_results(self, headers: Dict[str, str]) -> None:
+        results = await self.make_request(
+            "GET",
+            f"{self._base_url}/blocks/user-results?afterBlockId={self._after_block_id}&currentBlockId={self._current_block_id}",
+            headers=headers
+        ) or []
+        
+        for result in results:
+            if isinstance(result, dict):
+                rewards = result.get('rewards', 0)
+                block_id = result.get('block_id')
+                if block_id:
                     logger.info(
-                        f"😴 {self.session_name} | "
-                        f"Mined {self._mined_blocks_count} blocks. "
-                        f"Going to sleep for {sleep_hours:.1f} hours"
+                        f"💎 {self.session_name} | "
+                        f"Got {rewards:.6f} OPEN "
+                        f"from block {block_id}"
                     )
-                    await asyncio.sleep(sleep_seconds)
-                    self._mined_blocks_count = 0
-                    self._target_blocks = None
-                    self._auth_header = None
-                    self._last_auth_time = None
-                    logger.info(f"🌅 {self.session_name} | Woke up! Restarting mining cycle")
-                    break
-
-                now = datetime.now()
-                wait_seconds = 60 - now.second
-                if wait_seconds <= 0:
-                    wait_seconds = 60
-                await asyncio.sleep(wait_seconds)
-                
-                await asyncio.sleep(uniform(3, 38))
-            
-                user_pool = await self.make_request(
-                    "GET",
-                    f"{self._base_url}/pools/user-pool",
-                    headers=headers
-                )
-                
-                if user_pool and user_pool.get('id') is not None:
-                    pool_info = (
-                        f"Pool: {user_pool.get('title')} | "
-                        f"Fee: {user_pool.get('fee_percentage')}% | "
-                        f"Miners: {user_pool.get('number_of_miners')} | "
-                        f"Mined: {user_pool.get('tokens_mined', 0)}"
-                    )
-                    logger.info(f"⛏️ {self.session_name} | {pool_info}")
-                else:
-                    logger.info(f"⛏️ {self.session_name} | Not in pool")
-
-                stats = await self.make_request(
-                    "GET", 
-                    f"{self._base_url}/users/stats",
-                    headers=headers
-                )
-                if stats:
-                    tokens_mined = stats.get('tokensMined', 0) or 0
-                    ref_count = stats.get('numberOfReferrals', 0) or 0
-                    luck_factor = stats.get('luckFactor', 1) or 1
-                    has_joined_x = stats.get('hasJoinedX', False)
-                    has_joined_community = stats.get('hasJoinedCommunity', False)
-                    
-                    if self.stats_bot:
-                        self.stats_bot.update_session_stats(self.session_name, stats)
-                    
-                    if not has_joined_x:
-                        check_x = await self.make_request(
-                            "GET",
-                            f"{self._base_url}/users/check-x",
-                            headers=headers
-                        )
-                        if check_x and check_x.get('hasJoinedX'):
-                            logger.info(f"🎯 {self.session_name} | Twitter subscription confirmed")
+                    if rewards >= 10:
+                        logger.info(f"🎯 {self.session_name} | 🎉 BIG WIN! {rewards:.6f} TOC")
                     
-                    if settings.SUBSCRIBE_TELEGRAM and not has_joined_community:
-                        await self.tg_client.join_telegram_channel({
-                            "additional_data": {
-                                "username": settings.COMMUNITY_CHANNEL
-                            }
-                        })
-                        await asyncio.sleep(2)
-                        
-                        check_community = await self.make_request(
-                            "GET",
-                            f"{self._base_url}/users/check-community",
-                            headers=headers
-                        )
-                        if check_community and check_community.get('hasJoinedCommunity'):
-                            logger.info(f"📢 {self.session_name} | Community subscription confirmed")
-                    
-                    logger.info(
-                        f"⛏️ {self.session_name} | "
-                        f"Mined: {tokens_mined:.6f} OPEN | "
-                        f"Luck: {luck_factor} | "
-                        f"Refs: {ref_count} 👥"
+                    self._after_block_id = max(self._after_block_id, int(block_id))
+
+    async def process_bot_logic(self) -> None:
+        step = MiningStep.AUTH
+        resume_step = MiningStep.SETUP
+        latest_block: Optional[Dict] = None
+        reauth_attempts = 0
+
+        try:
+            while True:
+                try:
+                    if step is MiningStep.AUTH:
+                        if not await self._authorize():
+                            return
+                        step = resume_step
+                        continue
+
+                    if not self._init_data_cache.valid():
+                        resume_step, step = step, MiningStep.AUTH
+                        continue
+
+                    self._auth_header = self._init_data_cache.value
+                    headers = get_toc_headers(self._auth_header)
+
+                    if step is MiningStep.SETUP:
+                        await self._run_side_tasks(headers)
+                        step = MiningStep.WAIT_BLOCK
+
+                    elif step is MiningStep.WAIT_BLOCK:
+                        if await self._sleep_if_target_reached():
+                            return
+
+                        if self._proxy_failover or self._assigned_proxy:
+                            if self._proxy_failover:
+                                logger.warning(f"{self.session_name} | Proxy became unhealthy, failing over")
+                            if not await self.check_and_update_proxy():
+                                return
+
+                        latest_block = await self._wait_for_block(headers)
+                        if not latest_block or not latest_block.get("id"):
+                            continue
+
+                        self._current_block_id = latest_block.get("id")
+                        if not self._after_block_id:
+                            self._after_block_id = self._current_block_id - 1
+                        step = MiningStep.START_MINING
+
+                    elif step is MiningStep.START_MINING:
+                        if not await self._start_mining(headers, latest_block):
+                            return
+                        step = MiningStep.POST_BLOCK
+
+                    elif step is MiningStep.POST_BLOCK:
+                        await self._log_pool_and_stats(headers)
+                        self._report_cache_stats()
+                        await self._collect_results(headers)
+                        await self._run_side_tasks(headers)
+                        step = MiningStep.WAIT_BLOCK
+
+                    reauth_attempts = 0
+
+                except ReauthRequired:
+                    reauth_attempts += 1
+                    delay = min(5 * 2 ** (reauth_attempts - 1), 300)
+                    logger.warning(
+                        f"{self.session_name} | Auth expired during {step.value}, "
+                        f"re-authorizing in {delay}s (attempt {reauth_attempts})"
                     )
+                    await asyncio.sleep(delay)
+                    resume_step = step
+                    step = MiningStep.AUTH
 
-                latest_block = await self.make_request(
+        except Exception as e:
+            logger.error(f"❌ {self.session_name} | Mining error: {str(e)}")
+
+    async def fetch_latest_block(self) -> Optional[Dict]:
+        if not self._auth_header or not self._http_client or self._http_client.closed:
+            return None
+        try:
+            async with async_timeout.timeout(30):
+                return await self.make_request(
                     "GET",
                     f"{self._base_url}/blocks/latest",
-                    headers=headers
+                    headers=get_toc_headers(self._auth_header),
+                    timeout=aiohttp.ClientTimeout(15)
                 )
-                if not latest_block:
-                    continue
+        except ReauthRequired:
+            logger.info(f"{self.session_name} | Token expired while polling the latest block")
+        except Exception as e:
+            logger.warning(f"{self.session_name} | Failed to fetch latest block: {e.__class__.__name__}: {str(e)}")
+        return None
 
-                self._current_block_id = latest_block.get("id")
-                if not self._current_block_id:
-                    continue
+    async def _sleep_until_prewarm(self) -> float:
+        now = datetime.now()
+        boundary = timestamp() + 60 - now.second - now.microsecond / 1e6
+        if boundary - timestamp() > settings.HTTP_PREWARM_LEAD:
+            await asyncio.sleep(boundary - timestamp() - settings.HTTP_PREWARM_LEAD)
+        await self._http.prewarm(self._base_url.split('/api/')[0])
+        return max(0.0, boundary - timestamp())
 
-                if not self._after_block_id:
-                    self._after_block_id = self._current_block_id - 1
+    async def _wait_for_block(self, headers: Dict[str, str]) -> Optional[Dict]:
+        if settings.SHARED_BLOCK_TICKER:
+            block_ticker.register(self)
+            ticker_block_id = block_ticker.block_id
+            if ticker_block_id is None or (self._current_block_id and ticker_block_id <= self._current_block_id):
+                await self._sleep_until_prewarm()
+            block = await block_ticker.wait_for_block(self._current_block_id, timeout=120)
+            if block:
+                await asyncio.sleep(uniform(*settings.BLOCK_JOIN_DELAY))
+                block['isUserMining'] = block.get('id') == self._mining_block_id
+                return block
+            logger.warning(f"{self.session_name} | Block ticker is silent, polling latest block directly")
+        else:
+            await asyncio.sleep(await self._sleep_until_prewarm())
 
-                if not latest_block.get("isUserMining", False):
-                    result = await self.make_request(
-                        "POST",
-                        f"{self._base_url}/blocks/start-mining",
-                        headers=headers,
-                        json={"blockId": self._current_block_id}
-                    )
-                    
-                    if isinstance(result, dict):
-                        if result.get('code') == 'capture_required':
-                            capture_data = result.get('capture')
-                            if capture_data:
-                                if await self.verify_capture(headers, capture_data):
-                                    result = await self.make_request(
-                                        "POST",
-                                        f"{self._base_url}/blocks/start-mining",
-                                        headers=headers,
-                                        json={"blockId": self._current_block_id}
-                                    )
-                                else:
-                                    logger.error(f"❌ {self.session_name} | Failed to pass the captcha")
-                                    await asyncio.sleep(60*30)
-                                    self._auth_header = None
-                                    self._last_auth_time = None
-                                    break
-                        elif result.get('code') == 'user_blocked':
-                            try:
-                                block_message = result.get('message', '')
-                                block_minutes = int(''.join(filter(str.isdigit, block_message)))
-                                logger.warning(
-                                    f"⛔️ {self.session_name} | User is blocked from mining for {block_minutes} minutes"
-                                    f"\n💤 Going to sleep..."
-                                )
-                                await asyncio.sleep(block_minutes * 60 + randint(10, 30))
-                                self._auth_header = None
-                                self._last_auth_time = None
-                                break
-                            except (ValueError, TypeError) as e:
-                                logger.error(f"❌ {self.session_name} | Error parsing block time: {str(e)}")
-                                await asyncio.sleep(60*30)
-                                break
-                    
-                    if result is not None:
-                        miners_count = latest_block.get('minersCount', 0)
-                        logger.info(
-                            f"🚀 {self.session_name} | "
-                            f"Started mining block {self._current_block_id} "
-                            f"with {miners_count} miners"
-                        )
+            await asyncio.sleep(uniform(3, 38))
+
+        return await self.make_request(
+            "GET",
+            f"{self._base_url}/blocks/latest",
+            headers=headers
+        )
+
+    async def _log_pool_and_stats(self, headers: Dict[str, str]) -> None:
+        user_pool = await self.make_request(
+            "GET",
+            f"{self._base_url}/pools/user-pool",
+            headers=headers
+        )
+        
+        if user_pool and user_pool.get('id') is not None:
+            pool_info = (
+                f"Pool: {user_pool.get('title')} | "
+                f"Fee: {user_pool.get('fee_percentage')}% | "
+                f"Miners: {user_pool.get('number_of_miners')} | "
+                f"Mined: {user_pool.get('tokens_mined', 0)}"
+            )
+            logger.info(f"⛏️ {self.session_name} | {pool_info}")
+        else:
+            logger.info(f"⛏️ {self.session_name} | Not in pool")
 
-                results = await self.make_request(
+        stats = await self.make_request(
+            "GET", 
+            f"{self._base_url}/users/stats",
+            headers=headers
+        )
+        if stats:
+            tokens_mined = stats.get('tokensMined', 0) or 0
+            ref_count = stats.get('numberOfReferrals', 0) or 0
+            luck_factor = stats.get('luckFactor', 1) or 1
+            has_joined_x = stats.get('hasJoinedX', False)
+            has_joined_community = stats.get('hasJoinedCommunity', False)
+            
+            if self.stats_bot:
+                self.stats_bot.update_session_stats(self.session_name, stats)
+            
+            if not has_joined_x:
+                check_x = await self.make_request(
                     "GET",
-                    f"{self._base_url}/blocks/user-results?afterBlockId={self._after_block_id}&currentBlockId={self._current_block_id}",
+                    f"{self._base_url}/users/check-x",
                     headers=headers
-                ) or []
+                )
+                if check_x and check_x.get('hasJoinedX'):
+                    logger.info(f"🎯 {self.session_name} | Twitter subscription confirmed")
+            
+            if settings.SUBSCRIBE_TELEGRAM and not has_joined_community:
+                await self.tg_client.join_telegram_channel({
+                    "additional_data": {
+                        "username": settings.COMMUNITY_CHANNEL
+                    }
+                })
+                await asyncio.sleep(2)
                 
-                for result in results:
-                    if isinstance(result, dict):
-                        rewards = result.get('rewards', 0)
-                        block_id = result.get('block_id')
-                        if block_id:
-                            logger.info(
-                                f"💎 {self.session_name} | "
-                                f"Got {rewards:.6f} OPEN "
-                                f"from block {block_id}"
-                            )
-                            if rewards >= 10:
-                                logger.info(f"🎯 {self.session_name} | 🎉 BIG WIN! {rewards:.6f} TOC")
-                            
-                            self._after_block_id = max(self._after_block_id, int(block_id))
-
-                if settings.SUBSCRIBE_TELEGRAM:
-                    await self.check_and_join_telegram_chat(headers)
-
-                await self.vote_for_proposal(headers)
-                await self.check_vote_status(headers)
-
-                await self._try_join_pool(headers)
-
-        except Exception as e:
-            logger.error(f"❌ {self.session_name} | Mining error: {str(e)}")
+                check_community = await self.make_request(
+                    "GET",
+                    f"{self._base_url}/users/check-community",
+                    headers=headers
+                )
+                if check_community and check_community.get('hasJoinedCommunity'):
+                    logger.info(f"📢 {self.session_name} | Community subscription confirmed")
+                else:
+                    tg_meta.unmark(self.session_name, JOINED_CHANNEL, settings.COMMUNITY_CHANNEL.replace("@", ""))
+            
+            logger.info(
+                f"⛏️ {self.session_name} | "
+                f"Mined: {tokens_mined:.6f} OPEN | "
+                f"Luck: {luck_factor} | "
+                f"Refs: {ref_count} 👥"
+            )
 
     async def verify_capture(self, headers: Dict[str, str], capture_data: Union[Dict[str, Any], str]) -> bool:
         try:
@@ -869,6 +1087,8 @@ class BaseBot:
                 logger.error("Please report this at t.me/mffff4")
                 return False
                 
+        except ReauthRequired:
+            raise
         except Exception as e:
             logger.error(f"❌ {self.session_name} | Captcha verification error: {str(e)}")
             return False
@@ -880,3 +1100,6 @@ async def run_tapper(tg_client: UniversalTelegramClient):
         await bot.run()
     except InvalidSession as e:
         logger.error(f"Invalid Session: {e}")
+    finally:
+        block_ticker.unregister(bot)
+        await bot.close()
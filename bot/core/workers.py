@@ -0,0 +1,139 @@
+import asyncio
+import json
+import os
+import sys
+import threading
+import zlib
+from time import time
+
+from bot.utils import logger
+from bot.utils.metrics import metrics
+
+STATS_MARKER = "@@worker-stats "
+STATS_INTERVAL = 60
+RESTART_DELAY = (10, 300)
+
+
+def get_worker_index(session_name: str, workers: int) -> int:
+    return zlib.crc32(session_name.encode()) % workers
+
+
+def watch_supervisor(shutdown_event: asyncio.Event) -> None:
+    loop = asyncio.get_running_loop()
+
+    def wait_for_eof() -> None:
+        while sys.stdin.buffer.read(4096):
+            continue
+        loop.call_soon_threadsafe(shutdown_event.set)
+
+    threading.Thread(target=wait_for_eof, name="supervisor-watch", daemon=True).start()
+
+
+async def report_worker_stats(worker_index: int, tapper_tasks: list[asyncio.Task]) -> None:
+    started = time()
+    while True:
+        stats = {
+            "worker": worker_index,
+            "sessions": len(tapper_tasks),
+            "active": sum(not task.done() for task in tapper_tasks),
+            "uptime": int(time() - started),
+            "requests": metrics.requests_by_session()
+        }
+        print(f"{STATS_MARKER}{json.dumps(stats)}", flush=True)
+        await asyncio.sleep(STATS_INTERVAL)
+
+
+class WorkerProcess:
+    def __init__(self, index: int, workers: int, sessions: int):
+        self.index = index
+        self.workers = workers
+        self.sessions = sessions
+        self.restarts = 0
+        self.stats: dict = {}
+        self._process: asyncio.subprocess.Process | None = None
+
+    @property
+    def alive(self) -> bool:
+        return self._process is not None and self._process.returncode is None
+
+    async def start(self) -> None:
+        self._process = await asyncio.create_subprocess_exec(
+            sys.executable, sys.argv[0], "-a", "1",
+            "--workers", str(self.workers), "--worker-index", str(self.index),
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.STDOUT,
+            limit=2 ** 20,
+            env={**os.environ, "PYTHONUNBUFFERED": "1"}
+        )
+        logger.info(f"Worker #{self.index} started | PID: {self._process.pid} | Sessions: {self.sessions}")
+
+    async def pump_output(self) -> int:
+        prefix = f"[w{self.index}] ".encode()
+        while line := await self._process.stdout.readline():
+            if line.startswith(STATS_MARKER.encode()):
+                try:
+                    self.stats = json.loads(line[len(STATS_MARKER):])
+                except json.JSONDecodeError:
+                    pass
+                continue
+            sys.stdout.buffer.write(prefix + line)
+            sys.stdout.buffer.flush()
+        return await self._process.wait()
+
+    async def stop(self) -> None:
+        if not self.alive:
+            return
+        self._process.stdin.close()
+        try:
+            await asyncio.wait_for(self._process.wait(), timeout=10)
+        except asyncio.TimeoutError:
+            self._process.kill()
+            await self._process.wait()
+
+
+class WorkerSupervisor:
+    def __init__(self, shards: dict[int, int], workers: int):
+        self._workers = [WorkerProcess(index, workers, shards.get(index, 0)) for index in range(workers)]
+
+    def requests_by_session(self) -> dict[str, int]:
+        counts = {}
+        for worker in self._workers:
+            counts.update(worker.stats.get('requests', {}))
+        return counts
+
+    async def _keep_alive(self, worker: WorkerProcess) -> None:
+        delay = RESTART_DELAY[0]
+        while True:
+            started = time()
+            await worker.start()
+            return_code = await worker.pump_output()
+            if return_code == 0:
+                logger.info(f"Worker #{worker.index} finished")
+                return
+
+            if time() - started > RESTART_DELAY[1]:
+                delay = RESTART_DELAY[0]
+            worker.restarts += 1
+            logger.warning(f"Worker #{worker.index} exited with code {return_code} | "
+                           f"Restarting in {delay} seconds")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, RESTART_DELAY[1])
+
+    async def _log_stats(self) -> None:
+        while True:
+            await asyncio.sleep(STATS_INTERVAL)
+            alive = sum(worker.alive for worker in self._workers)
+            sessions = sum(worker.stats.get('sessions', 0) for worker in self._workers)
+            active = sum(worker.stats.get('active', 0) for worker in self._workers)
+            restarts = sum(worker.restarts for worker in self._workers)
+            logger.info(f"Workers: {alive}/{len(self._workers)} alive | Sessions: {sessions} | "
+                        f"Active: {active} | Restarts: {restarts}")
+
+    async def run(self) -> None:
+        stats_task = asyncio.create_task(self._log_stats())
+        try:
+            await asyncio.gather(*(self._keep_alive(worker) for worker in self._workers if worker.sessions))
+        finally:
+            stats_task.cancel()
+            await asyncio.gather(*(worker.stop() for worker in self._workers), return_exceptions=True)
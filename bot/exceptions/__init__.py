@@ -4,3 +4,7 @@ class InvalidSession(Exception):
 
 class AdViewError(Exception):
     pass
+
+
+class ReauthRequired(Exception):
+    pass
@@ -1,29 +1,186 @@
 import asyncio
 import fasteners
+import os
+from concurrent.futures import ThreadPoolExecutor
 from random import uniform
 from os import path
+from time import monotonic
+from typing import Dict, Optional
 
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+from bot.config import settings
 from bot.utils import logger
 
+LOCK_THREADS = 4
+WAIT_NOTICE = 60
+
+_process_locks: Dict[str, asyncio.Lock] = {}
+_executor: Optional[ThreadPoolExecutor] = None
+_multiprocess = False
+
+
+def configure_locks(workers: int) -> None:
+    global _multiprocess
+    _multiprocess = workers > 1
+    from bot.utils.metrics import metrics
+    metrics.register_collector('locks', lock_stats.stats)
+
+
+def lock_mode() -> str:
+    if settings.LOCK_MODE in ('process', 'file'):
+        return settings.LOCK_MODE
+    from bot.utils import GLOBAL_CONFIG_EXISTS
+    return 'file' if _multiprocess or GLOBAL_CONFIG_EXISTS else 'process'
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=LOCK_THREADS, thread_name_prefix='file-lock')
+    return _executor
+
+
+def _open_lock_file(lock_file: str) -> int:
+    os.makedirs(path.dirname(lock_file) or '.', exist_ok=True)
+    return os.open(lock_file, os.O_RDWR | os.O_CREAT, 0o644)
+
+
+def _try_lock_file(lock_file: str) -> Optional[int]:
+    fd = _open_lock_file(lock_file)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return fd
+    except OSError:
+        os.close(fd)
+        return None
+
+
+def _wait_lock_file(lock_file: str) -> int:
+    fd = _open_lock_file(lock_file)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+    except BaseException:
+        os.close(fd)
+        raise
+    return fd
+
+
+def _unlock_file(fd: int) -> None:
+    try:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+    finally:
+        os.close(fd)
+
+
+def _release_abandoned(future: asyncio.Future) -> None:
+    if not future.cancelled() and future.exception() is None:
+        _unlock_file(future.result())
+
+
+class LockStats:
+    def __init__(self):
+        self.acquired: Dict[str, int] = {}
+        self.contended: Dict[str, int] = {}
+        self.wait_seconds: Dict[str, float] = {}
+        self.max_wait: Dict[str, float] = {}
+
+    def record(self, kind: str, waited: float, contended: bool) -> None:
+        self.acquired[kind] = self.acquired.get(kind, 0) + 1
+        if contended:
+            self.contended[kind] = self.contended.get(kind, 0) + 1
+        self.wait_seconds[kind] = self.wait_seconds.get(kind, 0.0) + waited
+        self.max_wait[kind] = max(self.max_wait.get(kind, 0.0), waited)
+
+    def stats(self) -> Dict:
+        return {
+            'acquired': dict(self.acquired),
+            'contended': dict(self.contended),
+            'wait_seconds': {kind: round(value, 3) for kind, value in self.wait_seconds.items()},
+            'max_wait_seconds': {kind: round(value, 3) for kind, value in self.max_wait.items()}
+        }
+
+
+lock_stats = LockStats()
+
 
 class AsyncInterProcessLock:
     def __init__(self, lock_file: str):
-        self._lock = fasteners.InterProcessLock(lock_file)
+        self._path = path.abspath(lock_file)
         self._file_name, _ = path.splitext(path.basename(lock_file))
+        self._kind = 'accounts_config' if 'accounts_config' in self._file_name else 'session'
+        self._fd: Optional[int] = None
+        self._file_lock: Optional[fasteners.InterProcessLock] = None
+
+    @property
+    def _process_lock(self) -> asyncio.Lock:
+        lock = _process_locks.get(self._path)
+        if lock is None:
+            lock = _process_locks[self._path] = asyncio.Lock()
+        return lock
 
     async def __aenter__(self) -> 'AsyncInterProcessLock':
+        started = monotonic()
+        process_lock = self._process_lock
+        contended = process_lock.locked()
+        await process_lock.acquire()
+        try:
+            if lock_mode() == 'file':
+                contended = await self._acquire_file() or contended
+        except BaseException:
+            process_lock.release()
+            raise
+        lock_stats.record(self._kind, monotonic() - started, contended)
+        return self
+
+    async def _acquire_file(self) -> bool:
+        if fcntl is None:
+            return await self._acquire_fasteners()
+
+        self._fd = _try_lock_file(self._path)
+        if self._fd is not None:
+            return False
+
+        future = asyncio.get_running_loop().run_in_executor(_get_executor(), _wait_lock_file, self._path)
+        try:
+            while not (await asyncio.wait({future}, timeout=WAIT_NOTICE))[0]:
+                logger.info(f"<LY><k>{self._file_name}</k></LY> | Waiting for {self._kind} lock held by another process")
+        except asyncio.CancelledError:
+            future.add_done_callback(_release_abandoned)
+            raise
+        self._fd = future.result()
+        return True
+
+    async def _acquire_fasteners(self) -> bool:
+        if self._file_lock is None:
+            self._file_lock = fasteners.InterProcessLock(self._path)
+        contended = False
         while True:
-            lock_acquired = await asyncio.to_thread(self._lock.acquire, timeout=uniform(5, 10))
+            future = asyncio.get_running_loop().run_in_executor(
+                _get_executor(), lambda: self._file_lock.acquire(timeout=uniform(5, 10)))
+            try:
+                lock_acquired = await asyncio.shield(future)
+            except asyncio.CancelledError:
+                future.add_done_callback(
+                    lambda done: self._file_lock.release() if not done.cancelled() and done.result() else None)
+                raise
             if lock_acquired:
-                return self
+                return contended
+            contended = True
             sleep_time = uniform(30, 150)
-            logger_message = (
-                f"<LY><k>{self._file_name}</k></LY> | Failed to acquire lock for "
-                f"{'accounts_config' if 'accounts_config' in self._file_name else 'session'}. "
-                f"Retrying in {int(sleep_time)} seconds"
-            )
-            logger.info(logger_message)
+            logger.info(f"<LY><k>{self._file_name}</k></LY> | Failed to acquire lock for {self._kind}. "
+                        f"Retrying in {int(sleep_time)} seconds")
             await asyncio.sleep(sleep_time)
 
     async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
-        await asyncio.to_thread(self._lock.release)
+        try:
+            if self._fd is not None:
+                fd, self._fd = self._fd, None
+                _unlock_file(fd)
+            elif self._file_lock is not None and self._file_lock.acquired:
+                self._file_lock.release()
+        finally:
+            self._process_lock.release()
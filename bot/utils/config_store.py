@@ -0,0 +1,221 @@
+import json
+import os
+import sqlite3
+import tempfile
+from copy import deepcopy
+from typing import Dict, Optional, Tuple
+
+from bot.config import settings
+from bot.utils import logger
+
+
+def read_json_config(config_path: str) -> dict:
+    try:
+        with open(config_path, 'r') as file:
+            content = file.read()
+            return json.loads(content) if content else {}
+    except FileNotFoundError:
+        with open(config_path, 'w'):
+            logger.warning(f"Accounts config file `{config_path}` not found. Creating a new one.")
+        return {}
+
+
+def dump_json_config(content: dict, config_path: str) -> None:
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(config_path) or '.', prefix='.accounts_config.', suffix='.tmp')
+    try:
+        with open(fd, 'w') as file:
+            json.dump(content, file, indent=2)
+        os.chmod(tmp_path, os.stat(config_path).st_mode if os.path.exists(config_path) else 0o644)
+        os.replace(tmp_path, config_path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def restructure_config(config: dict) -> dict:
+    cfg_copy = deepcopy(config)
+    for key, value in cfg_copy.items():
+        api_info = {
+            "api_id": value.get('api', {}).get("api_id") or value.pop("api_id", None),
+            "api_hash": value.get('api', {}).get("api_hash") or value.pop("api_hash", None),
+            "device_model": value.get('api', {}).get("device_model") or value.pop("device_model", None),
+            "system_version": value.get('api', {}).get("system_version") or value.pop("system_version", None),
+            "app_version": value.get('api', {}).get("app_version") or value.pop("app_version", None),
+            "system_lang_code": value.get('api', {}).get("system_lang_code") or value.pop("system_lang_code", None),
+            "lang_pack": value.get('api', {}).get("lang_pack") or value.pop("lang_pack", None),
+            "lang_code": value.get('api', {}).get("lang_code") or value.pop("lang_code", None)
+        }
+        api_info = {k: v for k, v in api_info.items() if v is not None}
+        cfg_copy[key]['api'] = api_info
+    return cfg_copy
+
+
+class JsonConfigStore:
+    """accounts_config.json as a whole-file store; parsed content is reused until the file changes."""
+
+    backend = 'json'
+
+    def __init__(self, config_path: str):
+        self.config_path = config_path
+        self._cache: Optional[dict] = None
+        self._stat: Optional[Tuple[int, int, int]] = None
+        self.reads = 0
+
+    def _file_stat(self) -> Optional[Tuple[int, int, int]]:
+        try:
+            stat = os.stat(self.config_path)
+            return stat.st_ino, stat.st_size, stat.st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def _load(self) -> dict:
+        stat = self._file_stat()
+        if self._cache is None or stat is None or stat != self._stat:
+            self._cache = read_json_config(self.config_path)
+            self._stat = self._file_stat()
+            self.reads += 1
+        return self._cache
+
+    def all(self) -> dict:
+        return deepcopy(self._load())
+
+    def get(self, session_name: str) -> dict:
+        return deepcopy(self._load().get(session_name, {}))
+
+    def set_many(self, configs: Dict[str, dict]) -> None:
+        if not configs:
+            return
+        content = read_json_config(self.config_path)
+        content.update(deepcopy(configs))
+        dump_json_config(content, self.config_path)
+        self._cache, self._stat = content, self._file_stat()
+
+    def set(self, session_name: str, session_config: dict) -> None:
+        self.set_many({session_name: session_config})
+
+    def replace(self, content: dict) -> None:
+        dump_json_config(content, self.config_path)
+        self._cache, self._stat = deepcopy(content), self._file_stat()
+
+    def export_json(self) -> None:
+        pass
+
+
+class SqliteConfigStore:
+    """Per-session rows in a WAL-mode SQLite database, imported from and exported to accounts_config.json."""
+
+    backend = 'sqlite'
+
+    def __init__(self, config_path: str, db_path: Optional[str] = None):
+        self.config_path = config_path
+        self.db_path = db_path or f"{os.path.splitext(config_path)[0]}.sqlite"
+        self._db: Optional[sqlite3.Connection] = None
+        self._cache: Dict[str, dict] = {}
+        self._complete = False
+        self._data_version: Optional[int] = None
+        self.reads = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._db is None:
+            self._db = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            self._db.execute('PRAGMA journal_mode=WAL')
+            self._db.execute('PRAGMA synchronous=NORMAL')
+            self._db.execute('CREATE TABLE IF NOT EXISTS accounts (session TEXT PRIMARY KEY, config TEXT NOT NULL)')
+            self._db.execute('CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)')
+            self._import_json()
+        return self._db
+
+    def _meta(self, key: str) -> Optional[str]:
+        row = self._db.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else None
+
+    def _json_mtime(self) -> Optional[int]:
+        try:
+            return os.stat(self.config_path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def _import_json(self) -> None:
+        json_mtime = self._json_mtime()
+        exported = self._meta('json_mtime')
+        if json_mtime is None or (exported is not None and int(exported) >= json_mtime):
+            return
+        content = read_json_config(self.config_path)
+        if not content:
+            return
+        content = restructure_config(content)
+        self._write(content, replace=exported is None)
+        self._db.execute('INSERT OR REPLACE INTO meta VALUES (?, ?)', ('json_mtime', str(json_mtime)))
+        logger.info(f"Imported {len(content)} sessions from `{self.config_path}` into `{self.db_path}`")
+
+    def _check_version(self) -> None:
+        data_version = self._connect().execute('PRAGMA data_version').fetchone()[0]
+        if data_version != self._data_version:
+            self._cache.clear()
+            self._complete = False
+            self._data_version = data_version
+
+    def all(self) -> dict:
+        self._check_version()
+        if not self._complete:
+            self._cache = {session: json.loads(config) for session, config in
+                           self._db.execute('SELECT session, config FROM accounts')}
+            self._complete = True
+            self.reads += 1
+        return deepcopy(self._cache)
+
+    def get(self, session_name: str) -> dict:
+        self._check_version()
+        if session_name not in self._cache and not self._complete:
+            row = self._db.execute('SELECT config FROM accounts WHERE session = ?', (session_name,)).fetchone()
+            self.reads += 1
+            if not row:
+                return {}
+            self._cache[session_name] = json.loads(row[0])
+        return deepcopy(self._cache.get(session_name, {}))
+
+    def _write(self, configs: Dict[str, dict], replace: bool = False) -> None:
+        db = self._db
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            if replace:
+                db.execute('DELETE FROM accounts')
+            db.executemany(
+                'INSERT INTO accounts VALUES (?, ?) ON CONFLICT(session) DO UPDATE SET config = excluded.config',
+                [(session, json.dumps(config)) for session, config in configs.items()]
+            )
+            db.execute('COMMIT')
+        except BaseException:
+            db.execute('ROLLBACK')
+            raise
+
+    def set_many(self, configs: Dict[str, dict]) -> None:
+        if not configs:
+            return
+        self._check_version()
+        self._write(configs)
+        self._cache.update(deepcopy(configs))
+
+    def set(self, session_name: str, session_config: dict) -> None:
+        self.set_many({session_name: session_config})
+
+    def replace(self, content: dict) -> None:
+        self._connect()
+        self._write(content, replace=True)
+        self._cache, self._complete = deepcopy(content), True
+
+    def export_json(self) -> None:
+        dump_json_config(self.all(), self.config_path)
+        self._db.execute('INSERT OR REPLACE INTO meta VALUES (?, ?)', ('json_mtime', str(self._json_mtime())))
+
+
+_stores: Dict[str, object] = {}
+
+
+def get_config_store(config_path: str):
+    store = _stores.get(config_path)
+    if store is None:
+        store_class = SqliteConfigStore if settings.CONFIG_BACKEND == 'sqlite' else JsonConfigStore
+        store = _stores[config_path] = store_class(config_path)
+    return store
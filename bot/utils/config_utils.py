@@ -1,59 +1,87 @@
 import asyncio
 import json
+from bot.config import settings
 from bot.utils import logger, log_error, AsyncInterProcessLock
+from bot.utils.config_store import get_config_store, restructure_config
 from opentele.api import API
 from os import path, remove
 from copy import deepcopy
 
 
 def read_config_file(config_path: str) -> dict:
-    try:
-        with open(config_path, 'r') as file:
-            content = file.read()
-            return json.loads(content) if content else {}
-    except FileNotFoundError:
-        with open(config_path, 'w'):
-            logger.warning(f"Accounts config file `{config_path}` not found. Creating a new one.")
-        return {}
+    return get_config_store(config_path).all()
 
 
-async def write_config_file(content: dict, config_path: str) -> None:
-    lock = AsyncInterProcessLock(path.join(path.dirname(config_path), 'lock_files', 'accounts_config.lock'))
-    async with lock:
-        with open(config_path, 'w+') as file:
-            json.dump(content, file, indent=2)
+def _get_config_lock(config_path: str) -> AsyncInterProcessLock:
+    return AsyncInterProcessLock(path.join(path.dirname(config_path), 'lock_files', 'accounts_config.lock'))
+
+
+def _apply(configs: dict, config_path: str, replace: bool) -> None:
+    store = get_config_store(config_path)
+    if replace:
+        store.replace(configs)
+    else:
+        store.set_many(configs)
+
+
+async def _write_sessions(configs: dict, config_path: str, replace: bool = False) -> None:
+    if get_config_store(config_path).backend == 'sqlite':
+        _apply(configs, config_path, replace)
+        return
+    async with _get_config_lock(config_path):
+        _apply(configs, config_path, replace)
         await asyncio.sleep(0.1)
 
 
+async def write_config_file(content: dict, config_path: str) -> None:
+    await _write_sessions(content, config_path, replace=True)
+
+
 def get_session_config(session_name: str, config_path: str) -> dict:
-    return read_config_file(config_path).get(session_name, {})
+    return get_config_store(config_path).get(session_name)
+
+
+def export_config_file(config_path: str) -> None:
+    get_config_store(config_path).export_json()
 
 
 async def update_session_config_in_file(session_name: str, updated_session_config: dict, config_path: str) -> None:
-    config = read_config_file(config_path)
-    config[session_name] = updated_session_config
-    await write_config_file(config, config_path)
-
-
-async def restructure_config(config_path: str) -> None:
-    config = read_config_file(config_path)
-    if config:
-        cfg_copy = deepcopy(config)
-        for key, value in cfg_copy.items():
-            api_info = {
-                "api_id": value.get('api', {}).get("api_id") or value.pop("api_id", None),
-                "api_hash": value.get('api', {}).get("api_hash") or value.pop("api_hash", None),
-                "device_model": value.get('api', {}).get("device_model") or value.pop("device_model", None),
-                "system_version": value.get('api', {}).get("system_version") or value.pop("system_version", None),
-                "app_version": value.get('api', {}).get("app_version") or value.pop("app_version", None),
-                "system_lang_code": value.get('api', {}).get("system_lang_code") or value.pop("system_lang_code", None),
-                "lang_pack": value.get('api', {}).get("lang_pack") or value.pop("lang_pack", None),
-                "lang_code": value.get('api', {}).get("lang_code") or value.pop("lang_code", None)
-            }
-            api_info = {k: v for k, v in api_info.items() if v is not None}
-            cfg_copy[key]['api'] = api_info
-        if cfg_copy != config:
-            await write_config_file(cfg_copy, config_path)
+    await _write_sessions({session_name: updated_session_config}, config_path)
+
+
+class ConfigSession:
+    def __init__(self, config_path: str):
+        self.config_path = config_path
+        self.config: dict = {}
+        self._changed: set[str] = set()
+
+    async def __aenter__(self) -> 'ConfigSession':
+        self.config = read_config_file(self.config_path)
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        await self.commit()
+
+    def get(self, session_name: str) -> dict:
+        return deepcopy(self.config.get(session_name, {}))
+
+    def set(self, session_name: str, session_config: dict) -> None:
+        if self.config.get(session_name) != session_config:
+            self.config[session_name] = session_config
+            self._changed.add(session_name)
+
+    def restructure(self) -> None:
+        for session_name, session_config in restructure_config(self.config).items():
+            self.set(session_name, session_config)
+
+    async def commit(self) -> bool:
+        if not self._changed:
+            return False
+        await _write_sessions({name: self.config[name] for name in self._changed}, self.config_path)
+        export_config_file(self.config_path)
+        logger.info(f"Saved {len(self._changed)} changed sessions to `{self.config_path}`")
+        self._changed.clear()
+        return True
 
 
 def import_session_json(session_path: str) -> dict:
@@ -102,3 +130,28 @@ def get_api(acc_api: dict) -> API:
     api.lang_code = acc_api.get('lang_code', api.lang_code)
     api.lang_pack = acc_api.get('lang_pack', api.lang_pack)
     return api
+
+
+def get_client_params(session: str, session_config: dict, backend: str | None = None) -> dict:
+    api_config = session_config.get('api', {})
+    if api_config.get('api_id') in [4, 6, 2040, 10840, 21724]:
+        client_params = {
+            "session": session,
+            "api": get_api(api_config)
+        }
+    else:
+        client_params = {
+            "api_id": api_config.get("api_id", settings.API_ID),
+            "api_hash": api_config.get("api_hash", settings.API_HASH),
+            "session": session,
+            "lang_code": api_config.get("lang_code", "en"),
+            "system_lang_code": api_config.get("system_lang_code", "en-US")
+        }
+
+        for key in ("device_model", "system_version", "app_version"):
+            if api_config.get(key):
+                client_params[key] = api_config[key]
+
+    if backend:
+        client_params["backend"] = backend
+    return client_params
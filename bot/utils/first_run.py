@@ -1,12 +1,129 @@
-import aiofiles
+import asyncio
+import os
+from typing import Optional, Set, Tuple
+
+from bot.config import settings
+from bot.utils import logger
+from bot.utils.async_lock import AsyncInterProcessLock
+
+FIRST_RUN_PATH = 'first_run.txt'
+
+
+class FirstRunRegistry:
+    """Set of sessions that already ran, mirrored from first_run.txt and re-read only when the file changes."""
+
+    def __init__(self, path: str = FIRST_RUN_PATH):
+        self._path = path
+        self._sessions: Set[str] = set()
+        self._stat: Optional[Tuple[int, int, int]] = None
+        self._offset = 0
+        self._lines = 0
+        self._queue: Optional[asyncio.Queue] = None
+        self._writer: Optional[asyncio.Task] = None
+        self._lock = AsyncInterProcessLock(
+            os.path.join(os.path.dirname(os.path.abspath(path)), 'lock_files', 'first_run.lock'))
+
+    def _refresh(self) -> None:
+        try:
+            stat = os.stat(self._path)
+        except FileNotFoundError:
+            self._sessions.clear()
+            self._stat, self._offset, self._lines = None, 0, 0
+            return
+
+        key = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+        if key == self._stat:
+            return
+        if self._stat is None or stat.st_ino != self._stat[0] or stat.st_size < self._offset:
+            self._sessions.clear()
+            self._offset, self._lines = 0, 0
+
+        with open(self._path, 'rb') as file:
+            file.seek(self._offset)
+            data = file.read()
+        complete = data[:data.rfind(b'\n') + 1]
+        for line in complete.decode(errors='ignore').splitlines():
+            if line.strip():
+                self._sessions.add(line.strip())
+                self._lines += 1
+        self._offset += len(complete)
+        self._stat = key if len(complete) == len(data) else None
+
+    def is_first_run(self, session_name: str) -> bool:
+        self._refresh()
+        return session_name.lower() not in self._sessions
+
+    async def add(self, session_name: str) -> None:
+        session_name = session_name.lower()
+        if not self.is_first_run(session_name):
+            return
+        self._sessions.add(session_name)
+
+        loop = asyncio.get_running_loop()
+        if self._writer is None or self._writer.done() or self._writer.get_loop() is not loop:
+            self._queue = asyncio.Queue()
+            self._writer = loop.create_task(self._write_loop(self._queue))
+        done = loop.create_future()
+        self._queue.put_nowait((session_name, done))
+        await done
+
+    async def _write_loop(self, queue: asyncio.Queue) -> None:
+        while True:
+            batch = [await queue.get()]
+            while not queue.empty():
+                batch.append(queue.get_nowait())
+            try:
+                async with self._lock:
+                    self._refresh()
+                    names = [name for name, _ in batch]
+                    fd = os.open(self._path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+                    try:
+                        os.write(fd, ''.join(f"{name}\n" for name in names).encode())
+                    finally:
+                        os.close(fd)
+                    self._refresh()
+                    self._sessions.update(names)
+                error = None
+            except Exception as e:
+                error = e
+            for _, done in batch:
+                if done.done():
+                    continue
+                if error:
+                    done.set_exception(error)
+                else:
+                    done.set_result(None)
+
+    async def compact(self) -> int:
+        if not os.path.isfile(self._path):
+            return 0
+        async with self._lock:
+            self._refresh()
+            removed = self._lines - len(self._sessions)
+            if removed <= 0:
+                return 0
+            tmp_path = f"{self._path}.tmp"
+            with open(tmp_path, 'w') as file:
+                file.writelines(f"{name}\n" for name in sorted(self._sessions))
+            os.replace(tmp_path, self._path)
+            self._stat = None
+            self._refresh()
+        return removed
+
+
+first_run_registry = FirstRunRegistry()
+
 
 async def check_is_first_run(session_name: str):
-    async with aiofiles.open('first_run.txt', mode='a+') as file:
-        await file.seek(0)
-        lines = await file.readlines()
-    return session_name.lower() not in [line.strip() for line in lines]
+    return first_run_registry.is_first_run(session_name)
 
 
 async def append_recurring_session(session_name: str):
-    async with aiofiles.open('first_run.txt', mode='a+') as file:
-        await file.writelines(session_name.lower() + '\n')
+    await first_run_registry.add(session_name)
+
+
+async def compact_first_run() -> None:
+    if settings.FIRST_RUN_COMPACT:
+        removed = await first_run_registry.compact()
+        if removed:
+            logger.info(f"Compacted {FIRST_RUN_PATH}: removed {removed} duplicate lines")
@@ -7,11 +7,15 @@ import asyncio
 import ssl
 from typing import Optional, List, Dict, Tuple
 from dataclasses import dataclass
-from bot.utils import logger
+from bot.utils import logger, CONFIG_PATH
 from bot.config.config import settings
+from bot.utils.metrics import metrics
 import os
 from datetime import datetime
 
+CHUNK_MEMO_PATH = os.path.join(os.path.dirname(CONFIG_PATH), 'hash_chunks.json')
+HASHED_CHUNK = re.compile(r'[-.][0-9a-f]{8,}\.js$')
+
 @dataclass
 class Endpoint:
     path: str
@@ -138,6 +142,18 @@ class HashChecker:
             r'{\s*["\']?a["\']?\s*:\s*(\d+)\s*,\s*["\']?b["\']?\s*:\s*(\d+)\s*}',
             r'{\s*["\']?value["\']?\s*:\s*(\d+)\s*}'
         ]
+
+        self._memo_version = hashlib.sha256(json.dumps([
+            self._api_patterns, self._method_patterns, self._endpoint_method_map, self._json_patterns,
+            self._endpoint_params_map, self._vote_patterns, self._pool_patterns
+        ]).encode()).hexdigest()[:16]
+        self._chunk_memo: Optional[Dict[str, Dict]] = None
+        self._memo_dirty = False
+        self.chunks_cached = 0
+        self.chunks_scanned = 0
+        self.timings: Dict[str, float] = {}
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._timeout: Optional[aiohttp.ClientTimeout] = None
         
     async def _init_client(self) -> None:
         if not self._http_client or self._http_client.closed:
@@ -181,65 +197,137 @@ class HashChecker:
         except Exception:
             return None
 
-    async def _download_js(self) -> Optional[str]:
+    def _load_memo(self) -> Dict[str, Dict]:
+        if self._chunk_memo is None:
+            self._chunk_memo = {}
+            try:
+                with open(CHUNK_MEMO_PATH, 'r', encoding='utf-8') as f:
+                    memo = json.load(f)
+                if memo.get('version') == self._memo_version:
+                    self._chunk_memo = memo.get('chunks', {})
+            except (OSError, ValueError):
+                pass
+        return self._chunk_memo
+
+    def _save_memo(self, chunk_urls: List[str]) -> None:
+        memo = self._load_memo()
+        for url in [url for url in memo if url not in chunk_urls]:
+            del memo[url]
+            self._memo_dirty = True
+        if not self._memo_dirty:
+            return
+        tmp_path = f"{CHUNK_MEMO_PATH}.tmp"
         try:
-            pages = [
-                "https://miniapp.theopencoin.xyz/",
-                "https://miniapp.theopencoin.xyz/vote",
-                "https://miniapp.theopencoin.xyz/pools"
-            ]
-            
-            all_js_files = set()
-            for page_url in pages:
-                try:
-                    async with self._http_client.get(page_url, ssl=self._ssl_context) as response:
-                        if response.status == 200:
-                            html_content = await response.text()
-                            all_js_files.update(re.findall(r'src="([^"]+\.js)"', html_content))
-                            chunk_ids = re.findall(r'chunks/([^"]+)"', html_content)
-                            for chunk in chunk_ids:
-                                if chunk.endswith('.js'):
-                                    all_js_files.add(f"/_next/static/chunks/{chunk}")
-                                else:
-                                    all_js_files.add(f"/_next/static/chunks/{chunk}.js")
-                except Exception:
-                    continue
-            
-            all_content = []
-            
-            for js_file in all_js_files:
-                if not js_file.startswith('http'):
-                    js_file = f"https://miniapp.theopencoin.xyz{js_file}"
-                
-                headers = {
-                    'Accept': 'text/javascript,application/javascript,application/ecmascript,application/x-ecmascript,*/*;q=0.9',
-                    'Accept-Language': 'ru,en-US;q=0.9,en;q=0.8',
-                    'Cache-Control': 'no-cache',
-                    'Pragma': 'no-cache',
-                    'Referer': 'https://miniapp.theopencoin.xyz/',
-                    'sec-fetch-dest': 'script',
-                    'sec-fetch-mode': 'no-cors',
-                    'sec-fetch-site': 'same-origin'
-                }
-                
-                try:
-                    async with self._http_client.get(js_file, headers=headers, ssl=self._ssl_context) as response:
-                        if response.status == 200:
-                            content = await response.text()
-                            if 'capture' in content or 'captcha' in content:
-                                await self._analyze_js_file(js_file, content)
-                            all_content.append(content)
-                except Exception:
-                    continue
-            
-            if not all_content:
-                return None
-                
-            return "\n".join(all_content)
-            
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'version': self._memo_version, 'chunks': memo}, f, ensure_ascii=False)
+            os.replace(tmp_path, CHUNK_MEMO_PATH)
+            self._memo_dirty = False
+        except OSError as e:
+            logger.warning(f"Failed to save hash chunk memo: {str(e)}")
+
+    async def _fetch_page(self, page_url: str) -> Optional[str]:
+        try:
+            async with self._semaphore:
+                async with self._http_client.get(page_url, ssl=self._ssl_context, timeout=self._timeout) as response:
+                    if response.status != 200:
+                        return None
+                    return await response.text()
         except Exception:
             return None
 
+    async def _collect_chunk_urls(self) -> Tuple[List[str], bool]:
+        all_js_files = set()
+        pages = await asyncio.gather(*(self._fetch_page(page_url) for page_url in self._pages))
+        for html_content in pages:
+            if html_content is None:
+                continue
+            all_js_files.update(re.findall(r'src="([^"]+\.js)"', html_content))
+            chunk_ids = re.findall(r'chunks/([^"]+)"', html_content)
+            for chunk in chunk_ids:
+                if chunk.endswith('.js'):
+                    all_js_files.add(f"/_next/static/chunks/{chunk}")
+                else:
+                    all_js_files.add(f"/_next/static/chunks/{chunk}.js")
+        return sorted(js_file if js_file.startswith('http') else f"{self._base_url}{js_file}"
+                      for js_file in all_js_files), None not in pages
+
+    def _scan_chunk(self, js_file: str, content: str) -> Dict:
+        captchas = self._analyze_js_file(js_file, content) if 'capture' in content or 'captcha' in content else []
+        return {
+            'endpoints': [[e.method, e.path, e.required_params] for e in self._extract_endpoints(content)],
+            'captchas': [[c.type, c.context, c.file] for c in captchas]
+        }
+
+    async def _fetch_chunk(self, js_file: str) -> Optional[Dict]:
+        headers = {
+            'Accept': 'text/javascript,application/javascript,application/ecmascript,application/x-ecmascript,*/*;q=0.9',
+            'Accept-Language': 'ru,en-US;q=0.9,en;q=0.8',
+            'Cache-Control': 'no-cache',
+            'Pragma': 'no-cache',
+            'Referer': 'https://miniapp.theopencoin.xyz/',
+            'sec-fetch-dest': 'script',
+            'sec-fetch-mode': 'no-cors',
+            'sec-fetch-site': 'same-origin'
+        }
+
+        try:
+            async with self._semaphore:
+                async with self._http_client.get(js_file, headers=headers, ssl=self._ssl_context,
+                                                 timeout=self._timeout) as response:
+                    if response.status != 200:
+                        return None
+                    content = await response.text()
+        except Exception:
+            return None
+
+        self.chunks_scanned += 1
+        scan = self._scan_chunk(js_file, content)
+        if HASHED_CHUNK.search(js_file):
+            self._load_memo()[js_file] = scan
+            self._memo_dirty = True
+        return scan
+
+    async def _download_js(self) -> Optional[List[Dict]]:
+        try:
+            self._semaphore = asyncio.Semaphore(max(1, settings.HASH_CHECK_CONCURRENCY))
+            self._timeout = aiohttp.ClientTimeout(total=settings.HASH_CHECK_TIMEOUT)
+            started = time.perf_counter()
+            chunk_urls, complete = await self._collect_chunk_urls()
+            self.timings['pages'] = time.perf_counter() - started
+
+            started = time.perf_counter()
+            memo = self._load_memo()
+            missing = [js_file for js_file in chunk_urls if js_file not in memo]
+            self.chunks_cached += len(chunk_urls) - len(missing)
+            fetched = dict(zip(missing, await asyncio.gather(*(self._fetch_chunk(js_file) for js_file in missing))))
+            scans = [scan for scan in (memo.get(js_file) or fetched.get(js_file) for js_file in chunk_urls)
+                     if scan is not None]
+            self.timings['chunks'] = time.perf_counter() - started
+
+            if complete:
+                self._save_memo(chunk_urls)
+            elif self._memo_dirty:
+                self._save_memo(list(memo))
+
+            return scans or None
+
+        except Exception:
+            return None
+
+    def _merge_scans(self, scans: List[Dict]) -> Tuple[List[Endpoint], List[CaptchaType]]:
+        endpoints = []
+        seen_endpoints = set()
+        captchas: Dict[str, CaptchaType] = {}
+        for scan in scans:
+            for method, path, params in scan['endpoints']:
+                if f"{method}:{path}" not in seen_endpoints:
+                    seen_endpoints.add(f"{method}:{path}")
+                    endpoints.append(Endpoint(path=path, method=method, required_params=params))
+            for captcha_type, context, file in scan['captchas']:
+                captchas.setdefault(captcha_type, CaptchaType(type=captcha_type, context=context, file=file))
+        endpoints.sort(key=lambda x: (x.method, x.path))
+        return endpoints, sorted(captchas.values(), key=lambda x: x.type)
+
     def _normalize_path(self, path: str) -> str:
         path = path.strip('/"\'')
         path = path.strip()
@@ -372,7 +460,8 @@ class HashChecker:
         else:
             return "Неизвестный тип капчи"
             
-    async def _analyze_js_file(self, js_file: str, content: str) -> None:
+    def _analyze_js_file(self, js_file: str, content: str) -> List[CaptchaType]:
+        found: List[CaptchaType] = []
         v1_matches = re.finditer(r'["\']([A-Z0-9_]+_V1)["\']', content)
         for match in v1_matches:
             captcha_type = match.group(1)
@@ -416,8 +505,17 @@ class HashChecker:
                 file=os.path.basename(js_file)
             )
             
-            if not any(c.type == captcha_type for c in self.found_captcha_types):
-                self.found_captcha_types.append(captcha)
+            if not any(c.type == captcha_type for c in found):
+                found.append(captcha)
+        return found
+
+    def stats(self) -> Dict:
+        return {
+            'memo_chunks': len(self._chunk_memo or {}),
+            'chunks_cached': self.chunks_cached,
+            'chunks_scanned': self.chunks_scanned,
+            'seconds': {name: round(value, 3) for name, value in self.timings.items()}
+        }
 
     def generate_report(self, gist_hash: str, current_hash: str, endpoints: List[Endpoint]) -> Dict:
         hash_status = {
@@ -454,11 +552,11 @@ class HashChecker:
 
     async def get_current_hash(self) -> Optional[str]:
         try:
-            js_content = await self._download_js()
-            if not js_content:
+            scans = await self._download_js()
+            if not scans:
                 return None
-                
-            endpoints = self._extract_endpoints(js_content)
+
+            endpoints, self.found_captcha_types = self._merge_scans(scans)
             if not endpoints:
                 return None
             
@@ -514,7 +612,13 @@ class HashChecker:
             if not gist_hash:
                 return False, None
                 
+            started = time.perf_counter()
             current_hash = await self.get_current_hash()
+            self.timings['check'] = time.perf_counter() - started
+            if settings.DEBUG_HASH:
+                print(f"\n=== Hash Timing ===\n"
+                      f"Pages: {self.timings.get('pages', 0):.3f}s | Chunks: {self.timings.get('chunks', 0):.3f}s | "
+                      f"Total: {self.timings['check']:.3f}s")
             if not current_hash:
                 return False, None
                 
@@ -538,4 +642,5 @@ class HashChecker:
                 await self._http_client.close()
                 self._http_client = None
 
-hash_checker = HashChecker() 
+hash_checker = HashChecker()
+metrics.register_collector('hash_checker', hash_checker.stats) 
@@ -0,0 +1,67 @@
+import aiohttp
+from aiocfscrape import CloudflareScraper
+from aiohttp_proxy import ProxyConnector
+from time import monotonic
+from typing import Optional
+
+from bot.config import settings
+from bot.utils import logger
+
+
+class SessionHttpClient:
+    def __init__(self, session_name: str):
+        self.session_name = session_name
+        self._client: Optional[CloudflareScraper] = None
+        self._proxy: Optional[str] = None
+        self._broken = False
+        self._last_used = 0.0
+        self.builds = 0
+        self.prewarms = 0
+
+    @property
+    def broken(self) -> bool:
+        return self._broken
+
+    def _create_connector(self, proxy: Optional[str]) -> aiohttp.TCPConnector:
+        params = {'limit_per_host': settings.HTTP_POOL_SIZE, 'keepalive_timeout': settings.HTTP_KEEPALIVE}
+        return ProxyConnector.from_url(proxy, **params) if proxy else aiohttp.TCPConnector(**params)
+
+    async def get(self, proxy: Optional[str]) -> CloudflareScraper:
+        if self._client and not self._client.closed and not self._broken and proxy == self._proxy:
+            return self._client
+
+        await self.close()
+        self._client = CloudflareScraper(timeout=aiohttp.ClientTimeout(60), connector=self._create_connector(proxy))
+        self._proxy = proxy
+        self._broken = False
+        self._last_used = 0.0
+        self.builds += 1
+        if self.builds > 1:
+            logger.info(f"{self.session_name} | HTTP client rebuilt ({self.builds} builds)")
+        return self._client
+
+    def touch(self) -> None:
+        self._last_used = monotonic()
+
+    def mark_broken(self) -> None:
+        self._broken = True
+
+    def _is_warm(self) -> bool:
+        return bool(self._last_used) and monotonic() - self._last_used < settings.HTTP_KEEPALIVE / 2
+
+    async def prewarm(self, url: str) -> None:
+        if not self._client or self._client.closed or self._broken or self._is_warm():
+            return
+        try:
+            async with self._client.head(url, timeout=aiohttp.ClientTimeout(10)) as response:
+                await response.release()
+            self.prewarms += 1
+            self.touch()
+        except Exception as e:
+            logger.warning(f"{self.session_name} | Connection pre-warm failed: {str(e)}")
+            self.mark_broken()
+
+    async def close(self) -> None:
+        if self._client and not self._client.closed:
+            await self._client.close()
+        self._client = None
@@ -0,0 +1,159 @@
+import asyncio
+import json
+import os
+from time import time as timestamp
+from typing import Awaitable, Callable, Optional
+from urllib.parse import parse_qs
+
+from bot.config import settings
+from bot.utils import logger, CONFIG_PATH
+
+INIT_DATA_DIR = os.path.join(os.path.dirname(CONFIG_PATH), 'init_data')
+
+
+def parse_auth_date(init_data: str) -> Optional[int]:
+    try:
+        return int(parse_qs(init_data).get('auth_date', [''])[0])
+    except (ValueError, TypeError):
+        return None
+
+
+class InitDataCache:
+    """Keeps a session's signed tgWebAppData and refreshes it shortly before it expires."""
+
+    def __init__(self, session_name: str, fetch: Callable[[], Awaitable[str]]):
+        self.session_name = session_name
+        self._fetch = fetch
+        self._value: Optional[str] = None
+        self._expires_at = 0.0
+        self._pending: Optional[asyncio.Future] = None
+        self._active = asyncio.Event()
+        self._active.set()
+        self._task: Optional[asyncio.Task] = None
+        self._loaded = False
+        self.fetches = 0
+        self.restored = 0
+
+    @property
+    def value(self) -> Optional[str]:
+        return self._value if self.valid() else None
+
+    @property
+    def expires_at(self) -> float:
+        return self._expires_at
+
+    @property
+    def _path(self) -> str:
+        return os.path.join(INIT_DATA_DIR, f"{self.session_name}.json")
+
+    def valid(self, margin: float = 0) -> bool:
+        return self._value is not None and timestamp() + margin < self._expires_at
+
+    def _store(self, init_data: str) -> None:
+        now = timestamp()
+        auth_date = parse_auth_date(init_data)
+        auth_date = min(auth_date, now) if auth_date else now
+        self._value = init_data
+        self._expires_at = max(auth_date + settings.INIT_DATA_TTL, now + 60)
+
+    def _load(self) -> None:
+        self._loaded = True
+        if not settings.INIT_DATA_PERSIST or not os.path.isfile(self._path):
+            return
+        try:
+            with open(self._path) as file:
+                init_data = json.load(file).get('init_data')
+        except (OSError, ValueError, AttributeError) as e:
+            logger.warning(f"{self.session_name} | Failed to read saved init data: {str(e)}")
+            return
+        if init_data:
+            self._store(init_data)
+            if self.valid(settings.INIT_DATA_REFRESH_LEAD):
+                self.restored += 1
+                logger.info(f"{self.session_name} | Restored init data valid for {int(self._expires_at - timestamp())}s")
+            else:
+                self._value = None
+
+    def _save(self) -> None:
+        if not settings.INIT_DATA_PERSIST:
+            return
+        try:
+            os.makedirs(INIT_DATA_DIR, exist_ok=True)
+            tmp_path = f"{self._path}.tmp"
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with open(fd, 'w') as file:
+                json.dump({'init_data': self._value, 'expires_at': self._expires_at}, file)
+            os.replace(tmp_path, self._path)
+        except OSError as e:
+            logger.warning(f"{self.session_name} | Failed to save init data: {str(e)}")
+
+    async def get(self) -> str:
+        if not self._loaded:
+            self._load()
+        if self.valid():
+            return self._value
+        return await self.refresh()
+
+    async def refresh(self) -> str:
+        if self._pending:
+            return await asyncio.shield(self._pending)
+
+        self._pending = asyncio.get_running_loop().create_future()
+        pending = self._pending
+        try:
+            init_data = await self._fetch()
+            self.fetches += 1
+            self._store(init_data)
+            self._save()
+            logger.info(f"{self.session_name} | Auth token refreshed, valid for {int(self._expires_at - timestamp())}s")
+            pending.set_result(init_data)
+            return init_data
+        except asyncio.CancelledError:
+            pending.cancel()
+            raise
+        except Exception as e:
+            pending.set_exception(e)
+            pending.exception()
+            raise
+        finally:
+            self._pending = None
+
+    def invalidate(self) -> None:
+        self._value = None
+        self._expires_at = 0.0
+        if settings.INIT_DATA_PERSIST and os.path.isfile(self._path):
+            try:
+                os.remove(self._path)
+            except OSError:
+                pass
+
+    def pause(self) -> None:
+        self._active.clear()
+
+    def resume(self) -> None:
+        self._active.set()
+
+    def start(self) -> None:
+        if not self._task or self._task.done():
+            self._task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _refresh_loop(self) -> None:
+        while True:
+            await self._active.wait()
+            remaining = self._expires_at - timestamp() - settings.INIT_DATA_REFRESH_LEAD
+            if self._value is None or remaining > 0:
+                await asyncio.sleep(min(max(remaining, 1), 60))
+                continue
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"{self.session_name} | Background init data refresh failed: {str(e)}")
+                await asyncio.sleep(60)
@@ -0,0 +1,66 @@
+import asyncio
+from collections import OrderedDict
+from typing import Dict, Set
+
+from bot.config import settings
+from bot.utils import logger
+from bot.utils.metrics import metrics
+
+
+class LiveClientPool:
+    """LRU registry of Telegram clients kept connected between webview refreshes."""
+
+    def __init__(self):
+        self._clients: OrderedDict = OrderedDict()
+        self._tasks: Set[asyncio.Task] = set()
+        self.connects = 0
+        self.reuses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._clients)
+
+    def touch(self, client, reused: bool) -> None:
+        if reused:
+            self.reuses += 1
+        else:
+            self.connects += 1
+        self._clients[client.session_name] = client
+        self._clients.move_to_end(client.session_name)
+        self._evict()
+
+    def discard(self, client) -> None:
+        if self._clients.get(client.session_name) is client:
+            del self._clients[client.session_name]
+
+    def _evict(self) -> None:
+        overflow = len(self._clients) - max(1, settings.TG_MAX_LIVE_CLIENTS)
+        for session_name, client in list(self._clients.items()):
+            if overflow <= 0:
+                break
+            if client.in_use:
+                continue
+            del self._clients[session_name]
+            overflow -= 1
+            self.evictions += 1
+            task = asyncio.create_task(self._disconnect_evicted(client))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _disconnect_evicted(self, client) -> None:
+        async with client.lock:
+            if self._clients.get(client.session_name) is client:
+                return
+            await client.disconnect_idle()
+
+    def stats(self) -> Dict:
+        return {
+            'live': len(self._clients),
+            'connects': self.connects,
+            'reuses': self.reuses,
+            'evictions': self.evictions
+        }
+
+
+live_clients = LiveClientPool()
+metrics.register_collector('tg_live_clients', live_clients.stats)
@@ -0,0 +1,226 @@
+import asyncio
+import json
+import os
+from bisect import bisect_left
+from functools import lru_cache
+from time import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from aiohttp import web
+from better_proxy import Proxy
+
+from bot.config import settings
+from bot.utils import logger, CONFIG_PATH
+
+BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+LABELS = ('endpoint', 'session', 'proxy')
+
+
+class Histogram:
+    __slots__ = ('counts', 'total', 'count')
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(BUCKETS, value)] += 1
+        self.total += value
+        self.count += 1
+
+
+class Series:
+    __slots__ = ('latency', 'statuses', 'retries', 'bytes_sent', 'bytes_received', 'backoff_seconds')
+
+    def __init__(self):
+        self.latency = Histogram()
+        self.statuses: Dict[str, int] = {}
+        self.retries = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.backoff_seconds = 0.0
+
+    def record(self, status: str, seconds: float, sent: int = 0, received: int = 0) -> None:
+        self.latency.observe(seconds)
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+        self.bytes_sent += sent
+        self.bytes_received += received
+
+
+@lru_cache(maxsize=4096)
+def proxy_label(proxy: Optional[str]) -> str:
+    if not proxy:
+        return 'direct'
+    try:
+        parsed = Proxy.from_str(proxy)
+        return f"{parsed.host}:{parsed.port}"
+    except Exception:
+        return 'invalid'
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _label_values(key: Tuple[str, str, Optional[str]]) -> Tuple[str, str, str]:
+    return key[0], key[1], proxy_label(key[2])
+
+
+def _format_labels(key: Tuple, name: str = '', value: str = '') -> str:
+    pairs = [f'{label}="{_escape(label_value)}"' for label, label_value in zip(LABELS, _label_values(key))]
+    if name:
+        pairs.append(f'{name}="{_escape(value)}"')
+    return '{' + ','.join(pairs) + '}'
+
+
+def _flatten(prefix: str, values: Dict) -> Dict[str, float]:
+    result = {}
+    for key, value in values.items():
+        name = f"{prefix}_{key}"
+        if isinstance(value, dict):
+            result.update(_flatten(name, value))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            result[name] = value
+    return result
+
+
+class Metrics:
+    def __init__(self):
+        self._series: Dict[Tuple[str, str, Optional[str]], Series] = {}
+        self._collectors: List[Tuple[str, Callable[[], Dict]]] = []
+        self._runner: Optional[web.AppRunner] = None
+        self._snapshot_task: Optional[asyncio.Task] = None
+        self._snapshot_path: Optional[str] = None
+
+    def series(self, endpoint: str, session_name: str, proxy: Optional[str]) -> Series:
+        key = (endpoint, session_name, proxy)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = Series()
+        return series
+
+    def requests_by_session(self) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        for (_, session_name, _), series in self._series.items():
+            counts[session_name] = counts.get(session_name, 0) + series.latency.count
+        return counts
+
+    def register_collector(self, name: str, collector: Callable[[], Dict]) -> None:
+        self._collectors.append((name, collector))
+
+    def _collect(self) -> Dict[str, float]:
+        values = {}
+        for name, collector in self._collectors:
+            try:
+                values.update(_flatten(name, collector()))
+            except Exception as e:
+                logger.warning(f"Metrics collector {name} failed: {str(e)}")
+        return values
+
+    def render(self) -> str:
+        lines = [
+            '# TYPE toc_request_duration_seconds histogram',
+        ]
+        for key, series in self._series.items():
+            cumulative = 0
+            for bound, count in zip(BUCKETS + ('+Inf',), series.latency.counts):
+                cumulative += count
+                lines.append(f'toc_request_duration_seconds_bucket{_format_labels(key, "le", bound)} {cumulative}')
+            lines.append(f'toc_request_duration_seconds_sum{_format_labels(key)} {series.latency.total:.6f}')
+            lines.append(f'toc_request_duration_seconds_count{_format_labels(key)} {series.latency.count}')
+
+        lines.append('# TYPE toc_requests counter')
+        for key, series in self._series.items():
+            for status, count in series.statuses.items():
+                lines.append(f'toc_requests_total{_format_labels(key, "status", status)} {count}')
+
+        for name, attribute in (('toc_request_retries', 'retries'), ('toc_request_bytes_sent', 'bytes_sent'),
+                                ('toc_request_bytes_received', 'bytes_received'),
+                                ('toc_request_backoff_seconds', 'backoff_seconds')):
+            lines.append(f'# TYPE {name} counter')
+            for key, series in self._series.items():
+                lines.append(f'{name}_total{_format_labels(key)} {getattr(series, attribute)}')
+
+        for name, value in self._collect().items():
+            lines.append(f'# TYPE toc_{name} gauge')
+            lines.append(f'toc_{name} {value}')
+
+        lines.append('# EOF')
+        return '\n'.join(lines) + '\n'
+
+    def snapshot(self) -> Dict:
+        return {
+            'timestamp': int(time()),
+            'buckets': list(BUCKETS),
+            'series': [
+                {
+                    **dict(zip(LABELS, _label_values(key))),
+                    'latency_buckets': series.latency.counts,
+                    'latency_sum': round(series.latency.total, 6),
+                    'latency_count': series.latency.count,
+                    'statuses': series.statuses,
+                    'retries': series.retries,
+                    'bytes_sent': series.bytes_sent,
+                    'bytes_received': series.bytes_received,
+                    'backoff_seconds': round(series.backoff_seconds, 3)
+                }
+                for key, series in self._series.items()
+            ],
+            'collectors': self._collect()
+        }
+
+    def _write_snapshot(self) -> None:
+        tmp_path = f"{self._snapshot_path}.tmp"
+        with open(tmp_path, 'w') as file:
+            json.dump(self.snapshot(), file)
+        os.replace(tmp_path, self._snapshot_path)
+
+    async def _snapshot_loop(self) -> None:
+        while True:
+            await asyncio.sleep(settings.METRICS_SNAPSHOT_INTERVAL)
+            try:
+                self._write_snapshot()
+            except Exception as e:
+                logger.warning(f"Failed to write metrics snapshot: {str(e)}")
+
+    async def _handle_metrics(self, request: web.Request) -> web.Response:
+        return web.Response(
+            text=self.render(),
+            headers={'Content-Type': 'application/openmetrics-text; version=1.0.0; charset=utf-8'}
+        )
+
+    async def start(self, worker_index: Optional[int] = None) -> None:
+        suffix = f"-w{worker_index}" if worker_index is not None else ''
+        if settings.METRICS_SNAPSHOT_INTERVAL > 0 and not self._snapshot_task:
+            self._snapshot_path = os.path.join(os.path.dirname(CONFIG_PATH) or '.', f"metrics{suffix}.json")
+            self._snapshot_task = asyncio.create_task(self._snapshot_loop())
+
+        if settings.METRICS_PORT > 0 and not self._runner:
+            port = settings.METRICS_PORT + (worker_index + 1 if worker_index is not None else 0)
+            app = web.Application()
+            app.router.add_get('/metrics', self._handle_metrics)
+            self._runner = web.AppRunner(app, access_log=None)
+            await self._runner.setup()
+            try:
+                await web.TCPSite(self._runner, '127.0.0.1', port).start()
+                logger.info(f"Metrics available at http://127.0.0.1:{port}/metrics")
+            except OSError as e:
+                logger.error(f"Failed to start metrics endpoint on port {port}: {str(e)}")
+                await self._runner.cleanup()
+                self._runner = None
+
+    async def stop(self) -> None:
+        if self._snapshot_task:
+            self._snapshot_task.cancel()
+            self._snapshot_task = None
+            try:
+                self._write_snapshot()
+            except Exception:
+                pass
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+
+metrics = Metrics()
@@ -0,0 +1,229 @@
+import asyncio
+import os
+import ssl
+from collections import Counter
+from random import sample, uniform
+from time import monotonic
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+import async_timeout
+from python_socks.async_.asyncio import Proxy as SocksProxy
+
+from bot.config import settings
+from bot.utils import logger, config_utils, CONFIG_PATH, PROXIES_PATH
+from bot.utils.async_lock import AsyncInterProcessLock
+from bot.utils.metrics import metrics, proxy_label
+from bot.utils.proxy_health import proxy_health
+from bot.utils.proxy_utils import get_proxies, to_socks_url
+
+ProxyCallback = Callable[[str], None]
+LoadSource = Callable[[], Dict[str, int]]
+EWMA_ALPHA = 0.3
+SAMPLE_FACTOR = 4
+
+
+async def measure_proxy(proxy: str, host: str, port: int = 443, timeout: float = 10) -> Tuple[float, float]:
+    """Returns (connect, tls) seconds for a tunnel through the proxy to host:port."""
+    started = monotonic()
+    writer = None
+    async with async_timeout.timeout(timeout):
+        sock = await SocksProxy.from_url(to_socks_url(proxy)).connect(dest_host=host, dest_port=port)
+        connected = monotonic()
+        try:
+            _, writer = await asyncio.open_connection(sock=sock, ssl=ssl.create_default_context(),
+                                                      server_hostname=host)
+        except BaseException:
+            sock.close()
+            raise
+    handshake = monotonic()
+    writer.close()
+    return connected - started, handshake - connected
+
+
+class ProxyScore:
+    __slots__ = ('connect', 'tls', 'failures')
+
+    def __init__(self):
+        self.connect: Optional[float] = None
+        self.tls: Optional[float] = None
+        self.failures = 0
+
+    def observe(self, connect: float, tls: float) -> None:
+        if self.connect is None:
+            self.connect, self.tls = connect, tls
+        else:
+            self.connect += EWMA_ALPHA * (connect - self.connect)
+            self.tls += EWMA_ALPHA * (tls - self.tls)
+        self.failures = 0
+
+    @property
+    def value(self) -> float:
+        if self.connect is None or self.failures:
+            return float('inf')
+        return self.connect + self.tls
+
+
+def plan_moves(sessions: Dict[str, Optional[str]], load: Dict[str, int], usage: Counter,
+               score: Callable[[str], float], candidates: List[str], capacity: int,
+               min_gain: float, max_moves: int) -> List[Tuple[str, str]]:
+    """Greedy plan that gives the fastest free slots to the busiest sessions, a few moves at a time."""
+    usage = Counter(usage)
+    current = dict(sessions)
+    ranked = sorted((proxy for proxy in candidates if score(proxy) != float('inf')), key=score)
+    moves: List[Tuple[str, str]] = []
+
+    for session in sorted(current, key=lambda name: (-load.get(name, 0), name)):
+        if len(moves) >= max_moves:
+            break
+        proxy = current[session]
+        threshold = score(proxy) * (1 - min_gain) if proxy else float('inf')
+        for target in ranked:
+            if score(target) >= threshold:
+                break
+            if usage[target] < capacity:
+                moves.append((session, target))
+                usage[target] += 1
+                if proxy:
+                    usage[proxy] -= 1
+                current[session] = target
+                break
+            lighter = next((name for name, assigned in current.items() if assigned == target
+                            and load.get(name, 0) < load.get(session, 0)), None)
+            if lighter and proxy and len(moves) + 2 <= max_moves:
+                moves += [(session, target), (lighter, proxy)]
+                current[session], current[lighter] = target, proxy
+                break
+    return moves
+
+
+class ProxyBalancer:
+    """Measures tunnel latency to the TOC host and gradually moves busy sessions onto faster proxies."""
+
+    def __init__(self):
+        self._scores: Dict[str, ProxyScore] = {}
+        self._sessions: Dict[str, ProxyCallback] = {}
+        self._managed: Set[str] = set()
+        self._load_source: LoadSource = metrics.requests_by_session
+        self._load_seen: Dict[str, int] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.remote = False
+        self.measurements = 0
+        self.failed_measurements = 0
+        self.moves = 0
+        self.rounds = 0
+
+    @staticmethod
+    def assignment_lock() -> AsyncInterProcessLock:
+        return AsyncInterProcessLock(os.path.join(os.path.dirname(CONFIG_PATH), 'lock_files', 'proxy_assignment.lock'))
+
+    def score(self, proxy: Optional[str]) -> float:
+        entry = self._scores.get(proxy) if proxy else None
+        return entry.value if entry else float('inf')
+
+    def register(self, session_name: str, callback: ProxyCallback) -> None:
+        self._sessions[session_name] = callback
+
+    def unregister(self, session_name: str) -> None:
+        self._sessions.pop(session_name, None)
+
+    def manage(self, session_names: Iterable[str], load_source: LoadSource) -> None:
+        """Balances sessions that run in worker processes; they pick up their new proxy from the config."""
+        self._managed = set(session_names)
+        self._load_source = load_source
+
+    async def _measure(self, proxy: str, semaphore: asyncio.Semaphore) -> None:
+        entry = self._scores.setdefault(proxy, ProxyScore())
+        async with semaphore:
+            try:
+                entry.observe(*await measure_proxy(proxy, settings.PROXY_PROBE_HOST))
+                self.measurements += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                entry.failures += 1
+                self.failed_measurements += 1
+                logger.debug(f"Proxy {proxy_label(proxy)} latency probe failed: {e.__class__.__name__}: {str(e)}")
+
+    async def measure(self, proxies) -> None:
+        semaphore = asyncio.Semaphore(max(1, settings.PROXY_CHECK_CONCURRENCY))
+        await asyncio.gather(*(self._measure(proxy, semaphore) for proxy in set(proxies) if proxy))
+
+    def _session_load(self, names: Set[str]) -> Dict[str, int]:
+        totals = self._load_source()
+        load = {name: totals.get(name, 0) - self._load_seen.get(name, 0) for name in names}
+        self._load_seen.update({name: totals.get(name, 0) for name in names})
+        return load
+
+    async def rebalance(self) -> List[Tuple[str, str]]:
+        names = set(self._sessions) | self._managed
+        if not names:
+            return []
+        candidates = [proxy for proxy in get_proxies(PROXIES_PATH) if proxy_health.is_healthy(proxy) is not False]
+        load = self._session_load(names)
+
+        accounts_config = config_utils.read_config_file(CONFIG_PATH)
+        assigned = {accounts_config[name].get('proxy') for name in names if name in accounts_config}
+        free = [proxy for proxy in candidates if proxy not in assigned]
+        await self.measure(assigned | set(sample(free, min(len(free),
+                                                         settings.PROXY_REBALANCE_MAX_MOVES * SAMPLE_FACTOR))))
+
+        async with self.assignment_lock():
+            accounts_config = config_utils.read_config_file(CONFIG_PATH)
+            sessions = {name: accounts_config[name]['proxy'] for name in names
+                        if accounts_config.get(name, {}).get('proxy')}
+            usage = Counter(config.get('proxy') for config in accounts_config.values() if config.get('proxy'))
+            moves = plan_moves(sessions, load, usage, self.score, candidates, settings.SESSIONS_PER_PROXY,
+                               settings.PROXY_REBALANCE_MIN_GAIN, settings.PROXY_REBALANCE_MAX_MOVES)
+            for session_name, proxy in moves:
+                session_config = accounts_config[session_name]
+                previous = session_config.get('proxy')
+                session_config['proxy'] = proxy
+                await config_utils.update_session_config_in_file(session_name, session_config, CONFIG_PATH)
+                logger.info(f"{session_name} | Rebalanced proxy {proxy_label(previous)} → {proxy_label(proxy)} | "
+                            f"{self.score(previous):.3f}s → {self.score(proxy):.3f}s")
+
+        for session_name, proxy in moves:
+            callback = self._sessions.get(session_name)
+            if callback:
+                callback(proxy)
+        self.rounds += 1
+        self.moves += len(moves)
+        return moves
+
+    async def _loop(self) -> None:
+        while True:
+            await asyncio.sleep(settings.PROXY_REBALANCE_INTERVAL * uniform(0.9, 1.1))
+            try:
+                await self.rebalance()
+            except Exception as e:
+                logger.error(f"Proxy rebalance failed: {str(e)}")
+
+    def start(self, worker_index: Optional[int] = None) -> None:
+        if worker_index is not None:
+            self.remote = True
+            return
+        if settings.USE_PROXY and not settings.DISABLE_PROXY_REPLACE and settings.PROXY_REBALANCE_INTERVAL > 0 \
+                and not self._task:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def stats(self) -> Dict:
+        measured = [entry.value for entry in self._scores.values() if entry.value != float('inf')]
+        return {
+            'measured': len(measured),
+            'measurements': self.measurements,
+            'failed_measurements': self.failed_measurements,
+            'rounds': self.rounds,
+            'moves': self.moves,
+            'best_rtt': round(min(measured), 3) if measured else 0,
+            'avg_rtt': round(sum(measured) / len(measured), 3) if measured else 0
+        }
+
+
+proxy_balancer = ProxyBalancer()
+metrics.register_collector('proxy_balancer', proxy_balancer.stats)
@@ -0,0 +1,190 @@
+import asyncio
+from collections import deque
+from random import uniform
+from time import monotonic, time
+from typing import Callable, Deque, Dict, Iterable, Optional, Set
+
+from bot.config import settings
+from bot.utils import logger, PROXIES_PATH
+from bot.utils.metrics import metrics, proxy_label
+from bot.utils.proxy_utils import check_proxy, get_proxies
+
+HealthCallback = Callable[[str, bool], None]
+
+
+class ProxyHealth:
+    __slots__ = ('results', 'rtts', 'healthy', 'checked_at', 'changed_at')
+
+    def __init__(self, window: int):
+        self.results: Deque[bool] = deque(maxlen=window)
+        self.rtts: Deque[float] = deque(maxlen=window)
+        self.healthy: Optional[bool] = None
+        self.checked_at = 0.0
+        self.changed_at = 0.0
+
+    @property
+    def success_rate(self) -> float:
+        return sum(self.results) / len(self.results) if self.results else 0.0
+
+    @property
+    def rtt(self) -> Optional[float]:
+        return sum(self.rtts) / len(self.rtts) if self.rtts else None
+
+
+class ProxyHealthMonitor:
+    """Probes proxies on its own schedule and serves the latest verdict to tappers without a network call."""
+
+    def __init__(self):
+        self._health: Dict[str, ProxyHealth] = {}
+        self._subscribers: Dict[str, Set[HealthCallback]] = {}
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._task: Optional[asyncio.Task] = None
+        self._shard_only = False
+        self.probes = 0
+        self.failed_probes = 0
+        self.cache_hits = 0
+        self.changes = 0
+
+    def health(self, proxy: str) -> Optional[ProxyHealth]:
+        return self._health.get(proxy)
+
+    def is_healthy(self, proxy: str) -> Optional[bool]:
+        entry = self._health.get(proxy)
+        if entry is None or entry.healthy is None:
+            return None
+        self.cache_hits += 1
+        return entry.healthy
+
+    def known_good(self, proxy: str) -> bool:
+        entry = self._health.get(proxy)
+        return entry is not None and entry.healthy is True
+
+    def record(self, proxy: str, ok: bool, rtt: Optional[float] = None) -> None:
+        entry = self._health.get(proxy)
+        if entry is None:
+            entry = self._health[proxy] = ProxyHealth(max(1, settings.PROXY_HEALTH_WINDOW))
+        entry.results.append(ok)
+        if ok and rtt is not None:
+            entry.rtts.append(rtt)
+        entry.checked_at = time()
+
+        healthy = entry.success_rate >= settings.PROXY_HEALTH_MIN_SUCCESS
+        if healthy == entry.healthy:
+            return
+        previous, entry.healthy, entry.changed_at = entry.healthy, healthy, time()
+        if previous is None:
+            return
+
+        self.changes += 1
+        rate = f"{entry.success_rate:.0%}"
+        if healthy:
+            logger.info(f"Proxy {proxy_label(proxy)} recovered | success rate {rate}")
+        else:
+            logger.warning(f"Proxy {proxy_label(proxy)} marked unhealthy | success rate {rate}")
+        for callback in list(self._subscribers.get(proxy, ())):
+            try:
+                callback(proxy, healthy)
+            except Exception as e:
+                logger.error(f"Proxy health callback failed: {str(e)}")
+
+    def seed(self, verdicts: Dict[str, bool]) -> None:
+        for proxy, verdict in verdicts.items():
+            if proxy not in self._health:
+                self.record(proxy, verdict)
+
+    async def probe(self, proxy: str) -> bool:
+        while proxy in self._inflight:
+            verdict = await asyncio.shield(self._inflight[proxy])
+            if verdict is not None:
+                return verdict
+
+        future = self._inflight[proxy] = asyncio.get_running_loop().create_future()
+        try:
+            if self._semaphore is None:
+                self._semaphore = asyncio.Semaphore(max(1, settings.PROXY_CHECK_CONCURRENCY))
+            async with self._semaphore:
+                started = monotonic()
+                ok = await check_proxy(proxy, quiet=True)
+                rtt = monotonic() - started
+            self.probes += 1
+            self.failed_probes += not ok
+            self.record(proxy, ok, rtt)
+            future.set_result(ok)
+            return ok
+        except asyncio.CancelledError:
+            future.set_result(None)
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(proxy, None)
+
+    async def check(self, proxy: str) -> bool:
+        healthy = self.is_healthy(proxy)
+        if healthy is None:
+            return await self.probe(proxy)
+        return healthy
+
+    def subscribe(self, proxy: str, callback: HealthCallback) -> None:
+        self._subscribers.setdefault(proxy, set()).add(callback)
+
+    def unsubscribe(self, proxy: str, callback: HealthCallback) -> None:
+        callbacks = self._subscribers.get(proxy)
+        if callbacks:
+            callbacks.discard(callback)
+            if not callbacks:
+                del self._subscribers[proxy]
+
+    def _targets(self) -> Iterable[str]:
+        targets = set(self._subscribers)
+        if settings.USE_PROXY and not self._shard_only:
+            targets.update(get_proxies(PROXIES_PATH))
+        return targets
+
+    async def _probe_round(self) -> None:
+        deadline = time() - settings.PROXY_HEALTH_INTERVAL / 2
+        due = [proxy for proxy in self._targets()
+               if proxy not in self._health or self._health[proxy].checked_at <= deadline]
+        await asyncio.gather(*(self.probe(proxy) for proxy in due), return_exceptions=True)
+
+    async def _loop(self) -> None:
+        while True:
+            await asyncio.sleep(settings.PROXY_HEALTH_INTERVAL * uniform(0.9, 1.1))
+            try:
+                await self._probe_round()
+            except Exception as e:
+                logger.error(f"Proxy health round failed: {str(e)}")
+
+    def start(self, shard_only: bool = False) -> None:
+        self._shard_only = shard_only
+        if settings.USE_PROXY and settings.PROXY_HEALTH_INTERVAL > 0 and not self._task:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def stats(self) -> Dict:
+        healthy = sum(entry.healthy is True for entry in self._health.values())
+        unhealthy = sum(entry.healthy is False for entry in self._health.values())
+        rtts = [entry.rtt for entry in self._health.values() if entry.rtt is not None]
+        return {
+            'tracked': len(self._health),
+            'healthy': healthy,
+            'unhealthy': unhealthy,
+            'subscribed': len(self._subscribers),
+            'probes': self.probes,
+            'failed_probes': self.failed_probes,
+            'cache_hits': self.cache_hits,
+            'changes': self.changes,
+            'avg_rtt': round(sum(rtts) / len(rtts), 3) if rtts else 0
+        }
+
+
+proxy_health = ProxyHealthMonitor()
+metrics.register_collector('proxy_health', proxy_health.stats)
@@ -1,13 +1,17 @@
 import os
+import asyncio
 import aiohttp
 from aiohttp_proxy import ProxyConnector
 from collections import Counter
-from python_socks import ProxyType
+import async_timeout
+from python_socks import ProxyType, ProxyTimeoutError
+from python_socks.async_.asyncio import Proxy as SocksProxy
 from shutil import copyfile
 from better_proxy import Proxy
 from bot.config import settings
 from bot.utils import logger
 from random import shuffle
+from typing import Callable
 
 PROXY_TYPES = {
     'socks5': ProxyType.SOCKS5,
@@ -15,6 +19,7 @@ PROXY_TYPES = {
     'http': ProxyType.HTTP,
     'https': ProxyType.HTTP
 }
+PROXY_CHECK_TIMEOUT = 15
 
 
 def get_proxy_type(proxy_type: str) -> ProxyType:
@@ -41,86 +46,210 @@ def to_pyrogram_proxy(proxy: Proxy) -> dict:
     }
 
 
+class ProxyInventory:
+    """proxies.txt parsed once per mtime, with a proxy→session count index and an ordered set of free proxies."""
+
+    def __init__(self, proxy_path: str):
+        self.proxy_path = proxy_path
+        self._proxies: dict[str, None] = {}
+        self._stat: tuple[int, int, int] | None = None
+        self._usage: Counter = Counter()
+        self._session_proxy: dict[str, str] = {}
+        self._free: dict[str, None] = {}
+        self._capacity = settings.SESSIONS_PER_PROXY
+        self.parses = 0
+
+    def _parse(self) -> None:
+        proxies: dict[str, None] = {}
+        seen_rows: set[str] = set()
+        invalid = 0
+        with open(file=self.proxy_path, encoding="utf-8-sig") as file:
+            for row in file:
+                row = row.strip()
+                if not row or row.startswith('type') or row in seen_rows:
+                    continue
+                seen_rows.add(row)
+                try:
+                    proxies[Proxy.from_str(proxy=row).as_url] = None
+                except ValueError:
+                    invalid += 1
+        if invalid:
+            logger.warning(f"Skipped {invalid} invalid lines in `{self.proxy_path}`")
+        self._proxies = proxies
+        self.parses += 1
+        self._rebuild_free()
+
+    def _rebuild_free(self) -> None:
+        self._capacity = settings.SESSIONS_PER_PROXY
+        self._free = {proxy: None for proxy in self._proxies if self._usage[proxy] < self._capacity}
+
+    def refresh(self) -> None:
+        if not os.path.isfile(self.proxy_path):
+            copyfile("bot/config/proxies-template.txt", self.proxy_path)
+        stat = os.stat(self.proxy_path)
+        key = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+        if key != self._stat:
+            self._parse()
+            self._stat = key
+        elif self._capacity != settings.SESSIONS_PER_PROXY:
+            self._rebuild_free()
+
+    def _update_free(self, proxy: str) -> None:
+        if proxy not in self._proxies:
+            return
+        if self._usage[proxy] < self._capacity:
+            self._free.setdefault(proxy, None)
+        else:
+            self._free.pop(proxy, None)
+
+    def assign(self, session_name: str, proxy: str | None) -> None:
+        previous = self._session_proxy.get(session_name)
+        if previous == proxy:
+            return
+        if previous:
+            self._usage[previous] -= 1
+            if self._usage[previous] <= 0:
+                del self._usage[previous]
+            self._update_free(previous)
+        if proxy:
+            self._session_proxy[session_name] = proxy
+            self._usage[proxy] += 1
+            self._update_free(proxy)
+        else:
+            self._session_proxy.pop(session_name, None)
+
+    def sync(self, accounts_config: dict) -> None:
+        for session_name, session_config in accounts_config.items():
+            self.assign(session_name, session_config.get('proxy'))
+        for session_name in [name for name in self._session_proxy if name not in accounts_config]:
+            self.assign(session_name, None)
+
+    def proxies(self) -> list[str]:
+        self.refresh()
+        return list(self._proxies)
+
+    def unused(self) -> list[str]:
+        self.refresh()
+        return list(self._free)
+
+    def next_unused(self) -> str | None:
+        self.refresh()
+        return next(iter(self._free), None)
+
+    def usage(self, proxy: str) -> int:
+        return self._usage.get(proxy, 0)
+
+
+_inventories: dict[str, ProxyInventory] = {}
+
+
+def get_proxy_inventory(proxy_path: str) -> ProxyInventory:
+    inventory = _inventories.get(proxy_path)
+    if inventory is None:
+        inventory = _inventories[proxy_path] = ProxyInventory(proxy_path)
+    return inventory
+
+
 def get_proxies(proxy_path: str) -> list[str]:
-    proxy_template_path = "bot/config/proxies-template.txt"
+    inventory = get_proxy_inventory(proxy_path)
+    if not settings.USE_PROXY:
+        inventory.refresh()
+        return []
+    return inventory.proxies()
 
-    if not os.path.isfile(proxy_path):
-        copyfile(proxy_template_path, proxy_path)
+
+def get_unused_proxies(accounts_config: dict, proxy_path: str) -> list[str]:
+    if not settings.USE_PROXY:
         return []
+    inventory = get_proxy_inventory(proxy_path)
+    inventory.sync(accounts_config)
+    return inventory.unused()
 
-    if settings.USE_PROXY:
-        with open(file=proxy_path, encoding="utf-8-sig") as file:
-            return list({Proxy.from_str(proxy=row.strip()).as_url for row in file if row.strip() and
-                         not row.strip().startswith('type')})
-    return []
 
+def to_socks_url(proxy: str) -> str:
+    return f"http://{proxy[len('https://'):]}" if proxy.startswith('https://') else proxy
 
-def get_unused_proxies(accounts_config: dict, proxy_path: str) -> list[str]:
-    proxies_count = Counter([v.get('proxy') for v in accounts_config.values() if v.get('proxy')])
-    all_proxies = get_proxies(proxy_path)
-    return [proxy for proxy in all_proxies if proxies_count.get(proxy, 0) < settings.SESSIONS_PER_PROXY]
 
+async def _tcp_probe(proxy: Proxy) -> None:
+    async with async_timeout.timeout(PROXY_CHECK_TIMEOUT):
+        _, writer = await asyncio.open_connection(proxy.host, proxy.port)
+    writer.close()
+
+
+async def _tunnel_probe(proxy: str) -> None:
+    sock = await SocksProxy.from_url(to_socks_url(proxy)).connect(
+        dest_host=settings.PROXY_PROBE_HOST, dest_port=443, timeout=PROXY_CHECK_TIMEOUT)
+    sock.close()
+
+
+async def _https_probe(proxy: str, warning: Callable, success: Callable) -> bool:
+    url = settings.PROXY_CHECK_URL
+    try:
+        proxy_conn = ProxyConnector.from_url(proxy)
+    except ValueError as e:
+        warning(f"Invalid proxy URL format: {proxy} - {str(e)}")
+        return False
+    except Exception as e:
+        warning(f"Error creating proxy connector: {proxy} - {str(e)}")
+        return False
+
+    try:
+        async with aiohttp.ClientSession(connector=proxy_conn,
+                                         timeout=aiohttp.ClientTimeout(PROXY_CHECK_TIMEOUT)) as session:
+            async with session.get(url) as response:
+                body = (await response.text()).strip()
+                if response.status == 200 and body:
+                    success(f"Successfully connected to proxy via {url}. Response: {body[:64]}")
+                    return True
+                warning(f"Invalid response from {url}: {response.status} {body[:64]}")
+                return False
+    except aiohttp.ClientError as e:
+        warning(f"Connection error with {url}: {str(e)}")
+        return False
+    except Exception as e:
+        warning(f"Proxy {proxy} didn't respond: {str(e)}")
+        return False
+    finally:
+        if proxy_conn and not proxy_conn.closed:
+            proxy_conn.close()
+
+
+async def check_proxy(proxy: str, quiet: bool = False, tier: int | None = None) -> bool:
+    """Tier 1 connects to the proxy, tier 2 opens a tunnel to PROXY_PROBE_HOST, tier 3 fetches PROXY_CHECK_URL."""
+    warning = logger.debug if quiet else logger.warning
+    success = logger.debug if quiet else logger.success
+    tier = tier or settings.PROXY_CHECK_TIER
 
-async def check_proxy(proxy: str) -> bool:
     if not proxy or not isinstance(proxy, str):
-        logger.warning(f"Invalid proxy format: {proxy}")
+        warning(f"Invalid proxy format: {proxy}")
         return False
-        
+
     try:
         if '://' not in proxy:
-            logger.warning(f"No protocol specified in proxy: {proxy}")
+            warning(f"No protocol specified in proxy: {proxy}")
             return False
-            
+
         protocol = proxy.split('://')[0].lower()
         if protocol not in PROXY_TYPES:
-            logger.warning(f"Unsupported proxy protocol: {protocol}")
-            return False
-            
-        urls = [
-            'https://api.ipify.org'
-        ]
-        
-        try:
-            proxy_conn = ProxyConnector.from_url(proxy)
-        except ValueError as e:
-            logger.warning(f"Invalid proxy URL format: {proxy} - {str(e)}")
+            warning(f"Unsupported proxy protocol: {protocol}")
             return False
-        except Exception as e:
-            logger.warning(f"Error creating proxy connector: {proxy} - {str(e)}")
-            return False
-    
-        try:
-            async with aiohttp.ClientSession(connector=proxy_conn, timeout=aiohttp.ClientTimeout(15)) as session:
-                for url in urls:
-                    try:
-                        async with session.get(url) as response:
-                            if response.status == 200:
-                                ip = await response.text()
-                                if ip and len(ip.split('.')) == 4:
-                                    logger.success(f"Successfully connected to proxy via {url}. IP: {ip}")
-                                    return True
-                                else:
-                                    logger.warning(f"Invalid IP response from {url}: {ip}")
-                                    continue
-                    except aiohttp.ClientError as e:
-                        logger.warning(f"Connection error with {url}: {str(e)}")
-                        continue
-                    except Exception as e:
-                        logger.warning(f"Unexpected error with {url}: {str(e)}")
-                        continue
-                
-                logger.warning(f"Proxy {proxy} failed all connection attempts")
-                return False
-                
-        except Exception as e:
-            logger.warning(f"Proxy {proxy} didn't respond: {str(e)}")
-            return False
-        finally:
-            if proxy_conn and not proxy_conn.closed:
-                proxy_conn.close()
-                
+
+        parsed = Proxy.from_str(proxy)
+        if tier >= 3:
+            return await _https_probe(proxy, warning, success)
+        if tier == 2:
+            await _tunnel_probe(proxy)
+            success(f"Proxy {parsed.host}:{parsed.port} opened a tunnel to {settings.PROXY_PROBE_HOST}")
+        else:
+            await _tcp_probe(parsed)
+            success(f"Proxy {parsed.host}:{parsed.port} accepted a TCP connection")
+        return True
+
+    except (asyncio.TimeoutError, ProxyTimeoutError):
+        warning(f"Proxy {proxy} didn't respond in {PROXY_CHECK_TIMEOUT}s")
+        return False
     except Exception as e:
-        logger.warning(f"Unexpected error checking proxy {proxy}: {str(e)}")
+        warning(f"Proxy {proxy} failed tier {tier} check: {e.__class__.__name__}: {str(e)}")
         return False
 
 
@@ -134,15 +263,60 @@ async def get_proxy_chain(path: str) -> tuple[str | None, str | None]:
         return None, None
 
 
-async def get_working_proxy(accounts_config: dict, current_proxy: str | None) -> str | None:
-    if current_proxy and await check_proxy(current_proxy):
+class ProxyVerdictCache:
+    def __init__(self, concurrency: int | None = None):
+        self._semaphore = asyncio.Semaphore(concurrency or settings.PROXY_CHECK_CONCURRENCY)
+        self._verdicts: dict[str, bool] = {}
+        self.probes = 0
+        self.saved_probes = 0
+
+    @property
+    def verdicts(self) -> dict[str, bool]:
+        return self._verdicts
+
+    async def _probe(self, proxy: str) -> bool:
+        async with self._semaphore:
+            self.probes += 1
+            verdict = await check_proxy(proxy)
+        self._verdicts[proxy] = verdict
+        return verdict
+
+    async def validate(self, proxies) -> dict[str, bool]:
+        pending = {proxy for proxy in proxies if proxy and proxy not in self._verdicts}
+        await asyncio.gather(*(self._probe(proxy) for proxy in pending))
+        return self._verdicts
+
+    def known_good(self, proxy: str) -> bool:
+        return self._verdicts.get(proxy, False)
+
+    async def check(self, proxy: str) -> bool:
+        if proxy in self._verdicts:
+            self.saved_probes += 1
+            return self._verdicts[proxy]
+        return await self._probe(proxy)
+
+
+async def get_working_proxy(accounts_config: dict | None, current_proxy: str | None,
+                            verdicts: ProxyVerdictCache | None = None,
+                            rank: Callable[[str], float] | None = None) -> str | None:
+    check = verdicts.check if verdicts else check_proxy
+    if current_proxy and await check(current_proxy):
         return current_proxy
 
     from bot.utils import PROXIES_PATH
-    unused_proxies = get_unused_proxies(accounts_config, PROXIES_PATH)
+    if not settings.USE_PROXY:
+        return None
+    inventory = get_proxy_inventory(PROXIES_PATH)
+    if accounts_config is not None:
+        inventory.sync(accounts_config)
+    unused_proxies = inventory.unused()
     shuffle(unused_proxies)
+    if rank:
+        unused_proxies.sort(key=rank)
+    if verdicts:
+        unused_proxies.sort(key=lambda proxy: not verdicts.known_good(proxy))
     for proxy in unused_proxies:
-        if await check_proxy(proxy):
+        if await check(proxy):
             return proxy
 
     return None
@@ -0,0 +1,106 @@
+import asyncio
+from time import monotonic
+from typing import Optional, Dict
+
+from bot.config import settings
+from bot.utils.metrics import metrics
+
+LEVELS = ('global', 'proxy', 'session')
+
+
+class TokenBucket:
+    def __init__(self, rate: float):
+        self.max_rate = rate
+        self.min_rate = rate * settings.RATE_AIMD_MIN_FRACTION
+        self.rate = rate
+        self.capacity = max(float(settings.RATE_LIMIT_BURST), rate)
+        self.tokens = self.capacity
+        self._updated = monotonic()
+
+    def reserve(self) -> float:
+        if self.max_rate <= 0:
+            return 0.0
+        now = monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        self.tokens -= 1
+        return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def increase(self) -> None:
+        self.rate = min(self.max_rate, self.rate + settings.RATE_AIMD_INCREASE)
+
+    def decrease(self) -> None:
+        if self.max_rate <= 0:
+            return
+        self.rate = max(self.min_rate, self.rate * settings.RATE_AIMD_DECREASE)
+
+
+class RateGovernor:
+    def __init__(self):
+        self._global: Optional[TokenBucket] = None
+        self._proxies: Dict[str, TokenBucket] = {}
+        self._sessions: Dict[str, TokenBucket] = {}
+        self.requests = 0
+        self.waits = 0
+        self.throttles = dict.fromkeys(LEVELS, 0)
+        self.wait_seconds = dict.fromkeys(LEVELS, 0.0)
+
+    def _buckets(self, session_name: str, proxy: Optional[str]) -> Dict[str, TokenBucket]:
+        if self._global is None:
+            self._global = TokenBucket(settings.RATE_LIMIT_GLOBAL)
+        buckets = {'global': self._global}
+        if proxy:
+            if proxy not in self._proxies:
+                self._proxies[proxy] = TokenBucket(settings.RATE_LIMIT_PROXY)
+            buckets['proxy'] = self._proxies[proxy]
+        if session_name not in self._sessions:
+            self._sessions[session_name] = TokenBucket(settings.RATE_LIMIT_SESSION)
+        buckets['session'] = self._sessions[session_name]
+        return buckets
+
+    async def acquire(self, session_name: str, proxy: Optional[str]) -> float:
+        if not settings.RATE_GOVERNOR:
+            return 0.0
+
+        self.requests += 1
+        delays = {level: bucket.reserve() for level, bucket in self._buckets(session_name, proxy).items()}
+        level = max(delays, key=delays.get)
+        delay = delays[level]
+        if delay > 0:
+            self.waits += 1
+            self.wait_seconds[level] += delay
+            await asyncio.sleep(delay)
+        return delay
+
+    def feedback(self, session_name: str, proxy: Optional[str], status: int, exceeded: bool = False) -> None:
+        if not settings.RATE_GOVERNOR:
+            return
+
+        buckets = self._buckets(session_name, proxy)
+        if exceeded:
+            level = 'session'
+        elif status == 429:
+            level = 'proxy' if 'proxy' in buckets else 'global'
+        elif status >= 500:
+            level = 'global'
+        else:
+            if status < 400:
+                for bucket in buckets.values():
+                    bucket.increase()
+            return
+
+        self.throttles[level] += 1
+        buckets[level].decrease()
+
+    def stats(self) -> Dict:
+        return {
+            'requests': self.requests,
+            'waits': self.waits,
+            'wait_seconds': dict(self.wait_seconds),
+            'throttles': dict(self.throttles),
+            'global_rate': self._global.rate if self._global else settings.RATE_LIMIT_GLOBAL
+        }
+
+
+rate_governor = RateGovernor()
+metrics.register_collector('rate_governor', rate_governor.stats)
@@ -0,0 +1,119 @@
+import asyncio
+import re
+from time import monotonic
+from typing import Optional, Dict, Any, Callable, Awaitable, Tuple
+from urllib.parse import urlsplit
+from weakref import WeakSet
+
+from bot.utils.metrics import metrics
+
+CACHE_TTLS = {
+    '/users/stats': 20,
+    '/pools/user-pool': 20,
+    '/proposals': 600,
+    '/proposals/{id}/votes': 600,
+    '/users/check-x': 600,
+    '/users/check-voted': 600,
+}
+
+INVALIDATIONS = {
+    '/proposals/{id}/vote': ('/proposals', '/proposals/{id}/votes', '/users/stats', '/users/check-voted'),
+    '/blocks/start-mining': ('/users/stats',),
+    '/pools/join-invoice': ('/pools/user-pool', '/users/stats'),
+    '/pools/leave': ('/pools/user-pool', '/users/stats'),
+}
+
+
+def normalize_endpoint(url: str) -> str:
+    path = urlsplit(url).path
+    if '/api/v1' in path:
+        path = path.split('/api/v1', 1)[1]
+    return re.sub(r'/\d+(?=/|$)', '/{id}', path) or '/'
+
+
+_caches: 'WeakSet[ResponseCache]' = WeakSet()
+_RETRY = object()
+
+
+class ResponseCache:
+    def __init__(self):
+        _caches.add(self)
+        self._entries: Dict[str, Tuple[Any, float, str]] = {}
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._created = monotonic()
+        self.hits = 0
+        self.misses = 0
+        self.merged = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def ttl_for(url: str) -> Optional[int]:
+        return CACHE_TTLS.get(normalize_endpoint(url))
+
+    async def fetch(self, url: str, ttl: float, request: Callable[[], Awaitable[Any]]) -> Any:
+        entry = self._entries.get(url)
+        if entry and entry[1] > monotonic():
+            self.hits += 1
+            return entry[0]
+
+        if url in self._inflight:
+            self.merged += 1
+            while url in self._inflight:
+                result = await asyncio.shield(self._inflight[url])
+                if result is not _RETRY:
+                    return result
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[url] = future
+        try:
+            result = await request()
+        except asyncio.CancelledError:
+            future.set_result(_RETRY)
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(url, None)
+        if result is not None:
+            self._entries[url] = (result, monotonic() + ttl, normalize_endpoint(url))
+        future.set_result(result)
+        return result
+
+    def invalidate(self, url: str) -> None:
+        targets = INVALIDATIONS.get(normalize_endpoint(url))
+        if not targets:
+            return
+        for key in [key for key, entry in self._entries.items() if entry[2] in targets]:
+            del self._entries[key]
+            self.invalidations += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> Dict:
+        hours = max((monotonic() - self._created) / 3600, 1 / 60)
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'merged': self.merged,
+            'invalidations': self.invalidations,
+            'saved_per_hour': round((self.hits + self.merged) / hours, 1)
+        }
+
+
+def collect_stats() -> Dict:
+    totals = {'caches': 0, 'hits': 0, 'misses': 0, 'merged': 0, 'invalidations': 0, 'entries': 0}
+    for cache in list(_caches):
+        totals['caches'] += 1
+        totals['hits'] += cache.hits
+        totals['misses'] += cache.misses
+        totals['merged'] += cache.merged
+        totals['invalidations'] += cache.invalidations
+        totals['entries'] += len(cache._entries)
+    return totals
+
+
+metrics.register_collector('response_cache', collect_stats)
@@ -0,0 +1,149 @@
+import asyncio
+import json
+import os
+import shutil
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, asdict
+from time import time
+from typing import Dict, List, Optional
+
+import async_timeout
+from better_proxy import Proxy
+
+from bot.config import settings
+from bot.exceptions import InvalidSession
+from bot.utils import logger, config_utils, CONFIG_PATH, SESSIONS_PATH
+
+QUARANTINE_PATH = os.path.join(SESSIONS_PATH, 'quarantine')
+REPORT_PATH = os.path.join(os.path.dirname(CONFIG_PATH), 'preflight_report.json')
+FATAL_STATUSES = ('corrupt', 'unknown_schema', 'no_auth_key', 'bad_dc', 'unauthorized', 'banned')
+
+
+@dataclass
+class SessionReport:
+    session: str
+    path: str
+    backend: Optional[str] = None
+    dc_id: Optional[int] = None
+    user_id: Optional[int] = None
+    status: str = 'ok'
+    detail: str = ''
+
+    @property
+    def fatal(self) -> bool:
+        return self.status in FATAL_STATUSES
+
+
+def inspect_session(session: str) -> SessionReport:
+    report = SessionReport(session=os.path.basename(session), path=f"{session}.session")
+    try:
+        with sqlite3.connect(f"file:{report.path}?mode=ro", uri=True, timeout=5) as db:
+            columns = {row[1] for row in db.execute('PRAGMA table_info(sessions)')}
+            if 'server_address' in columns:
+                report.backend = 'telethon'
+                row = db.execute('SELECT dc_id, auth_key FROM sessions LIMIT 1').fetchone()
+            elif 'user_id' in columns:
+                report.backend = 'pyrogram'
+                row = db.execute('SELECT dc_id, auth_key, user_id FROM sessions LIMIT 1').fetchone()
+            else:
+                report.status = 'unknown_schema'
+                return report
+    except sqlite3.DatabaseError as e:
+        report.status = 'busy' if 'locked' in str(e) else 'corrupt'
+        report.detail = str(e)
+        return report
+
+    if not row:
+        report.status = 'no_auth_key'
+        return report
+    report.dc_id = row[0]
+    if report.backend == 'pyrogram':
+        report.user_id = row[2]
+    if not row[1]:
+        report.status = 'no_auth_key'
+    elif report.dc_id not in range(1, 6):
+        report.status = 'bad_dc'
+    return report
+
+
+async def check_authorization(report: SessionReport, accounts_config: Dict, semaphore: asyncio.Semaphore) -> None:
+    from bot.utils.universal_telegram_client import UniversalTelegramClient
+
+    session_config = accounts_config.get(report.session, {})
+    client_params = config_utils.get_client_params(report.path[:-len('.session')], session_config, report.backend)
+    proxy = session_config.get('proxy')
+    if settings.USE_PROXY and not proxy:
+        report.detail = 'get_me skipped: no proxy assigned'
+        return
+
+    async with semaphore:
+        client = UniversalTelegramClient(**client_params)
+        try:
+            if proxy:
+                client.set_proxy(Proxy.from_str(proxy))
+            async with async_timeout.timeout(60):
+                me = await client.get_me()
+            report.user_id = me.id
+        except InvalidSession as e:
+            report.status = 'banned' if 'banned' in str(e) else 'unauthorized'
+        except Exception as e:
+            report.detail = f"get_me failed: {e.__class__.__name__}: {str(e)}"
+        finally:
+            await client.close()
+
+
+def quarantine(report: SessionReport) -> None:
+    os.makedirs(QUARANTINE_PATH, exist_ok=True)
+    base = report.path[:-len('.session')]
+    for suffix in ('.session', '.session-journal', '.json'):
+        if os.path.isfile(f"{base}{suffix}"):
+            shutil.move(f"{base}{suffix}", os.path.join(QUARANTINE_PATH, f"{report.session}{suffix}"))
+
+
+def write_report(reports: List[SessionReport], started: float) -> None:
+    summary: Dict[str, int] = {}
+    for report in reports:
+        summary[report.status] = summary.get(report.status, 0) + 1
+    tmp_path = f"{REPORT_PATH}.tmp"
+    with open(tmp_path, 'w') as file:
+        json.dump({
+            'timestamp': int(time()),
+            'duration': round(time() - started, 2),
+            'summary': summary,
+            'sessions': [asdict(report) for report in reports]
+        }, file, indent=2)
+    os.replace(tmp_path, REPORT_PATH)
+
+
+async def run_preflight(session_paths: List[str], accounts_config: Dict,
+                        check_auth: Optional[bool] = None) -> List[SessionReport]:
+    started = time()
+    check_auth = settings.PREFLIGHT_GET_ME if check_auth is None else check_auth
+    loop = asyncio.get_running_loop()
+    with ThreadPoolExecutor(max_workers=min(32, max(1, len(session_paths)))) as executor:
+        reports = await asyncio.gather(*(loop.run_in_executor(executor, inspect_session, session)
+                                         for session in session_paths))
+
+    if check_auth:
+        semaphore = asyncio.Semaphore(max(1, settings.PREFLIGHT_CONCURRENCY))
+        await asyncio.gather(*(check_authorization(report, accounts_config, semaphore)
+                               for report in reports if not report.fatal))
+
+    for report in reports:
+        if report.fatal:
+            logger.warning(f"{report.session} | Preflight: {report.status} {report.detail} | Moved to quarantine")
+            try:
+                quarantine(report)
+            except OSError as e:
+                logger.error(f"{report.session} | Failed to quarantine session: {str(e)}")
+
+    try:
+        write_report(reports, started)
+    except OSError as e:
+        logger.warning(f"Failed to write preflight report: {str(e)}")
+
+    broken = sum(report.fatal for report in reports)
+    logger.info(f"Preflight checked {len(reports)} sessions in {time() - started:.1f}s | "
+                f"{len(reports) - broken} ok | {broken} quarantined | Report: {REPORT_PATH}")
+    return reports
@@ -0,0 +1,94 @@
+import json
+import os
+from dataclasses import dataclass, asdict
+from typing import Dict, List, Optional
+
+from bot.utils import logger, CONFIG_PATH, SESSIONS_PATH
+from bot.utils.session_preflight import inspect_session
+
+REGISTRY_PATH = os.path.join(os.path.dirname(CONFIG_PATH), 'session_registry.json')
+SUBFOLDERS = ('', 'telethon', 'pyrogram')
+
+
+@dataclass
+class SessionEntry:
+    session: str
+    mtime: float
+    size: int
+    backend: Optional[str] = None
+    user_id: Optional[int] = None
+    dc_id: Optional[int] = None
+
+
+class SessionRegistry:
+    """Index of session files with their backend, refreshed only for files whose mtime or size changed."""
+
+    def __init__(self, path: str = REGISTRY_PATH):
+        self._path = path
+        self._entries: Optional[Dict[str, SessionEntry]] = None
+        self.inspected = 0
+
+    def _load(self) -> Dict[str, SessionEntry]:
+        if self._entries is None:
+            self._entries = {}
+            try:
+                with open(self._path) as file:
+                    for item in json.load(file).get('sessions', []):
+                        self._entries[item['session']] = SessionEntry(**item)
+            except FileNotFoundError:
+                pass
+            except (OSError, ValueError, TypeError, KeyError) as e:
+                logger.warning(f"Session registry is unreadable, rebuilding it: {str(e)}")
+        return self._entries
+
+    def _save(self) -> None:
+        try:
+            tmp_path = f"{self._path}.tmp"
+            with open(tmp_path, 'w') as file:
+                json.dump({'sessions': [asdict(entry) for entry in self._entries.values()]}, file)
+            os.replace(tmp_path, self._path)
+        except OSError as e:
+            logger.warning(f"Failed to save session registry: {str(e)}")
+
+    def scan(self, sessions_folder: str = SESSIONS_PATH) -> List[str]:
+        entries = self._load()
+        seen, changed = set(), False
+        for subfolder in SUBFOLDERS:
+            try:
+                files = os.scandir(os.path.join(sessions_folder, subfolder))
+            except FileNotFoundError:
+                continue
+            with files:
+                for file in files:
+                    if not file.name.endswith('.session') or not file.is_file():
+                        continue
+                    session = file.path[:-len('.session')]
+                    stat = file.stat()
+                    seen.add(session)
+                    entry = entries.get(session)
+                    if entry and entry.mtime == stat.st_mtime and entry.size == stat.st_size:
+                        continue
+                    report = inspect_session(session)
+                    self.inspected += 1
+                    entries[session] = SessionEntry(session, stat.st_mtime, stat.st_size,
+                                                    report.backend, report.user_id, report.dc_id)
+                    changed = True
+
+        prefix = os.path.join(sessions_folder, '')
+        for session in [session for session in entries if session.startswith(prefix) and session not in seen]:
+            del entries[session]
+            changed = True
+
+        if changed:
+            self._save()
+        return sorted(seen)
+
+    def get(self, session: str) -> Optional[SessionEntry]:
+        return self._load().get(session)
+
+    def backend(self, session: str) -> Optional[str]:
+        entry = self.get(session)
+        return entry.backend if entry else None
+
+
+session_registry = SessionRegistry()
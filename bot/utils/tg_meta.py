@@ -0,0 +1,131 @@
+import os
+import sqlite3
+from typing import Dict, Optional, Set, Tuple
+
+from bot.config import settings
+from bot.utils import logger, CONFIG_PATH
+from bot.utils.metrics import metrics
+
+TG_META_PATH = os.path.join(os.path.dirname(CONFIG_PATH), 'tg_meta.sqlite')
+
+START_SENT = 'start'
+JOINED_CHAT = 'chat'
+JOINED_CHANNEL = 'channel'
+STARTED_POOL = 'pool'
+
+
+class TelegramMetaCache:
+    """On-disk cache of per-session Telegram state that otherwise costs RPCs to rediscover."""
+
+    def __init__(self, path: str = TG_META_PATH):
+        self._path = path
+        self._db: Optional[sqlite3.Connection] = None
+        self._peers: Dict[str, Dict[str, Tuple[int, int]]] = {}
+        self._flags: Dict[str, Set[Tuple[str, str]]] = {}
+        self.avoided: Dict[str, int] = {}
+        self.refreshes = 0
+
+    @property
+    def enabled(self) -> bool:
+        return settings.TG_META_CACHE
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._db is None:
+            self._db = sqlite3.connect(self._path, timeout=10, isolation_level=None)
+            self._db.execute('PRAGMA journal_mode=WAL')
+            self._db.execute(
+                'CREATE TABLE IF NOT EXISTS peers (session TEXT, username TEXT, peer_id INTEGER, '
+                'access_hash INTEGER, PRIMARY KEY (session, username))'
+            )
+            self._db.execute(
+                'CREATE TABLE IF NOT EXISTS flags (session TEXT, kind TEXT, name TEXT, '
+                'PRIMARY KEY (session, kind, name))'
+            )
+        return self._db
+
+    def _load(self, session_name: str) -> None:
+        if session_name in self._peers:
+            return
+        db = self._connect()
+        self._peers[session_name] = {
+            username: (peer_id, access_hash) for username, peer_id, access_hash in
+            db.execute('SELECT username, peer_id, access_hash FROM peers WHERE session = ?', (session_name,))
+        }
+        self._flags[session_name] = set(
+            db.execute('SELECT kind, name FROM flags WHERE session = ?', (session_name,))
+        )
+
+    def _execute(self, query: str, params: tuple) -> None:
+        try:
+            self._connect().execute(query, params)
+        except sqlite3.Error as e:
+            logger.warning(f"Telegram metadata cache write failed: {str(e)}")
+
+    @staticmethod
+    def _key(name: str) -> str:
+        return name.lower().lstrip('@')
+
+    def get_peer(self, session_name: str, username: str) -> Optional[Tuple[int, int]]:
+        if not self.enabled:
+            return None
+        self._load(session_name)
+        return self._peers[session_name].get(self._key(username))
+
+    def set_peer(self, session_name: str, username: str, peer_id: int, access_hash: int) -> None:
+        if not self.enabled:
+            return
+        self._load(session_name)
+        self._peers[session_name][self._key(username)] = (peer_id, access_hash)
+        self._execute('INSERT OR REPLACE INTO peers VALUES (?, ?, ?, ?)',
+                      (session_name, self._key(username), peer_id, access_hash))
+
+    def forget_peer(self, session_name: str, username: str) -> None:
+        if not self.enabled:
+            return
+        self._load(session_name)
+        self._peers[session_name].pop(self._key(username), None)
+        self._execute('DELETE FROM peers WHERE session = ? AND username = ?', (session_name, self._key(username)))
+
+    def has(self, session_name: str, kind: str, name: str) -> bool:
+        if not self.enabled:
+            return False
+        self._load(session_name)
+        return (kind, self._key(name)) in self._flags[session_name]
+
+    def mark(self, session_name: str, kind: str, name: str) -> None:
+        if not self.enabled or self.has(session_name, kind, name):
+            return
+        self._flags[session_name].add((kind, self._key(name)))
+        self._execute('INSERT OR IGNORE INTO flags VALUES (?, ?, ?)', (session_name, kind, self._key(name)))
+
+    def unmark(self, session_name: str, kind: str, name: str) -> None:
+        if not self.has(session_name, kind, name):
+            return
+        self._flags[session_name].discard((kind, self._key(name)))
+        self._execute('DELETE FROM flags WHERE session = ? AND kind = ? AND name = ?',
+                      (session_name, kind, self._key(name)))
+
+    def forget_session(self, session_name: str) -> None:
+        if not self.enabled:
+            return
+        self._peers.pop(session_name, None)
+        self._flags.pop(session_name, None)
+        self._execute('DELETE FROM peers WHERE session = ?', (session_name,))
+        self._execute('DELETE FROM flags WHERE session = ?', (session_name,))
+
+    def avoid(self, kind: str, count: int = 1) -> int:
+        self.avoided[kind] = self.avoided.get(kind, 0) + count
+        return count
+
+    def stats(self) -> Dict:
+        total = sum(self.avoided.values())
+        return {
+            'rpcs_avoided': dict(self.avoided),
+            'rpcs_avoided_total': total,
+            'webview_refreshes': self.refreshes,
+            'rpcs_avoided_per_refresh': round(total / self.refreshes, 2) if self.refreshes else 0
+        }
+
+
+tg_meta = TelegramMetaCache()
+metrics.register_collector('tg_meta', tg_meta.stats)
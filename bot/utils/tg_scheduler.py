@@ -0,0 +1,136 @@
+import asyncio
+from contextlib import asynccontextmanager
+from time import monotonic
+from typing import Dict, Optional
+
+from pyrogram.errors import FloodWait
+from telethon.errors import FloodWaitError
+
+from bot.config import settings
+from bot.utils import logger
+from bot.utils.metrics import metrics, Histogram
+
+MAX_INTERVAL = 30.0
+RELAX_FACTOR = 0.9
+KEY_PENALTY = 2.0
+GLOBAL_PENALTY = 1.2
+FLOOD_SLEEP_THRESHOLD = 60
+
+
+def flood_wait_seconds(error: BaseException) -> Optional[int]:
+    if isinstance(error, FloodWaitError):
+        return error.seconds
+    if isinstance(error, FloodWait):
+        return error.value
+    return None
+
+
+class Pacer:
+    """Spaces RPC starts at a smoothed interval that widens on FloodWait and slowly recovers."""
+
+    def __init__(self, rate: float, concurrency: int):
+        self.base_interval = 1 / rate if rate > 0 else 0.0
+        self.interval = self.base_interval
+        self.semaphore = asyncio.Semaphore(max(1, concurrency))
+        self._next = 0.0
+
+    def reserve(self) -> float:
+        now = monotonic()
+        slot = max(now, self._next)
+        self._next = slot + self.interval
+        return slot - now
+
+    def penalize(self, seconds: float, factor: float = KEY_PENALTY) -> None:
+        floor = self.base_interval or 0.1
+        self.interval = min(MAX_INTERVAL, max(self.interval * factor, floor, seconds / 60))
+
+    def relax(self) -> None:
+        if self.interval > self.base_interval:
+            self.interval = max(self.base_interval, self.interval * RELAX_FACTOR)
+
+
+class TelegramRpcScheduler:
+    def __init__(self):
+        self._global: Optional[Pacer] = None
+        self._keys: Dict[str, Pacer] = {}
+        self.queued = 0
+        self.max_queued = 0
+        self.calls = 0
+        self.flood_waits = 0
+        self.flood_wait_seconds = 0
+        self.wait = Histogram()
+        self.wait_by_kind: Dict[str, float] = {}
+
+    def _pacers(self, key: str):
+        if self._global is None:
+            self._global = Pacer(settings.TG_RPC_RATE, settings.TG_RPC_CONCURRENCY)
+        if key not in self._keys:
+            self._keys[key] = Pacer(settings.TG_RPC_DC_RATE, settings.TG_RPC_DC_CONCURRENCY)
+        return self._global, self._keys[key]
+
+    @asynccontextmanager
+    async def slot(self, key: str, kind: str = 'rpc'):
+        if not settings.TG_RPC_SCHEDULER:
+            yield
+            return
+
+        global_pacer, key_pacer = self._pacers(key)
+        queued_at = monotonic()
+        self.queued += 1
+        self.max_queued = max(self.max_queued, self.queued)
+        try:
+            delay = max(global_pacer.reserve(), key_pacer.reserve())
+            if delay > 0:
+                await asyncio.sleep(delay)
+            await global_pacer.semaphore.acquire()
+            try:
+                await key_pacer.semaphore.acquire()
+            except BaseException:
+                global_pacer.semaphore.release()
+                raise
+        finally:
+            self.queued -= 1
+
+        waited = monotonic() - queued_at
+        self.calls += 1
+        self.wait.observe(waited)
+        self.wait_by_kind[kind] = self.wait_by_kind.get(kind, 0.0) + waited
+        try:
+            yield
+        except BaseException as error:
+            seconds = flood_wait_seconds(error)
+            if seconds is not None:
+                self._on_flood_wait(key, seconds)
+            raise
+        else:
+            global_pacer.relax()
+            key_pacer.relax()
+        finally:
+            key_pacer.semaphore.release()
+            global_pacer.semaphore.release()
+
+    def _on_flood_wait(self, key: str, seconds: int) -> None:
+        global_pacer, key_pacer = self._pacers(key)
+        self.flood_waits += 1
+        self.flood_wait_seconds += seconds
+        key_pacer.penalize(seconds)
+        global_pacer.penalize(seconds / len(self._keys), GLOBAL_PENALTY)
+        logger.debug(f"Telegram RPC pacing for {key} slowed to one call per {key_pacer.interval:.2f}s")
+
+    def stats(self) -> Dict:
+        return {
+            'calls': self.calls,
+            'queue_depth': self.queued,
+            'max_queue_depth': self.max_queued,
+            'wait_seconds_total': round(self.wait.total, 3),
+            'wait_seconds_avg': round(self.wait.total / self.wait.count, 3) if self.wait.count else 0,
+            'wait_seconds_by_kind': {kind: round(value, 3) for kind, value in self.wait_by_kind.items()},
+            'flood_waits': self.flood_waits,
+            'flood_wait_seconds': self.flood_wait_seconds,
+            'global_interval': self._global.interval if self._global else 0,
+            'dc_interval': {key: round(pacer.interval, 3) for key, pacer in self._keys.items()}
+        }
+
+
+tg_scheduler = TelegramRpcScheduler()
+metrics.register_collector('tg_scheduler', tg_scheduler.stats)
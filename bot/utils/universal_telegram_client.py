@@ -25,6 +25,9 @@ from bot.config import settings
 from bot.exceptions import InvalidSession
 from bot.utils.proxy_utils import to_pyrogram_proxy, to_telethon_proxy
 from bot.utils import logger, log_error, AsyncInterProcessLock, CONFIG_PATH, first_run
+from bot.utils.live_clients import live_clients
+from bot.utils.tg_meta import tg_meta, START_SENT, JOINED_CHAT, JOINED_CHANNEL, STARTED_POOL
+from bot.utils.tg_scheduler import tg_scheduler, flood_wait_seconds, FLOOD_SLEEP_THRESHOLD
 
 
 class UniversalTelegramClient:
@@ -34,6 +37,7 @@ class UniversalTelegramClient:
         self.proxy = None
         self.is_first_run = True
         self.is_pyrogram: bool = False
+        self._backend = client_params.pop('backend', None)
         self._client_params = client_params
         self._init_client()
         self.default_val = 'ref_b2434667eb27d01f'
@@ -41,23 +45,88 @@ class UniversalTelegramClient:
             os.path.join(os.path.dirname(CONFIG_PATH), 'lock_files', f"{self.session_name}.lock"))
         self._webview_data = None
         self.ref_id = None  # Будет установлен позже
+        self.in_use = False
 
     def _init_client(self):
+        if self._backend == 'pyrogram':
+            self._init_pyrogram_client()
+            return
         try:
-            self.client = TelegramClient(connection=ConnectionTcpAbridged, **self._client_params)
+            flood_params = {'flood_sleep_threshold': 0} if settings.TG_RPC_SCHEDULER else {}
+            self.client = TelegramClient(connection=ConnectionTcpAbridged, **self._client_params, **flood_params)
             self.client.parse_mode = None
             self.client.no_updates = True
             self.is_pyrogram = False
             self.session_name, _ = os.path.splitext(os.path.basename(self.client.session.filename))
         except OperationalError:
-            session_name = self._client_params.pop('session')
-            self._client_params.pop('system_lang_code')
-            self._client_params['name'] = session_name
-            self.client = PyrogramClient(**self._client_params)
-            self.client.no_updates = True
-            self.client.run = lambda *args, **kwargs: None
-            self.is_pyrogram = True
-            self.session_name, _ = os.path.splitext(os.path.basename(self.client.name))
+            self._init_pyrogram_client()
+
+    def _init_pyrogram_client(self):
+        session_name = self._client_params.pop('session')
+        self._client_params.pop('system_lang_code', None)
+        self._client_params['name'] = session_name
+        flood_params = {'sleep_threshold': 0} if settings.TG_RPC_SCHEDULER else {}
+        self.client = PyrogramClient(**self._client_params, **flood_params)
+        self.client.no_updates = True
+        self.client.run = lambda *args, **kwargs: None
+        self.is_pyrogram = True
+        self.session_name, _ = os.path.splitext(os.path.basename(self.client.name))
+
+    @property
+    def rpc_key(self) -> str:
+        api_id = self._client_params.get('api_id') or getattr(self._client_params.get('api'), 'api_id', 0)
+        session = getattr(self.client, 'session', None)
+        return f"{api_id}_dc{getattr(session, 'dc_id', 0) or 0}"
+
+    async def _call(self, request, kind: str = 'rpc'):
+        while True:
+            try:
+                async with tg_scheduler.slot(self.rpc_key, kind):
+                    return await request()
+            except (FloodWaitError, FloodWait) as error:
+                seconds = flood_wait_seconds(error)
+                if not settings.TG_RPC_SCHEDULER or seconds > FLOOD_SLEEP_THRESHOLD:
+                    raise
+                logger.warning(f"<ly>{self.session_name}</ly> | FloodWait on {kind}. Waiting {seconds}s")
+                await asyncio.sleep(seconds + 1)
+
+    def is_connected(self) -> bool:
+        return self.client.is_connected if self.is_pyrogram else self.client.is_connected()
+
+    async def _acquire_connection(self) -> None:
+        self.in_use = True
+        reused = self.is_connected()
+        if not reused:
+            try:
+                await self._call(lambda: self.client.connect(), 'connect')
+            except Exception:
+                self.in_use = False
+                raise
+        if settings.TG_PERSISTENT_CONNECTIONS:
+            live_clients.touch(self, reused)
+
+    async def _release_connection(self, penalty: bool = True) -> None:
+        self.in_use = False
+        if settings.TG_PERSISTENT_CONNECTIONS and self.is_connected():
+            return
+        live_clients.discard(self)
+        if self.is_connected():
+            await self.client.disconnect()
+            if penalty:
+                await asyncio.sleep(15)
+
+    async def disconnect_idle(self) -> None:
+        if self.in_use or not self.is_connected():
+            return
+        try:
+            await self.client.disconnect()
+        except Exception as e:
+            logger.warning(f"<ly>{self.session_name}</ly> | Failed to close idle connection: {e}")
+
+    async def close(self) -> None:
+        live_clients.discard(self)
+        self.in_use = False
+        await self.disconnect_idle()
 
     def set_proxy(self, proxy: Proxy):
         if not self.is_pyrogram:
@@ -69,11 +138,13 @@ class UniversalTelegramClient:
 
     async def get_app_webview_url(self, bot_username: str, bot_shortname: str, default_val: str) -> str:
         self.is_first_run = await first_run.check_is_first_run(self.session_name)
+        tg_meta.refreshes += 1
         return await self._pyrogram_get_app_webview_url(bot_username, bot_shortname, default_val) if self.is_pyrogram \
             else await self._telethon_get_app_webview_url(bot_username, bot_shortname, default_val)
 
     async def get_webview_url(self, bot_username: str, bot_url: str, default_val: str) -> str:
         self.is_first_run = await first_run.check_is_first_run(self.session_name)
+        tg_meta.refreshes += 1
         return await self._pyrogram_get_webview_url(bot_username, bot_url, default_val) if self.is_pyrogram \
             else await self._telethon_get_webview_url(bot_username, bot_url, default_val)
 
@@ -85,11 +156,71 @@ class UniversalTelegramClient:
         return await self._pyrogram_update_profile(first_name=first_name, last_name=last_name, about=about) if self.is_pyrogram \
             else await self._telethon_update_profile(first_name=first_name, last_name=last_name, about=about)
 
+    async def get_me(self):
+        async with self.lock:
+            try:
+                await self._acquire_connection()
+                me = await self._call(lambda: self.client.get_me(), 'preflight')
+                if me is None:
+                    raise InvalidSession(f"{self.session_name}: User is unauthorized")
+                return me
+            except (UnauthorizedError, AuthKeyUnregisteredError, Unauthorized, AuthKeyUnregistered):
+                raise InvalidSession(f"{self.session_name}: User is unauthorized")
+            except (UserDeactivatedError, UserDeactivatedBanError, PhoneNumberBannedError,
+                    UserDeactivated, UserDeactivatedBan, PhoneNumberBanned):
+                raise InvalidSession(f"{self.session_name}: User is banned")
+            finally:
+                await self._release_connection(penalty=False)
+
+    def _cached_bot_peer(self, bot_username: str):
+        cached = tg_meta.get_peer(self.session_name, bot_username)
+        if not cached:
+            return None
+        tg_meta.avoid('resolve_peer')
+        user_id, access_hash = cached
+        return ptypes.InputPeerUser(user_id=user_id, access_hash=access_hash) if self.is_pyrogram \
+            else raw.InputPeerUser(user_id=user_id, access_hash=access_hash)
+
+    def _forget_bot_peer(self, bot_username: str) -> None:
+        logger.warning(f"<ly>{self.session_name}</ly> | Cached peer for {bot_username} rejected, resolving it again")
+        tg_meta.forget_peer(self.session_name, bot_username)
+        self._webview_data = None
+
+    async def _telethon_scan_start_message(self, bot_username: str) -> bool:
+        if tg_meta.has(self.session_name, START_SENT, bot_username):
+            tg_meta.avoid('start_scan')
+            return True
+        async def scan() -> bool:
+            async for message in self.client.iter_messages(bot_username):
+                if r'/start' in message.text:
+                    return True
+            return False
+
+        return await self._call(scan, 'auth')
+
+    async def _pyrogram_scan_start_message(self, bot_username: str) -> bool:
+        if tg_meta.has(self.session_name, START_SENT, bot_username):
+            tg_meta.avoid('start_scan')
+            return True
+        async def scan() -> bool:
+            async for message in self.client.get_chat_history(bot_username):
+                if message and message.text and r'/start' in message.text:
+                    return True
+            return False
+
+        try:
+            return await self._call(scan, 'auth')
+        except Exception:
+            return False
+
     async def _telethon_initialize_webview_data(self, bot_username: str, bot_shortname: str = None):
         if not self._webview_data:
             while True:
                 try:
-                    peer = await self.client.get_input_entity(bot_username)
+                    peer = self._cached_bot_peer(bot_username)
+                    if not peer:
+                        peer = await self._call(lambda: self.client.get_input_entity(bot_username), 'auth')
+                        tg_meta.set_peer(self.session_name, bot_username, peer.user_id, peer.access_hash)
                     bot_id = InputUser(user_id=peer.user_id, access_hash=peer.access_hash)
                     input_bot_app = InputBotAppShortName(bot_id=bot_id, short_name=bot_shortname)
                     self._webview_data = {'peer': peer, 'app': input_bot_app} if bot_shortname \
@@ -106,20 +237,19 @@ class UniversalTelegramClient:
 
         async with self.lock:
             try:
-                if not self.client.is_connected():
-                    await self.client.connect()
+                await self._acquire_connection()
                 await self._telethon_initialize_webview_data(bot_username=bot_username, bot_shortname=bot_shortname)
                 await asyncio.sleep(uniform(1, 2))
 
                 ref_id = default_val
                 start = {'start_param': ref_id}
 
-                web_view = await self.client(messages.RequestAppWebViewRequest(
+                web_view = await self._call(lambda: self.client(messages.RequestAppWebViewRequest(
                     **self._webview_data,
                     platform='android',
                     write_allowed=True,
                     **start
-                ))
+                )), 'auth')
 
                 url = web_view.url
                 
@@ -130,6 +260,9 @@ class UniversalTelegramClient:
 
                 return url
 
+            except (PeerIdInvalidError, BotInvalidError):
+                self._forget_bot_peer(bot_username)
+                raise
             except (UnauthorizedError, AuthKeyUnregisteredError):
                 raise InvalidSession(f"{self.session_name}: User is unauthorized")
             except (UserDeactivatedError, UserDeactivatedBanError, PhoneNumberBannedError):
@@ -139,9 +272,7 @@ class UniversalTelegramClient:
                 raise
 
             finally:
-                if self.client.is_connected():
-                    await self.client.disconnect()
-                    await asyncio.sleep(15)
+                await self._release_connection()
 
     async def _telethon_get_webview_url(self, bot_username: str, bot_url: str, default_val: str) -> str:
         if self.proxy and not self.client._proxy:
@@ -150,38 +281,36 @@ class UniversalTelegramClient:
 
         async with self.lock:
             try:
-                if not self.client.is_connected():
-                    await self.client.connect()
+                await self._acquire_connection()
                 await self._telethon_initialize_webview_data(bot_username=bot_username)
                 await asyncio.sleep(uniform(1, 2))
 
                 ref_id = self.get_ref_id()
                 start = {'start_param': ref_id} if self.is_first_run else {}
 
-                start_state = False
-                async for message in self.client.iter_messages(bot_username):
-                    if r'/start' in message.text:
-                        start_state = True
-                        break
-                await asyncio.sleep(uniform(0.5, 1))
-                if not start_state:
-                    await self.client(messages.StartBotRequest(
+                if not await self._telethon_scan_start_message(bot_username):
+                    await asyncio.sleep(uniform(0.5, 1))
+                    await self._call(lambda: self.client(messages.StartBotRequest(
                         **self._webview_data,
                         start_param=ref_id,
                         random_id=randint(1, 2**63)
-                    ))
-                await asyncio.sleep(uniform(1, 2))
+                    )), 'auth')
+                    await asyncio.sleep(uniform(1, 2))
+                tg_meta.mark(self.session_name, START_SENT, bot_username)
 
-                web_view = await self.client(messages.RequestWebViewRequest(
+                web_view = await self._call(lambda: self.client(messages.RequestWebViewRequest(
                     **self._webview_data,
                     platform='android',
                     from_bot_menu=False,
                     url=bot_url,
                     **start
-                ))
+                )), 'auth')
 
                 return web_view.url
 
+            except (PeerIdInvalidError, BotInvalidError):
+                self._forget_bot_peer(bot_username)
+                raise
             except (UnauthorizedError, AuthKeyUnregisteredError):
                 raise InvalidSession(f"{self.session_name}: User is unauthorized")
             except (UserDeactivatedError, UserDeactivatedBanError, PhoneNumberBannedError):
@@ -191,17 +320,18 @@ class UniversalTelegramClient:
                 raise
 
             finally:
-                if self.client.is_connected():
-                    await self.client.disconnect()
-                    await asyncio.sleep(15)
+                await self._release_connection()
 
     async def _pyrogram_initialize_webview_data(self, bot_username: str, bot_shortname: str = None):
         if not self._webview_data:
             while True:
                 try:
-                    peer = await self.client.resolve_peer(bot_username)
+                    peer = self._cached_bot_peer(bot_username)
                     if not peer:
-                        raise Exception("Failed to resolve peer")
+                        peer = await self._call(lambda: self.client.resolve_peer(bot_username), 'auth')
+                        if not peer:
+                            raise Exception("Failed to resolve peer")
+                        tg_meta.set_peer(self.session_name, bot_username, peer.user_id, peer.access_hash)
                         
                     input_bot_app = ptypes.InputBotAppShortName(bot_id=peer, short_name=bot_shortname)
                     self._webview_data = {'peer': peer, 'app': input_bot_app} if bot_shortname \
@@ -222,8 +352,7 @@ class UniversalTelegramClient:
 
         async with self.lock:
             try:
-                if not self.client.is_connected:
-                    await self.client.connect()
+                await self._acquire_connection()
                 
                 await self._pyrogram_initialize_webview_data(bot_username)
                 await asyncio.sleep(uniform(1, 2))
@@ -231,37 +360,27 @@ class UniversalTelegramClient:
                 start_param = default_val
                 start = {'start_param': start_param}
 
-                start_state = False
-                try:
-                    async for message in self.client.get_chat_history(bot_username):
-                        if message and message.text and r'/start' in message.text:
-                            start_state = True
-                            break
-                except Exception as e:
-                    start_state = False
-                
-                await asyncio.sleep(uniform(0.5, 1))
-                
-                if not start_state:
+                if not await self._pyrogram_scan_start_message(bot_username):
+                    await asyncio.sleep(uniform(0.5, 1))
                     try:
-                        await self.client.invoke(pmessages.StartBot(
+                        await self._call(lambda: self.client.invoke(pmessages.StartBot(
                             **self._webview_data,
                             random_id=randint(1, 2**63),
                             start_param=start_param
-                        ))
+                        )), 'auth')
                     except Exception as e:
                         logger.error(f"❌ {self.session_name} | Failed to send start command: {str(e)}")
                         raise
+                    await asyncio.sleep(uniform(1, 2))
+                tg_meta.mark(self.session_name, START_SENT, bot_username)
                 
-                await asyncio.sleep(uniform(1, 2))
-                
-                web_view = await self.client.invoke(pmessages.RequestWebView(
+                web_view = await self._call(lambda: self.client.invoke(pmessages.RequestWebView(
                     **self._webview_data,
                     platform='android',
                     from_bot_menu=False,
                     url=bot_shortname,
                     **start
-                ))
+                )), 'auth')
                 
                 if not web_view:
                     logger.error(f"❌ {self.session_name} | Web view request returned None")
@@ -269,6 +388,9 @@ class UniversalTelegramClient:
                 
                 return web_view.url
 
+            except (PeerIdInvalid, BotInvalid):
+                self._forget_bot_peer(bot_username)
+                raise
             except (Unauthorized, AuthKeyUnregistered):
                 logger.error(f"❌ {self.session_name} | User is unauthorized")
                 raise InvalidSession(f"{self.session_name}: User is unauthorized")
@@ -280,9 +402,7 @@ class UniversalTelegramClient:
                 raise
 
             finally:
-                if self.client.is_connected:
-                    await self.client.disconnect()
-                    await asyncio.sleep(15)
+                await self._release_connection()
 
     async def _pyrogram_get_webview_url(self, bot_username: str, bot_url: str, default_val: str) -> str:
         if self.proxy and not self.client.proxy:
@@ -291,8 +411,7 @@ class UniversalTelegramClient:
 
         async with self.lock:
             try:
-                if not self.client.is_connected:
-                    await self.client.connect()
+                await self._acquire_connection()
                 
                 await self._pyrogram_initialize_webview_data(bot_username)
                 await asyncio.sleep(uniform(1, 2))
@@ -300,37 +419,27 @@ class UniversalTelegramClient:
                 start_param = default_val
                 start = {'start_param': start_param}
 
-                start_state = False
-                try:
-                    async for message in self.client.get_chat_history(bot_username):
-                        if message and message.text and r'/start' in message.text:
-                            start_state = True
-                            break
-                except Exception as e:
-                    start_state = False
-                
-                await asyncio.sleep(uniform(0.5, 1))
-                
-                if not start_state:
+                if not await self._pyrogram_scan_start_message(bot_username):
+                    await asyncio.sleep(uniform(0.5, 1))
                     try:
-                        await self.client.invoke(pmessages.StartBot(
+                        await self._call(lambda: self.client.invoke(pmessages.StartBot(
                             **self._webview_data,
                             random_id=randint(1, 2**63),
                             start_param=start_param
-                        ))
+                        )), 'auth')
                     except Exception as e:
                         logger.error(f"❌ {self.session_name} | Failed to send start command: {str(e)}")
                         raise
+                    await asyncio.sleep(uniform(1, 2))
+                tg_meta.mark(self.session_name, START_SENT, bot_username)
                 
-                await asyncio.sleep(uniform(1, 2))
-                
-                web_view = await self.client.invoke(pmessages.RequestWebView(
+                web_view = await self._call(lambda: self.client.invoke(pmessages.RequestWebView(
                     **self._webview_data,
                     platform='android',
                     from_bot_menu=False,
                     url=bot_url,
                     **start
-                ))
+                )), 'auth')
                 
                 if not web_view:
                     logger.error(f"❌ {self.session_name} | Web view request returned None")
@@ -338,6 +447,9 @@ class UniversalTelegramClient:
                 
                 return web_view.url
 
+            except (PeerIdInvalid, BotInvalid):
+                self._forget_bot_peer(bot_username)
+                raise
             except (Unauthorized, AuthKeyUnregistered):
                 logger.error(f"❌ {self.session_name} | User is unauthorized")
                 raise InvalidSession(f"{self.session_name}: User is unauthorized")
@@ -349,46 +461,51 @@ class UniversalTelegramClient:
                 raise
 
             finally:
-                if self.client.is_connected:
-                    await self.client.disconnect()
-                    await asyncio.sleep(15)
+                await self._release_connection()
 
     async def _telethon_join_and_mute_tg_channel(self, link: str):
         path = link.replace("https://t.me/", "")
         if path == 'money':
             return
+        if tg_meta.has(self.session_name, JOINED_CHANNEL, path):
+            tg_meta.avoid('join_channel')
+            return
 
         async with self.lock:
-            async with self.client as client:
-                try:
-                    if path.startswith('+'):
-                        invite_hash = path[1:]
-                        result = await client(messages.ImportChatInviteRequest(hash=invite_hash))
-                        channel_title = result.chats[0].title
-                        entity = result.chats[0]
-                    else:
-                        entity = await client.get_entity(f'@{path}')
-                        await client(channels.JoinChannelRequest(channel=entity))
-                        channel_title = entity.title
-
-                    await asyncio.sleep(1)
-
-                    await client(account.UpdateNotifySettingsRequest(
-                        peer=InputNotifyPeer(entity),
-                        settings=InputPeerNotifySettings(
-                            show_previews=False,
-                            silent=True,
-                            mute_until=datetime.today() + timedelta(days=365)
-                        )
-                    ))
-
-                    logger.info(f"<ly>{self.session_name}</ly> | Subscribed to channel: <y>{channel_title}</y>")
-                except FloodWaitError as fl:
-                    logger.warning(f"<ly>{self.session_name}</ly> | FloodWait {fl}. Waiting {fl.seconds}s")
-                    return fl.seconds
-                except Exception as e:
-                    log_error(
-                        f"<ly>{self.session_name}</ly> | (Task) Error while subscribing to tg channel {link}: {e}")
+            await self._acquire_connection()
+            client = self.client
+            try:
+                if path.startswith('+'):
+                    invite_hash = path[1:]
+                    result = await self._call(lambda: client(messages.ImportChatInviteRequest(hash=invite_hash)))
+                    channel_title = result.chats[0].title
+                    entity = result.chats[0]
+                else:
+                    entity = await self._call(lambda: client.get_entity(f'@{path}'))
+                    await self._call(lambda: client(channels.JoinChannelRequest(channel=entity)))
+                    channel_title = entity.title
+
+                await asyncio.sleep(1)
+
+                await self._call(lambda: client(account.UpdateNotifySettingsRequest(
+                    peer=InputNotifyPeer(entity),
+                    settings=InputPeerNotifySettings(
+                        show_previews=False,
+                        silent=True,
+                        mute_until=datetime.today() + timedelta(days=365)
+                    )
+                )))
+
+                tg_meta.mark(self.session_name, JOINED_CHANNEL, path)
+                logger.info(f"<ly>{self.session_name}</ly> | Subscribed to channel: <y>{channel_title}</y>")
+            except FloodWaitError as fl:
+                logger.warning(f"<ly>{self.session_name}</ly> | FloodWait {fl}. Waiting {fl.seconds}s")
+                return fl.seconds
+            except Exception as e:
+                log_error(
+                    f"<ly>{self.session_name}</ly> | (Task) Error while subscribing to tg channel {link}: {e}")
+            finally:
+                await self._release_connection(penalty=False)
 
             await asyncio.sleep(uniform(15, 20))
         return
@@ -397,41 +514,48 @@ class UniversalTelegramClient:
         path = link.replace("https://t.me/", "")
         if path == 'money':
             return
+        if tg_meta.has(self.session_name, JOINED_CHANNEL, path):
+            tg_meta.avoid('join_channel')
+            return
 
         async with self.lock:
-            async with self.client:
-                try:
-                    if path.startswith('+'):
-                        invite_hash = path[1:]
-                        result = await self.client.invoke(pmessages.ImportChatInvite(hash=invite_hash))
-                        channel_title = result.chats[0].title
-                        entity = result.chats[0]
-                        peer = ptypes.InputPeerChannel(channel_id=entity.id, access_hash=entity.access_hash)
-                    else:
-                        peer = await self.client.resolve_peer(f'@{path}')
-                        channel = ptypes.InputChannel(channel_id=peer.channel_id, access_hash=peer.access_hash)
-                        await self.client.invoke(pchannels.JoinChannel(channel=channel))
-                        channel_title = path
-
-                    await asyncio.sleep(1)
-
-                    await self.client.invoke(paccount.UpdateNotifySettings(
-                        peer=ptypes.InputNotifyPeer(peer=peer),
-                        settings=ptypes.InputPeerNotifySettings(
-                            show_previews=False,
-                            silent=True,
-                            mute_until=2147483647))
-                    )
+            await self._acquire_connection()
+            try:
+                if path.startswith('+'):
+                    invite_hash = path[1:]
+                    result = await self._call(lambda: self.client.invoke(pmessages.ImportChatInvite(hash=invite_hash)))
+                    channel_title = result.chats[0].title
+                    entity = result.chats[0]
+                    peer = ptypes.InputPeerChannel(channel_id=entity.id, access_hash=entity.access_hash)
+                else:
+                    peer = await self._call(lambda: self.client.resolve_peer(f'@{path}'))
+                    channel = ptypes.InputChannel(channel_id=peer.channel_id, access_hash=peer.access_hash)
+                    await self._call(lambda: self.client.invoke(pchannels.JoinChannel(channel=channel)))
+                    channel_title = path
+
+                await asyncio.sleep(1)
+
+                await self._call(lambda: self.client.invoke(paccount.UpdateNotifySettings(
+                    peer=ptypes.InputNotifyPeer(peer=peer),
+                    settings=ptypes.InputPeerNotifySettings(
+                        show_previews=False,
+                        silent=True,
+                        mute_until=2147483647))
+                ))
 
-                    logger.info(f"<ly>{self.session_name}</ly> | Subscribed to channel: <y>{channel_title}</y>")
-                except FloodWait as e:
-                    logger.warning(f"<ly>{self.session_name}</ly> | FloodWait {e}. Waiting {e.value}s")
-                    return e.value
-                except UserAlreadyParticipant:
-                    logger.info(f"<ly>{self.session_name}</ly> | Was already Subscribed to channel: <y>{link}</y>")
-                except Exception as e:
-                    log_error(
-                        f"<ly>{self.session_name}</ly> | (Task) Error while subscribing to tg channel {link}: {e}")
+                tg_meta.mark(self.session_name, JOINED_CHANNEL, path)
+                logger.info(f"<ly>{self.session_name}</ly> | Subscribed to channel: <y>{channel_title}</y>")
+            except FloodWait as e:
+                logger.warning(f"<ly>{self.session_name}</ly> | FloodWait {e}. Waiting {e.value}s")
+                return e.value
+            except UserAlreadyParticipant:
+                tg_meta.mark(self.session_name, JOINED_CHANNEL, path)
+                logger.info(f"<ly>{self.session_name}</ly> | Was already Subscribed to channel: <y>{link}</y>")
+            except Exception as e:
+                log_error(
+                    f"<ly>{self.session_name}</ly> | (Task) Error while subscribing to tg channel {link}: {e}")
+            finally:
+                await self._release_connection(penalty=False)
 
             await asyncio.sleep(uniform(15, 20))
         return
@@ -447,12 +571,14 @@ class UniversalTelegramClient:
             return
 
         async with self.lock:
-            async with self.client:
-                try:
-                    await self.client(account.UpdateProfileRequest(**update_params))
-                except Exception as e:
-                    log_error(
-                        f"<ly>{self.session_name}</ly> | Failed to update profile: {e}")
+            await self._acquire_connection()
+            try:
+                await self._call(lambda: self.client(account.UpdateProfileRequest(**update_params)))
+            except Exception as e:
+                log_error(
+                    f"<ly>{self.session_name}</ly> | Failed to update profile: {e}")
+            finally:
+                await self._release_connection(penalty=False)
             await asyncio.sleep(uniform(15, 20))
 
     async def _pyrogram_update_profile(self, first_name: str = None, last_name: str = None, about: str = None):
@@ -466,12 +592,14 @@ class UniversalTelegramClient:
             return
 
         async with self.lock:
-            async with self.client:
-                try:
-                    await self.client.invoke(paccount.UpdateProfile(**update_params))
-                except Exception as e:
-                    log_error(
-                        f"<ly>{self.session_name}</ly> | Failed to update profile: {e}")
+            await self._acquire_connection()
+            try:
+                await self._call(lambda: self.client.invoke(paccount.UpdateProfile(**update_params)))
+            except Exception as e:
+                log_error(
+                    f"<ly>{self.session_name}</ly> | Failed to update profile: {e}")
+            finally:
+                await self._release_connection(penalty=False)
             await asyncio.sleep(uniform(15, 20))
 
     def get_ref_id(self) -> str:
@@ -508,31 +636,36 @@ class UniversalTelegramClient:
             return False
             
         channel_username = channel_username.replace("@", "")
+        if tg_meta.has(self.session_name, JOINED_CHANNEL, channel_username):
+            tg_meta.avoid('join_channel')
+            logger.info(f"{self.session_name} | Already subscribed to channel <y>{channel_username}</y>")
+            return True
         
-        was_connected = self.client.is_connected if not self.is_pyrogram else self.client.is_connected
+        was_in_use = self.in_use
         
         try:
             logger.info(f"{self.session_name} | Subscribing to channel <y>{channel_username}</y>")
             
-            if not was_connected:
-                await self.client.connect()
+            await self._acquire_connection()
                 
             try:
                 if self.is_pyrogram:
                     try:
-                        await self.client.join_chat(channel_username)
-                        chat = await self.client.get_chat(channel_username)
+                        await self._call(lambda: self.client.join_chat(channel_username))
+                        chat = await self._call(lambda: self.client.get_chat(channel_username))
                         await self._pyrogram_mute_and_archive_channel(chat.id)
                     except UserAlreadyParticipant:
                         logger.info(f"{self.session_name} | Already subscribed to channel <y>{channel_username}</y>")
+                    tg_meta.mark(self.session_name, JOINED_CHANNEL, channel_username)
                     return True
                 else:
                     try:
-                        await self.client.join_chat(channel_username)
-                        chat = await self.client.get_chat(channel_username)
+                        await self._call(lambda: self.client.join_chat(channel_username))
+                        chat = await self._call(lambda: self.client.get_chat(channel_username))
                         await self._telethon_mute_and_archive_channel(chat.id)
                     except UserAlreadyParticipant:
                         logger.info(f"{self.session_name} | Already subscribed to channel <y>{channel_username}</y>")
+                    tg_meta.mark(self.session_name, JOINED_CHANNEL, channel_username)
                     return True
                     
             except FloodWait as e:
@@ -550,31 +683,32 @@ class UniversalTelegramClient:
                 return False
                 
         finally:
-            if not was_connected and (self.client.is_connected if not self.is_pyrogram else self.client.is_connected):
-                await self.client.disconnect()
+            if not was_in_use:
+                await self._release_connection(penalty=False)
                 
         return False
 
     async def _telethon_mute_and_archive_channel(self, channel_id: int) -> None:
         try:
-            await self.client(account.UpdateNotifySettingsRequest(
+            peer = await self._call(lambda: self.client.get_input_entity(channel_id))
+            await self._call(lambda: self.client(account.UpdateNotifySettingsRequest(
                 peer=InputNotifyPeer(
-                    peer=await self.client.get_input_entity(channel_id)
+                    peer=peer
                 ),
                 settings=InputPeerNotifySettings(
                     mute_until=2147483647
                 )
-            ))
+            )))
             logger.info(f"{self.session_name} | Notifications disabled")
             
-            await self.client(folders.EditPeerFolders(
+            await self._call(lambda: self.client(folders.EditPeerFolders(
                 folder_peers=[
                     raw.InputFolderPeer(
-                        peer=await self.client.get_input_entity(channel_id),
+                        peer=peer,
                         folder_id=1
                     )
                 ]
-            ))
+            )))
             logger.info(f"{self.session_name} | Channel added to archive")
             
         except Exception as e:
@@ -582,18 +716,18 @@ class UniversalTelegramClient:
 
     async def _pyrogram_mute_and_archive_channel(self, channel_id: int) -> None:
         try:
-            peer = await self.client.resolve_peer(channel_id)
+            peer = await self._call(lambda: self.client.resolve_peer(channel_id))
             
-            await self.client.invoke(paccount.UpdateNotifySettings(
+            await self._call(lambda: self.client.invoke(paccount.UpdateNotifySettings(
                 peer=ptypes.InputNotifyPeer(peer=peer),
                 settings=ptypes.InputPeerNotifySettings(
                     mute_until=2147483647
                 )
-            ))
+            )))
             logger.info(f"{self.session_name} | Notifications disabled")
             
             try:
-                await self.client.invoke(
+                await self._call(lambda: self.client.invoke(
                     pfolders.EditPeerFolders(
                         folder_peers=[
                             ptypes.InputFolderPeer(
@@ -602,7 +736,7 @@ class UniversalTelegramClient:
                             )
                         ]
                     )
-                )
+                ))
                 logger.info(f"{self.session_name} | Channel added to archive")
             except Exception as e:
                 logger.warning(f"{self.session_name} | Error while archiving: {str(e)}")
@@ -614,66 +748,63 @@ class UniversalTelegramClient:
         try:
             if not chat_username.startswith('@'):
                 chat_username = f"@{chat_username}"
+            if tg_meta.has(self.session_name, JOINED_CHAT, chat_username):
+                tg_meta.avoid('join_chat')
+                return True
 
             async with self.lock:
                 try:
+                    await self._acquire_connection()
                     if self.is_pyrogram:
-                        if not self.client.is_connected:
-                            await self.client.connect()
 
                         try:
-                            await self.client.join_chat(chat_username)
+                            await self._call(lambda: self.client.join_chat(chat_username))
                             logger.info(f"{self.session_name} | Successfully joined chat {chat_username}")
 
-                            chat = await self.client.get_chat(chat_username)
-                            peer = await self.client.resolve_peer(chat.id)
+                            chat = await self._call(lambda: self.client.get_chat(chat_username))
+                            peer = await self._call(lambda: self.client.resolve_peer(chat.id))
 
-                            await self.client.invoke(paccount.UpdateNotifySettings(
+                            await self._call(lambda: self.client.invoke(paccount.UpdateNotifySettings(
                                 peer=ptypes.InputNotifyPeer(peer=peer),
                                 settings=ptypes.InputPeerNotifySettings(
                                     show_previews=False,
                                     silent=True,
                                     mute_until=2147483647
                                 )
-                            ))
+                            )))
                             logger.info(f"{self.session_name} | Notifications disabled for chat {chat_username}")
 
+                            tg_meta.mark(self.session_name, JOINED_CHAT, chat_username)
                             return True
                         except Exception as e:
                             logger.error(f"{self.session_name} | Error joining chat (Pyrogram): {str(e)}")
                             return False
                     else:
-                        if not self.client.is_connected():
-                            await self.client.connect()
-
                         try:
-                            await self.client(channels.JoinChannelRequest(chat_username))
+                            await self._call(lambda: self.client(channels.JoinChannelRequest(chat_username)))
                             logger.info(f"{self.session_name} | Successfully joined chat {chat_username}")
 
-                            entity = await self.client.get_entity(chat_username)
-                            await self.client(account.UpdateNotifySettingsRequest(
+                            entity = await self._call(lambda: self.client.get_entity(chat_username))
+                            peer = await self._call(lambda: self.client.get_input_entity(entity))
+                            await self._call(lambda: self.client(account.UpdateNotifySettingsRequest(
                                 peer=InputNotifyPeer(
-                                    peer=await self.client.get_input_entity(entity)
+                                    peer=peer
                                 ),
                                 settings=InputPeerNotifySettings(
                                     show_previews=False,
                                     silent=True,
                                     mute_until=2147483647
                                 )
-                            ))
+                            )))
                             logger.info(f"{self.session_name} | Notifications disabled for chat {chat_username}")
 
+                            tg_meta.mark(self.session_name, JOINED_CHAT, chat_username)
                             return True
                         except Exception as e:
                             logger.error(f"{self.session_name} | Error joining chat (Telethon): {str(e)}")
                             return False
                 finally:
-                    if self.is_pyrogram:
-                        if self.client.is_connected:
-                            await self.client.disconnect()
-                    else:
-                        if self.client.is_connected():
-                            await self.client.disconnect()
+                    await self._release_connection(penalty=False)
 
         except Exception as e:
             logger.error(f"{self.session_name} | General error joining chat: {str(e)}")
@@ -683,29 +814,31 @@ class UniversalTelegramClient:
         try:
             bot_username = "@TheOpenCoin_bot"
             command = f"/start pool_{pool_id}"
+            if tg_meta.has(self.session_name, STARTED_POOL, pool_id):
+                tg_meta.avoid('pool_start')
+                return True
             max_retries = 3
             retry_delay = 5
             
             async with self.lock:
                 try:
+                    await self._acquire_connection()
                     if self.is_pyrogram:
-                        if not self.client.is_connected:
-                            await self.client.connect()
                             
                         for attempt in range(max_retries):
                             try:
-                                await self.client.send_message(bot_username, command)
-                                peer = await self.client.resolve_peer(bot_username)
-                                await self.client.invoke(paccount.UpdateNotifySettings(
+                                await self._call(lambda: self.client.send_message(bot_username, command))
+                                peer = await self._call(lambda: self.client.resolve_peer(bot_username))
+                                await self._call(lambda: self.client.invoke(paccount.UpdateNotifySettings(
                                     peer=ptypes.InputNotifyPeer(peer=peer),
                                     settings=ptypes.InputPeerNotifySettings(
                                         show_previews=False,
                                         silent=True,
                                         mute_until=2147483647
                                     )
-                                ))
+                                )))
                                 try:
-                                    await self.client.invoke(
+                                    await self._call(lambda: self.client.invoke(
                                         pfolders.EditPeerFolders(
                                             folder_peers=[
                                                 ptypes.InputFolderPeer(
@@ -714,7 +847,7 @@ class UniversalTelegramClient:
                                                 )
                                             ]
                                         )
-                                    )
+                                    ))
                                 except ValueError as ve:
                                     if "unknown constructor" in str(ve).lower():
                                         logger.warning(f"{self.session_name} | Ignoring unknown constructor error while archiving")
@@ -722,6 +855,7 @@ class UniversalTelegramClient:
                                     raise
                                 except Exception as e:
                                     logger.warning(f"{self.session_name} | Error while archiving bot chat: {str(e)}")
+                                tg_meta.mark(self.session_name, STARTED_POOL, pool_id)
                                 return True
                                 
                             except ValueError as ve:
@@ -742,24 +876,17 @@ class UniversalTelegramClient:
                         return False
                         
                     else:
-                        if not self.client.is_connected():
-                            await self.client.connect()
-                            
                         try:
-                            entity = await self.client.get_input_entity(bot_username)
-                            await self.client.send_message(entity, command)
-                            await self.client.edit_folder([entity], folder=1) 
+                            entity = await self._call(lambda: self.client.get_input_entity(bot_username))
+                            await self._call(lambda: self.client.send_message(entity, command))
+                            await self._call(lambda: self.client.edit_folder([entity], folder=1)) 
+                            tg_meta.mark(self.session_name, STARTED_POOL, pool_id)
                             return True
                         except Exception as e:
                             logger.error(f"{self.session_name} | Error sending start command (Telethon): {str(e)}")
                             return False
                 finally:
-                    if self.is_pyrogram:
-                        if self.client.is_connected:
-                            await self.client.disconnect()
-                    else:
-                        if self.client.is_connected():
-                            await self.client.disconnect()
+                    await self._release_connection(penalty=False)
                             
         except Exception as e:
             logger.error(f"{self.session_name} | General error sending start command: {str(e)}")
@@ -7,8 +7,9 @@ from bot.utils import logger
 from bot.config import settings
 
 class UpdateManager:
-    def __init__(self):
+    def __init__(self, workers: int = 1):
         self.branch = "main"
+        self.workers = workers
         self.check_interval = settings.CHECK_UPDATE_INTERVAL
         self.is_update_restart = "--update-restart" in sys.argv
         self._configure_git_safe_directory()
@@ -90,7 +91,7 @@ class UpdateManager:
 
         logger.info("✅ Update successfully installed! Restarting application...")
         
-        new_args = [sys.executable, sys.argv[0], "-a", "1", "--update-restart"]
+        new_args = [sys.executable, sys.argv[0], "-a", "1", "--update-restart", "--workers", str(self.workers)]
         os.execv(sys.executable, new_args)
 
     async def run(self) -> None:
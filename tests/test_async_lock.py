@@ -0,0 +1,66 @@
+import asyncio
+import multiprocessing
+import os
+import tempfile
+import time
+
+import pytest
+
+from bot.config import settings
+from bot.utils import async_lock
+from bot.utils.async_lock import AsyncInterProcessLock
+
+pytestmark = pytest.mark.skipif(async_lock.fcntl is None, reason='fcntl is not available')
+
+
+def hold_lock(lock_file: str, seconds: float, ready) -> None:
+    fd = async_lock._wait_lock_file(lock_file)
+    ready.set()
+    time.sleep(seconds)
+    async_lock._unlock_file(fd)
+
+
+def try_lock(lock_file: str, result) -> None:
+    fd = async_lock._try_lock_file(lock_file)
+    result.put(fd is not None)
+    if fd is not None:
+        async_lock._unlock_file(fd)
+
+
+def lock_is_free(lock_file: str) -> bool:
+    result = multiprocessing.Queue()
+    process = multiprocessing.Process(target=try_lock, args=(lock_file, result))
+    process.start()
+    process.join()
+    return result.get()
+
+
+def test_cancelled_waiter_does_not_release_next_holder(monkeypatch):
+    monkeypatch.setattr(settings, 'LOCK_MODE', 'file')
+    lock_file = os.path.join(tempfile.mkdtemp(), 'lock_files', 'test.lock')
+    os.makedirs(os.path.dirname(lock_file))
+
+    ready = multiprocessing.Event()
+    holder = multiprocessing.Process(target=hold_lock, args=(lock_file, 1.5, ready))
+    holder.start()
+    assert ready.wait(10)
+
+    async def scenario() -> bool:
+        async def wait_forever():
+            async with AsyncInterProcessLock(lock_file):
+                await asyncio.sleep(60)
+
+        waiter = asyncio.create_task(wait_forever())
+        await asyncio.sleep(0.3)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+
+        async with AsyncInterProcessLock(lock_file):
+            await asyncio.sleep(0.5)
+            return await asyncio.get_running_loop().run_in_executor(None, lock_is_free, lock_file)
+
+    try:
+        assert asyncio.run(scenario()) is False
+    finally:
+        holder.join()
+    assert lock_is_free(lock_file)